@@ -1068,6 +1068,13 @@ resource "aws_iam_policy" "webhook_policy" {
           local.github_app_ids_secret_arn
         ]
       },
+      {
+        # Cold-start batch fetch of the three secrets above. BatchGetSecretValue has no
+        # resource-level scoping; GetSecretValue on each secret is still required.
+        Effect   = "Allow"
+        Action   = ["secretsmanager:BatchGetSecretValue"]
+        Resource = "*"
+      },
       {
         Effect   = "Allow"
         Action   = ["kms:Decrypt"]
@@ -1110,6 +1117,7 @@ resource "aws_iam_policy" "worker_policy" {
       {
         Effect = "Allow"
         Action = [
+          "dynamodb:GetItem",
           "dynamodb:PutItem"
         ]
         Resource = aws_dynamodb_table.idempotency.arn
@@ -1799,6 +1807,8 @@ resource "aws_lambda_function" "pr_review_worker" {
       SKIP_PATTERNS                     = var.skip_patterns
       # P1-B: incremental review
       INCREMENTAL_REVIEW_ENABLED        = tostring(var.incremental_review_enabled)
+      REVIEW_CACHE_ENABLED              = tostring(var.review_cache_enabled)
+      TWO_STAGE_MIN_DELTA               = tostring(var.two_stage_min_delta)
       PR_REVIEW_STATE_TABLE             = aws_dynamodb_table.pr_review_state.name
       # P2-A: PR compression
       PATCH_CHAR_BUDGET                 = tostring(var.patch_char_budget)
@@ -2790,6 +2800,7 @@ resource "aws_lambda_function" "test_gen" {
       TEST_GEN_MODEL_ID                 = var.test_gen_model_id
       TEST_GEN_DELIVERY_MODE            = var.test_gen_delivery_mode
       TEST_GEN_MAX_FILES                = tostring(var.test_gen_max_files)
+      TEST_GEN_PROMPT_CACHE             = tostring(var.test_gen_prompt_cache_enabled)
       TEST_GEN_KB_TOP_K                 = tostring(var.test_gen_kb_top_k)
       GITHUB_API_BASE                   = var.github_api_base
       GITHUB_APP_PRIVATE_KEY_SECRET_ARN = local.github_app_private_key_secret_arn
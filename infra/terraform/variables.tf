@@ -1184,6 +1184,12 @@ variable "test_gen_max_files" {
   default     = 10
 }
 
+variable "test_gen_prompt_cache_enabled" {
+  description = "Add a Bedrock cachePoint after the static test-gen system prompt (Claude 3.5+/Nova models only)"
+  type        = bool
+  default     = false
+}
+
 # ---------------------------------------------------------------------------
 # PR Description Generator
 # ---------------------------------------------------------------------------
@@ -1477,6 +1483,18 @@ variable "incremental_review_enabled" {
   default     = true
 }
 
+variable "review_cache_enabled" {
+  description = "When true, the worker reuses a stored 2-stage review for an identical PR context and model pair instead of re-invoking Bedrock."
+  type        = bool
+  default     = true
+}
+
+variable "two_stage_min_delta" {
+  description = "PRs with fewer changed lines (additions + deletions) than this skip the 2-stage planner and go straight to the reviewer. 0 always runs the planner."
+  type        = number
+  default     = 50
+}
+
 # ---------------------------------------------------------------------------
 # P2-A: PR diff compression
 # ---------------------------------------------------------------------------
@@ -30,18 +30,25 @@ class BedrockChatClient:
         guardrail_version: str | None = None,
         guardrail_trace: str | None = None,
         bedrock_runtime: Optional[BaseClient] = None,
+        cache_system_prompt: bool = False,
     ) -> None:
         self._model_id = model_id
         self._max_tokens = max_tokens or int(os.getenv("CHATBOT_MAX_TOKENS", "1200"))
         self._guardrail_identifier = (guardrail_identifier or "").strip() or None
         self._guardrail_version = (guardrail_version or "").strip() or None
         self._guardrail_trace = _normalize_guardrail_trace(guardrail_trace)
+        self._cache_system_prompt = cache_system_prompt
         self._runtime = bedrock_runtime or boto3.client("bedrock-runtime", region_name=region)
 
     def _build_request(self, system_prompt: str, user_prompt: str) -> dict[str, Any]:
+        system: list[dict[str, Any]] = [{"text": system_prompt}]
+        if self._cache_system_prompt:
+            # Everything before the cache point is cached by Bedrock and billed at the
+            # cache-read rate on subsequent calls with an identical prefix.
+            system.append({"cachePoint": {"type": "default"}})
         request: dict = {
             "modelId": self._model_id,
-            "system": [{"text": system_prompt}],
+            "system": system,
             "messages": [
                 {
                     "role": "user",
@@ -78,6 +85,14 @@ class BedrockChatClient:
             telemetry["guardrail_action"] = action
             if action.lower() not in {"allow", "allowed", "none", "pass"}:
                 telemetry["guardrail_intervened"] = True
+        usage = payload.get("usage")
+        if isinstance(usage, dict):
+            for usage_key, telemetry_key in (
+                ("cacheReadInputTokens", "cache_read_input_tokens"),
+                ("cacheWriteInputTokens", "cache_write_input_tokens"),
+            ):
+                if usage_key in usage:
+                    telemetry[telemetry_key] = int(usage.get(usage_key) or 0)
         nested_guardrail = payload.get("guardrail")
         if isinstance(nested_guardrail, dict):
             nested_action = str(nested_guardrail.get("action") or "").strip()
@@ -10,6 +10,9 @@ import jsonschema
 from botocore.client import BaseClient
 
 
+_JSON_DECODER = json.JSONDecoder()
+
+
 def _normalize_invoke_trace(value: str | None) -> str | None:
     normalized = (value or "").strip().upper()
     if normalized in {"ENABLED", "DISABLED", "ENABLED_FULL"}:
@@ -117,11 +120,15 @@ class BedrockReviewClient:
         if stripped.startswith("{") and stripped.endswith("}"):
             return json.loads(stripped)
 
+        # Decode the first brace that starts a valid object; prose around it
+        # (even with braces of its own) is ignored instead of failing the review.
         start = stripped.find("{")
-        end = stripped.rfind("}")
-        if start == -1 or end == -1 or end <= start:
-            raise ValueError("Bedrock response did not contain a JSON object")
-        return json.loads(stripped[start : end + 1])
+        while start != -1:
+            try:
+                return _JSON_DECODER.raw_decode(stripped, start)[0]
+            except json.JSONDecodeError:
+                start = stripped.find("{", start + 1)
+        raise ValueError("Bedrock response did not contain a JSON object")
 
     # -- 2-stage planner / reviewer --------------------------------------------
 
@@ -131,15 +138,17 @@ class BedrockReviewClient:
         model_id: Optional[str] = None,
         system: Optional[str] = None,
         max_tokens: int = 1024,
+        context_json: Optional[str] = None,
     ) -> tuple[dict[str, Any], int, int]:
         """Stage-1: call the light model to produce a triage plan.
 
-        Returns (plan, input_tokens, output_tokens).
+        *context_json* is an optional pre-serialised ``json.dumps(context, indent=2)``
+        shared with invoke_reviewer. Returns (plan, input_tokens, output_tokens).
         """
         from worker.prompts.planner_prompt import PLANNER_SYSTEM, build_planner_messages
 
         effective_model = model_id or self._model_id
-        messages = build_planner_messages(context)
+        messages = build_planner_messages(context, context_json)
         sys_prompt = system or PLANNER_SYSTEM
         raw, in_tok, out_tok = self._invoke_model_with_system(sys_prompt, messages, effective_model, max_tokens=max_tokens)
         plan = self._parse_text_to_json(raw)
@@ -153,15 +162,17 @@ class BedrockReviewClient:
         model_id: Optional[str] = None,
         system: Optional[str] = None,
         max_tokens: int = 4096,
+        context_json: Optional[str] = None,
     ) -> tuple[dict[str, Any], int, int]:
         """Stage-2: call the heavy model to produce the full review.
 
-        Returns (review, input_tokens, output_tokens).
+        *context_json* is an optional pre-serialised ``json.dumps(context, indent=2)``
+        shared with invoke_planner. Returns (review, input_tokens, output_tokens).
         """
         from worker.prompts.review_prompt import REVIEWER_SYSTEM, build_reviewer_messages
 
         effective_model = model_id or self._model_id
-        messages = build_reviewer_messages(context, plan)
+        messages = build_reviewer_messages(context, plan, context_json)
         sys_prompt = system or REVIEWER_SYSTEM
         raw, in_tok, out_tok = self._invoke_model_with_system(sys_prompt, messages, effective_model, max_tokens=max_tokens)
         review = self._parse_text_to_json(raw)
@@ -1,5 +1,7 @@
 import json
+import threading
 import time
+from datetime import datetime
 from typing import Optional, Tuple
 
 import boto3
@@ -9,6 +11,20 @@ from botocore.client import BaseClient
 
 from shared.retry import call_with_retry
 
+# Installation tokens live for one hour; refresh early enough that a token handed
+# out near the end of its life still outlasts a full Lambda invocation.
+_TOKEN_REFRESH_MARGIN_SECONDS = 300
+_DEFAULT_TOKEN_TTL_SECONDS = 3600
+
+
+def _parse_expires_at(value: object) -> Optional[float]:
+    if not isinstance(value, str) or not value:
+        return None
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
 
 class GitHubAppAuth:
     def __init__(
@@ -27,6 +43,8 @@ class GitHubAppAuth:
         self._cached_app_id: Optional[str] = None
         self._cached_installation_id: Optional[str] = None
         self._cached_private_key: Optional[str] = None
+        # installation_id -> (token, expiry epoch seconds)
+        self._cached_tokens: dict[str, Tuple[str, float]] = {}
 
     def _read_secret_string(self, secret_arn: str) -> str:
         response = self._secrets.get_secret_value(SecretId=secret_arn)
@@ -35,17 +53,25 @@ class GitHubAppAuth:
             raise ValueError(f"Secret {secret_arn} has no SecretString")
         return secret_string
 
-    def _load_app_ids(self) -> Tuple[str, str]:
-        if self._cached_app_id and self._cached_installation_id:
-            return self._cached_app_id, self._cached_installation_id
-
-        payload = json.loads(self._read_secret_string(self._app_ids_secret_arn))
+    def _store_app_ids(self, secret_string: str) -> Tuple[str, str]:
+        payload = json.loads(secret_string)
         app_id = str(payload["app_id"])
         installation_id = str(payload["installation_id"])
         self._cached_app_id = app_id
         self._cached_installation_id = installation_id
         return app_id, installation_id
 
+    def _load_app_ids(self) -> Tuple[str, str]:
+        if self._cached_app_id and self._cached_installation_id:
+            return self._cached_app_id, self._cached_installation_id
+
+        return self._store_app_ids(self._read_secret_string(self._app_ids_secret_arn))
+
+    def prime_secrets(self, app_ids_secret_string: str, private_key: str) -> None:
+        """Seed the secret caches with values the caller already fetched (e.g. in a batch)."""
+        self._store_app_ids(app_ids_secret_string)
+        self._cached_private_key = private_key
+
     def _load_private_key(self) -> str:
         if self._cached_private_key:
             return self._cached_private_key
@@ -68,6 +94,10 @@ class GitHubAppAuth:
     def get_installation_token(self, installation_id_override: Optional[str] = None) -> str:
         _, default_installation_id = self._load_app_ids()
         installation_id = installation_id_override or default_installation_id
+        cached = self._cached_tokens.get(installation_id)
+        if cached and time.time() < cached[1] - _TOKEN_REFRESH_MARGIN_SECONDS:
+            return cached[0]
+
         jwt_token = self.create_app_jwt()
         url = f"{self._api_base}/app/installations/{installation_id}/access_tokens"
 
@@ -96,4 +126,41 @@ class GitHubAppAuth:
         token = data.get("token")
         if not token:
             raise ValueError("GitHub installation token missing from response")
+        expires_at = _parse_expires_at(data.get("expires_at")) or time.time() + _DEFAULT_TOKEN_TTL_SECONDS
+        self._cached_tokens[installation_id] = (token, expires_at)
         return token
+
+
+# One instance per (secret ARNs, API base) for the life of the Lambda container.
+_cached_auths: dict[tuple[str, str, str], GitHubAppAuth] = {}
+_cached_auths_lock = threading.Lock()
+
+
+def cached_github_app_auth(
+    app_ids_secret_arn: str,
+    private_key_secret_arn: str,
+    api_base: str = "https://api.github.com",
+    http_session: Optional[requests.Session] = None,
+) -> GitHubAppAuth:
+    """Return the container-wide GitHubAppAuth for these secrets, creating it on first use.
+
+    Warm invocations reuse its cached secrets and installation tokens.
+    *http_session* is only used when the instance is created.
+    """
+    key = (app_ids_secret_arn, private_key_secret_arn, api_base)
+    with _cached_auths_lock:
+        auth = _cached_auths.get(key)
+        if auth is None:
+            auth = _cached_auths[key] = GitHubAppAuth(
+                app_ids_secret_arn=app_ids_secret_arn,
+                private_key_secret_arn=private_key_secret_arn,
+                api_base=api_base,
+                http_session=http_session,
+            )
+    return auth
+
+
+def clear_cached_github_app_auth() -> None:
+    """Drop every cached GitHubAppAuth (tests, or after rotating the App secrets)."""
+    with _cached_auths_lock:
+        _cached_auths.clear()
@@ -18,9 +18,16 @@ class GitHubClient:
         self._token_provider = token_provider
         self._api_base = api_base.rstrip("/")
         self._session = session or requests.Session()
+        # GHES serves REST under /api/v3 and GraphQL under /api/graphql.
+        if self._api_base.endswith("/api/v3"):
+            self._graphql_url = self._api_base[: -len("/v3")] + "/graphql"
+        else:
+            self._graphql_url = f"{self._api_base}/graphql"
 
     def _request(self, method: str, path: str, **kwargs) -> requests.Response:
-        url = f"{self._api_base}{path}"
+        return self._send(method, f"{self._api_base}{path}", f"github_{method}_{path}", **kwargs)
+
+    def _send(self, method: str, url: str, operation_name: str, **kwargs) -> requests.Response:
         base_headers = kwargs.pop("headers", {})
 
         def _do_request() -> requests.Response:
@@ -35,7 +42,7 @@ class GitHubClient:
             return self._session.request(method, url, headers=headers, timeout=20, **kwargs)
 
         response = call_with_retry(
-            operation_name=f"github_{method}_{path}",
+            operation_name=operation_name,
             fn=_do_request,
             is_retryable_exception=lambda exc: isinstance(exc, requests.RequestException),
             is_retryable_result=lambda r: r.status_code in {403, 429} or r.status_code >= 500,
@@ -114,6 +121,53 @@ class GitHubClient:
         )
         return response.json()
 
+    def delete_ref(self, owner: str, repo: str, ref: str) -> None:
+        self._request("DELETE", f"/repos/{owner}/{repo}/git/refs/{ref}")
+
+    def update_ref(self, owner: str, repo: str, ref: str, sha: str, force: bool = False) -> dict:
+        response = self._request(
+            "PATCH",
+            f"/repos/{owner}/{repo}/git/refs/{ref}",
+            json={"sha": sha, "force": force},
+        )
+        return response.json()
+
+    def get_git_commit(self, owner: str, repo: str, sha: str) -> dict:
+        response = self._request("GET", f"/repos/{owner}/{repo}/git/commits/{sha}")
+        return response.json()
+
+    def create_blob(self, owner: str, repo: str, content_b64: str) -> str:
+        """Upload a base64-encoded blob and return its SHA."""
+        response = self._request(
+            "POST",
+            f"/repos/{owner}/{repo}/git/blobs",
+            json={"content": content_b64, "encoding": "base64"},
+        )
+        return response.json()["sha"]
+
+    def create_tree(self, owner: str, repo: str, base_tree: str, blobs: dict[str, str]) -> str:
+        """Create a tree on top of *base_tree* with ``path -> blob SHA`` entries; return its SHA."""
+        response = self._request(
+            "POST",
+            f"/repos/{owner}/{repo}/git/trees",
+            json={
+                "base_tree": base_tree,
+                "tree": [
+                    {"path": path, "mode": "100644", "type": "blob", "sha": blob_sha}
+                    for path, blob_sha in blobs.items()
+                ],
+            },
+        )
+        return response.json()["sha"]
+
+    def create_commit(self, owner: str, repo: str, message: str, tree: str, parents: list[str]) -> str:
+        response = self._request(
+            "POST",
+            f"/repos/{owner}/{repo}/git/commits",
+            json={"message": message, "tree": tree, "parents": parents},
+        )
+        return response.json()["sha"]
+
     def get_file_contents(self, owner: str, repo: str, path: str, ref: str) -> tuple[str, str]:
         response = self._request("GET", f"/repos/{owner}/{repo}/contents/{path}", params={"ref": ref})
         data = response.json()
@@ -121,6 +175,47 @@ class GitHubClient:
         decoded = base64.b64decode(encoded).decode("utf-8")
         return decoded, data["sha"]
 
+    def graphql(self, query: str, variables: Optional[dict] = None) -> dict:
+        """Run a GraphQL query and return its ``data`` object; raises on GraphQL errors."""
+        response = self._send(
+            "POST",
+            self._graphql_url,
+            "github_graphql",
+            json={"query": query, "variables": variables or {}},
+        )
+        payload = response.json()
+        if payload.get("errors"):
+            raise RuntimeError(f"GitHub GraphQL error: {payload['errors']}")
+        return payload.get("data") or {}
+
+    def get_files_contents_batch(
+        self, owner: str, repo: str, paths: list[str], ref: str, batch_size: int = 50,
+    ) -> dict[str, str]:
+        """Fetch text contents of many files at *ref* with one GraphQL request per batch.
+
+        Returns ``{path: text}``; missing, binary, or truncated blobs are omitted.
+        """
+        contents: dict[str, str] = {}
+        for start in range(0, len(paths), batch_size):
+            batch = paths[start:start + batch_size]
+            params = ", ".join(f"$e{i}: String!" for i in range(len(batch)))
+            fields = " ".join(
+                f"f{i}: object(expression: $e{i}) {{ ... on Blob {{ text isBinary isTruncated }} }}"
+                for i in range(len(batch))
+            )
+            query = (
+                f"query($owner: String!, $name: String!, {params}) "
+                f"{{ repository(owner: $owner, name: $name) {{ {fields} }} }}"
+            )
+            variables: dict = {"owner": owner, "name": repo}
+            variables.update({f"e{i}": f"{ref}:{path}" for i, path in enumerate(batch)})
+            repository = self.graphql(query, variables).get("repository") or {}
+            for i, path in enumerate(batch):
+                blob = repository.get(f"f{i}") or {}
+                if blob.get("text") is not None and not blob.get("isBinary") and not blob.get("isTruncated"):
+                    contents[path] = blob["text"]
+        return contents
+
     def list_repository_files(self, owner: str, repo: str, ref: str) -> list[str]:
         """List all file paths in a repository tree for a given ref/branch."""
         response = self._request(
@@ -139,12 +234,16 @@ class GitHubClient:
         path: str,
         branch: str,
         message: str,
-        content: str,
+        content: str = "",
         sha: Optional[str] = None,
+        content_b64: Optional[str] = None,
     ) -> dict:
+        """Create or update a file. Pass ``content_b64`` to skip encoding already base64-encoded content."""
+        if content_b64 is None:
+            content_b64 = base64.b64encode(content.encode("utf-8")).decode("utf-8")
         payload: dict = {
             "message": message,
-            "content": base64.b64encode(content.encode("utf-8")).decode("utf-8"),
+            "content": content_b64,
             "branch": branch,
         }
         if sha:
@@ -157,6 +256,35 @@ class GitHubClient:
         )
         return response.json()
 
+    def create_commit_on_branch(
+        self,
+        owner: str,
+        repo: str,
+        branch: str,
+        expected_head_oid: str,
+        additions: list[dict],
+        message: str,
+    ) -> str:
+        """Atomically commit file additions to *branch* via GraphQL ``createCommitOnBranch``.
+
+        ``additions`` items are ``{"path": ..., "contents": <base64 str>}``. The commit
+        only lands if the branch head still equals ``expected_head_oid``. Returns the new
+        commit SHA.
+        """
+        data = self.graphql(
+            "mutation($input: CreateCommitOnBranchInput!) "
+            "{ createCommitOnBranch(input: $input) { commit { oid } } }",
+            {
+                "input": {
+                    "branch": {"repositoryNameWithOwner": f"{owner}/{repo}", "branchName": branch},
+                    "message": {"headline": message},
+                    "expectedHeadOid": expected_head_oid,
+                    "fileChanges": {"additions": additions},
+                }
+            },
+        )
+        return str((((data.get("createCommitOnBranch") or {}).get("commit") or {}).get("oid")) or "")
+
     def create_pull_request(
         self,
         owner: str,
@@ -285,8 +413,9 @@ class GitHubClient:
         sort: str = "updated",
         direction: str = "desc",
         per_page: int = 30,
+        page: int = 1,
     ) -> list[dict]:
-        """List pull requests with basic filtering."""
+        """List pull requests with basic filtering (one page per call)."""
         response = self._request(
             "GET",
             f"/repos/{owner}/{repo}/pulls",
@@ -295,6 +424,7 @@ class GitHubClient:
                 "sort": sort,
                 "direction": direction,
                 "per_page": per_page,
+                "page": page,
             },
         )
         return response.json()
@@ -307,9 +437,10 @@ class GitHubClient:
         until: Optional[str] = None,
         sha: Optional[str] = None,
         per_page: int = 30,
+        page: int = 1,
     ) -> list[dict]:
         """List commits with optional date filtering (ISO 8601 timestamps)."""
-        params: dict = {"per_page": per_page}
+        params: dict = {"per_page": per_page, "page": page}
         if since:
             params["since"] = since
         if until:
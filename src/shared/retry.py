@@ -21,6 +21,10 @@ def _compute_sleep_seconds(attempt: int, config: RetryConfig) -> float:
     return exponential * jitter_multiplier
 
 
+def _never(_result: object) -> bool:
+    return False
+
+
 def call_with_retry(
     operation_name: str,
     fn: Callable[[], T],
@@ -29,12 +33,13 @@ def call_with_retry(
     config: Optional[RetryConfig] = None,
 ) -> T:
     cfg = config or RetryConfig()
+    should_retry_result = is_retryable_result or _never
     last_exception: Optional[Exception] = None
 
     for attempt in range(1, cfg.max_attempts + 1):
         try:
             result = fn()
-            if is_retryable_result and is_retryable_result(result):
+            if should_retry_result(result):
                 if attempt == cfg.max_attempts:
                     return result
                 time.sleep(_compute_sleep_seconds(attempt, cfg))
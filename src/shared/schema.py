@@ -10,7 +10,7 @@ FindingType = Literal["bug", "security", "style", "performance", "tests", "docs"
 
 
 class Finding(BaseModel):
-    model_config = ConfigDict(extra="forbid", strict=True)
+    model_config = ConfigDict(extra="forbid", strict=True, frozen=True)
 
     type: FindingType
     severity: RiskLevel
@@ -31,7 +31,7 @@ class Finding(BaseModel):
 class TicketCompliance(BaseModel):
     """Structured compliance check for a single linked Jira ticket."""
 
-    model_config = ConfigDict(extra="forbid", strict=True)
+    model_config = ConfigDict(extra="forbid", strict=True, frozen=True)
 
     ticket_key: str
     """The Jira ticket key, e.g. ``PROJ-123``."""
@@ -46,7 +46,7 @@ class TicketCompliance(BaseModel):
 
 
 class ReviewResult(BaseModel):
-    model_config = ConfigDict(extra="forbid", strict=True)
+    model_config = ConfigDict(extra="forbid", strict=True, frozen=True)
 
     summary: str
     overall_risk: RiskLevel
@@ -21,7 +21,7 @@ from __future__ import annotations
 import json
 import os
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, Iterator
 
 from shared.atlassian_client import AtlassianClient
 from shared.bedrock_chat import BedrockChatClient
@@ -83,12 +83,47 @@ def _fetch_jira_sprint_data(
 
 # ---- GitHub data -------------------------------------------------------------
 
+_PAGE_SIZE = 100
+_MAX_PAGES = 10
+
+
+def _iter_pulls_since(
+    gh: GitHubClient, owner: str, repo: str, since_iso: str,
+) -> Iterator[dict[str, Any]]:
+    """Yield closed PRs updated at or after *since_iso*, most recent first.
+
+    PRs are requested sorted by ``updated`` descending, so paging stops at the
+    first PR older than the window — quiet repos cost a single request.
+    """
+    for page in range(1, _MAX_PAGES + 1):
+        pulls = gh.list_pulls(
+            owner, repo, state="closed", sort="updated", direction="desc",
+            per_page=_PAGE_SIZE, page=page,
+        )
+        for pr in pulls:
+            updated_at = pr.get("updated_at")
+            if updated_at and updated_at < since_iso:
+                return
+            yield pr
+        if len(pulls) < _PAGE_SIZE:
+            return
+
+
+def _iter_commits_since(
+    gh: GitHubClient, owner: str, repo: str, since_iso: str,
+) -> Iterator[dict[str, Any]]:
+    """Yield commits since *since_iso*, paging until GitHub returns a short page."""
+    for page in range(1, _MAX_PAGES + 1):
+        commits = gh.list_commits(owner, repo, since=since_iso, per_page=_PAGE_SIZE, page=page)
+        yield from commits
+        if len(commits) < _PAGE_SIZE:
+            return
+
 
 def _fetch_github_activity(
     gh: GitHubClient, owner: str, repo: str, since_iso: str,
 ) -> dict[str, list[dict[str, str]]]:
     """Gather recent merged PRs and commits since *since_iso*."""
-    prs_raw = gh.list_pulls(owner, repo, state="closed", sort="updated", direction="desc", per_page=50)
     merged_prs = [
         {
             "number": str(pr.get("number")),
@@ -96,11 +131,10 @@ def _fetch_github_activity(
             "author": (pr.get("user") or {}).get("login") or "unknown",
             "merged_at": pr.get("merged_at") or "",
         }
-        for pr in prs_raw
+        for pr in _iter_pulls_since(gh, owner, repo, since_iso)
         if pr.get("merged_at") and pr["merged_at"] >= since_iso
     ]
 
-    commits_raw = gh.list_commits(owner, repo, since=since_iso, per_page=30)
     commits = [
         {
             "sha": (c.get("sha") or "")[:8],
@@ -108,7 +142,7 @@ def _fetch_github_activity(
             "author": ((c.get("commit") or {}).get("author") or {}).get("name") or "unknown",
             "date": ((c.get("commit") or {}).get("author") or {}).get("date") or "",
         }
-        for c in commits_raw
+        for c in _iter_commits_since(gh, owner, repo, since_iso)
     ]
 
     return {"merged_prs": merged_prs, "commits": commits}
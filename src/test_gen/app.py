@@ -12,14 +12,21 @@ Controlled by env var ``TEST_GEN_DELIVERY_MODE``.
 
 from __future__ import annotations
 
+import base64
 import json
 import os
-from typing import Any
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Iterator
+
+import requests
+from requests.adapters import HTTPAdapter
 
 from shared.bedrock_chat import BedrockChatClient
 from shared.bedrock_kb import BedrockKnowledgeBaseClient
 from shared.constants import DEFAULT_REGION
-from shared.github_app_auth import GitHubAppAuth
+from shared.github_app_auth import GitHubAppAuth, cached_github_app_auth
 from shared.github_client import GitHubClient
 from shared.logging import get_logger
 
@@ -38,6 +45,9 @@ _SKIP_PATTERNS = frozenset({
 })
 _TEST_DIR_MARKERS = frozenset({"test_", "tests/", "test/", "__tests__/", "spec/", "_test."})
 
+# Single-pass matcher built from the set above; matched against lowercased paths.
+_TEST_MARKER_RE = re.compile("|".join(map(re.escape, sorted(_TEST_DIR_MARKERS))))
+
 
 _SYSTEM_PROMPT = """\
 You are an expert software test engineer. Given source code files that were \
@@ -64,35 +74,151 @@ Rules:
 
 MAX_FILES = int(os.getenv("TEST_GEN_MAX_FILES", "10"))
 TEST_GEN_KB_TOP_K = int(os.getenv("TEST_GEN_KB_TOP_K", "5"))
+_FETCH_WORKERS = 10
+
+
+@dataclass(frozen=True)
+class _Config:
+    """Environment configuration, read once per Lambda container."""
+
+    region: str
+    model_id: str
+    delivery_mode: str
+    dry_run: bool
+    prompt_cache: bool
+    api_base: str
+    knowledge_base_id: str
+
+    @classmethod
+    def from_env(cls) -> "_Config":
+        return cls(
+            region=os.getenv("AWS_REGION", DEFAULT_REGION),
+            model_id=os.environ.get("TEST_GEN_MODEL_ID") or os.environ.get("BEDROCK_MODEL_ID", ""),
+            delivery_mode=os.getenv("TEST_GEN_DELIVERY_MODE", "comment").lower(),
+            dry_run=os.getenv("DRY_RUN", "false").lower() == "true",
+            prompt_cache=os.getenv("TEST_GEN_PROMPT_CACHE", "false").lower() == "true",
+            api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"),
+            knowledge_base_id=os.getenv("BEDROCK_KNOWLEDGE_BASE_ID", "").strip(),
+        )
+
+
+_CFG = _Config.from_env()
+
+# Model families for which Bedrock Converse honours ``cachePoint`` blocks.
+_PROMPT_CACHE_MODEL_RE = re.compile(
+    r"claude-3-5-sonnet|claude-3-5-haiku|claude-3-7|claude-(?:sonnet|opus|haiku)-4|nova",
+    re.IGNORECASE,
+)
+
+
+# Clients reused across warm invocations of the same Lambda container.
+_http_session_cached: requests.Session | None = None
+_chat_clients_cached: dict[tuple[str, str, bool], BedrockChatClient] = {}
+
+
+def _http_session() -> requests.Session:
+    """Shared pooled session so GitHub TLS connections survive across calls and threads."""
+    global _http_session_cached  # noqa: PLW0603
+    if _http_session_cached is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_session_cached = session
+    return _http_session_cached
+
+
+def _github_auth() -> GitHubAppAuth:
+    """App auth for test generation, on the pooled GitHub session."""
+    return cached_github_app_auth(
+        # Required: a missing ARN should fail here, not deep in Secrets Manager.
+        app_ids_secret_arn=os.environ["GITHUB_APP_IDS_SECRET_ARN"],
+        private_key_secret_arn=os.environ["GITHUB_APP_PRIVATE_KEY_SECRET_ARN"],
+        api_base=_CFG.api_base,
+        http_session=_http_session(),
+    )
+
+
+def _github_client(token: str) -> GitHubClient:
+    return GitHubClient(
+        token_provider=lambda: token,
+        api_base=_CFG.api_base,
+        session=_http_session(),
+    )
+
+
+def _chat_client(region: str, model_id: str, cache_system_prompt: bool = False) -> BedrockChatClient:
+    key = (region, model_id, cache_system_prompt)
+    client = _chat_clients_cached.get(key)
+    if client is None:
+        client = BedrockChatClient(
+            region=region, model_id=model_id, max_tokens=4000, cache_system_prompt=cache_system_prompt,
+        )
+        _chat_clients_cached[key] = client
+    return client
+
+
+def _prompt_cache_enabled(model_id: str) -> bool:
+    """Return True when the static system prompt should carry a Bedrock cache point."""
+    if not _CFG.prompt_cache:
+        return False
+    return bool(_PROMPT_CACHE_MODEL_RE.search(model_id or ""))
+
+
+def _static_response(status_code: int, **body: str) -> dict[str, Any]:
+    return {"statusCode": status_code, "body": json.dumps(body)}
+
+
+# Fixed-body replies of the /test-gen endpoints; bodies are JSON-encoded at import.
+_RESP_EMPTY_FILE = _static_response(200, status="empty_file")
+_RESP_NO_TESTABLE_FILES = _static_response(200, status="no_testable_files")
+_RESP_INVALID_JSON = _static_response(400, error="invalid_json")
+_RESP_METHOD_NOT_ALLOWED = _static_response(405, error="method_not_allowed")
+_RESP_GENERATION_FAILED = _static_response(500, error="generation_failed")
 
 
 # ---- File filtering ----------------------------------------------------------
 
 
-def _is_testable(filename: str) -> bool:
-    """Determine whether a file is worth generating tests for."""
+def _is_testable(filename: str, lower: str | None = None) -> bool:
+    """Determine whether a file is worth generating tests for.
+
+    Cheapest checks run first: exact basename and extension are set lookups,
+    and the test-marker scan only runs for files that survive them. Callers
+    that already hold ``filename.lower()`` can pass it as *lower*.
+    """
     if not filename:
         return False
-    lower = filename.lower()
-    # Skip test files themselves
-    for marker in _TEST_DIR_MARKERS:
-        if marker in lower:
-            return False
-    # Skip non-code files by extension
-    for ext in _SKIP_EXTENSIONS:
-        if lower.endswith(ext):
-            return False
     # Skip known non-code filenames
-    base = filename.rsplit("/", maxsplit=1)[-1] if "/" in filename else filename
-    for pattern in _SKIP_PATTERNS:
-        if base == pattern:
+    if filename.rpartition("/")[2] in _SKIP_PATTERNS:
+        return False
+    if lower is None:
+        lower = filename.lower()
+    # Skip non-code files by extension (last suffix, then two-part ones like .min.js / .d.ts)
+    lower_base = lower.rpartition("/")[2]
+    dot = lower_base.rfind(".")
+    if dot != -1:
+        if lower_base[dot:] in _SKIP_EXTENSIONS:
             return False
-    return True
+        prev_dot = lower_base.rfind(".", 0, dot)
+        if prev_dot != -1 and lower_base[prev_dot:] in _SKIP_EXTENSIONS:
+            return False
+    # Skip test files themselves
+    return not _TEST_MARKER_RE.search(lower)
 
 
 def _select_testable_files(files: list[dict[str, Any]]) -> list[dict[str, Any]]:
     """Filter PR files down to testable source files, capped at MAX_FILES."""
-    return [f for f in files if f.get("status") != "removed" and _is_testable(f.get("filename", ""))][:MAX_FILES]
+    selected: list[dict[str, Any]] = []
+    for f in files:
+        if f.get("status") == "removed":
+            continue
+        filename = f.get("filename") or ""
+        if _is_testable(filename, filename.lower()):
+            selected.append(f)
+            if len(selected) == MAX_FILES:
+                break
+    return selected
 
 
 # ---- Prompt building ---------------------------------------------------------
@@ -104,23 +230,61 @@ def _build_user_prompt(
     pr_number: int,
 ) -> str:
     """Build the user prompt from source file contents."""
-    lines = [
-        f"Pull Request #{pr_number}: {pr_title}",
-        f"Changed files to generate tests for: {len(files_with_content)}",
-        "",
-    ]
-    for f in files_with_content:
-        lines.append(f"## File: {f['filename']}")
-        lines.append(f"Patch (changes):\n```\n{f['patch']}\n```")
-        if f.get("content"):
-            lines.append(f"Full file content:\n```\n{f['content']}\n```")
-        lines.append("")
-    return "\n".join(lines)
+
+    def _lines() -> Iterator[str]:
+        yield f"Pull Request #{pr_number}: {pr_title}"
+        yield f"Changed files to generate tests for: {len(files_with_content)}"
+        yield ""
+        for f in files_with_content:
+            yield f"## File: {f['filename']}"
+            yield f"Patch (changes):\n```\n{f['patch']}\n```"
+            if f.get("content"):
+                yield f"Full file content:\n```\n{f['content']}\n```"
+            yield ""
+
+    return "\n".join(_lines())
 
 
 # ---- Core generator ----------------------------------------------------------
 
 
+def _fetch_file_contents(
+    gh: GitHubClient, owner: str, repo: str, head_sha: str, testable: list[dict[str, Any]],
+) -> list[dict[str, str]]:
+    """Return ``{filename, patch, content}`` for each testable file, in input order.
+
+    Contents come from a single batched GraphQL request; if that fails the files
+    are fetched individually over REST, concurrently since the work is I/O-bound.
+    A file whose content cannot be fetched still contributes an entry with empty content.
+    """
+    filenames = [f.get("filename", "") for f in testable]
+    try:
+        contents = gh.get_files_contents_batch(owner, repo, filenames, head_sha)
+    except Exception:  # noqa: BLE001
+        logger.warning("batch_file_content_fetch_failed", extra={"extra": {"count": len(filenames)}})
+    else:
+        return [
+            {"filename": filename, "patch": f.get("patch") or "", "content": contents.get(filename, "")}
+            for filename, f in zip(filenames, testable)
+        ]
+
+    def _fetch_one(f: dict[str, Any]) -> dict[str, str]:
+        filename = f.get("filename", "")
+        content = ""
+        try:
+            content, _ = gh.get_file_contents(owner, repo, filename, head_sha)
+        except Exception:  # noqa: BLE001
+            logger.warning("file_content_fetch_failed", extra={"extra": {"file": filename}})
+        return {
+            "filename": filename,
+            "patch": f.get("patch") or "",
+            "content": content,
+        }
+
+    with ThreadPoolExecutor(max_workers=min(len(testable), _FETCH_WORKERS)) as pool:
+        return list(pool.map(_fetch_one, testable))
+
+
 def generate_tests(
     gh: GitHubClient,
     owner: str,
@@ -129,8 +293,13 @@ def generate_tests(
     head_sha: str,
     model_id: str,
     region: str,
+    on_test_file: Callable[[str, str], None] | None = None,
 ) -> tuple[str, list[dict[str, Any]]]:
-    """Generate tests for a PR. Returns (markdown_output, testable_files)."""
+    """Generate tests for a PR. Returns (markdown_output, testable_files).
+
+    When *on_test_file* is given the model response is streamed and the callback
+    fires with ``(path, content)`` as soon as each test-file block is complete.
+    """
     pr = gh.get_pull_request(owner, repo, pr_number)
     files = gh.get_pull_request_files(owner, repo, pr_number)
 
@@ -144,21 +313,7 @@ def generate_tests(
         "files": [f.get("filename") for f in testable],
     }})
 
-    # Fetch full file contents for better test generation
-    files_with_content: list[dict[str, str]] = []
-    for f in testable:
-        filename = f.get("filename", "")
-        patch = f.get("patch") or ""
-        content = ""
-        try:
-            content, _ = gh.get_file_contents(owner, repo, filename, head_sha)
-        except Exception:  # noqa: BLE001
-            logger.warning("file_content_fetch_failed", extra={"extra": {"file": filename}})
-        files_with_content.append({
-            "filename": filename,
-            "patch": patch,
-            "content": content,
-        })
+    files_with_content = _fetch_file_contents(gh, owner, repo, head_sha, testable)
 
     user_prompt = _build_user_prompt(
         files_with_content,
@@ -166,8 +321,20 @@ def generate_tests(
         pr_number=pr_number,
     )
 
-    chat = BedrockChatClient(region=region, model_id=model_id, max_tokens=4000)
-    output = chat.answer(_SYSTEM_PROMPT, user_prompt)
+    cache_prompt = _prompt_cache_enabled(model_id)
+    chat = _chat_client(region, model_id, cache_system_prompt=cache_prompt)
+    telemetry: dict[str, Any] = {}
+    if on_test_file is None:
+        output = chat.answer(_SYSTEM_PROMPT, user_prompt, telemetry=telemetry)
+    else:
+        parser = _StreamingTestFileParser(on_test_file)
+        output = chat.stream_answer(_SYSTEM_PROMPT, user_prompt, on_delta=parser.feed, telemetry=telemetry)
+    if cache_prompt:
+        logger.info("test_gen_prompt_cache_usage", extra={"extra": {
+            "pr_number": pr_number,
+            "cache_read_input_tokens": telemetry.get("cache_read_input_tokens", 0),
+            "cache_write_input_tokens": telemetry.get("cache_write_input_tokens", 0),
+        }})
     return output, testable
 
 
@@ -197,47 +364,35 @@ def _post_as_draft_pr(
     head_sha: str,
     base_ref: str,
     test_output: str,
-) -> None:
-    """Create a draft PR with the generated test files."""
+    branch_setup: Future[str | None] | None = None,
+) -> bool:
+    """Create a draft PR with the generated test files; return whether it was opened.
+
+    *branch_setup* is an in-flight :func:`_prepare_draft_branch` started while the
+    tests were still streaming (see :class:`_EarlyDraftBranch`). When False, the
+    tests were posted as a PR comment instead.
+    """
     # Parse test file blocks from the markdown output
     test_files = _parse_test_files(test_output)
     if not test_files:
         logger.info("no_parseable_test_files", extra={"extra": {"pr_number": pr_number}})
         _post_as_comment(gh, owner, repo, pr_number, test_output)
-        return
+        return False
 
-    branch_name = f"ai-tests/pr-{pr_number}-{head_sha[:8]}"
+    branch_name = _draft_branch_name(pr_number, head_sha)
 
-    # Create branch from base — resolve base SHA first; abort to comment on hard failure.
+    # Create branch from base — abort to comment if the base SHA cannot be resolved.
     try:
-        base_ref_data = gh.get_ref(owner, repo, f"heads/{base_ref}")
-        base_sha = ((base_ref_data.get("object") or {}).get("sha"))
-        if not base_sha:
-            raise ValueError("Could not resolve base SHA")
+        if branch_setup is not None:
+            branch_head = branch_setup.result()
+        else:
+            branch_head = _prepare_draft_branch(gh, owner, repo, branch_name, base_ref)
     except Exception:  # noqa: BLE001
         logger.warning("test_draft_pr_base_sha_failed", extra={"extra": {"base_ref": base_ref, "pr_number": pr_number}})
         _post_as_comment(gh, owner, repo, pr_number, test_output)
-        return
-
-    try:
-        gh.create_ref(owner, repo, f"refs/heads/{branch_name}", base_sha)
-    except Exception:  # noqa: BLE001
-        # Branch likely already exists from a previous run — continue using it.
-        pass
+        return False
 
-    # Commit test files
-    for path, content in test_files:
-        try:
-            gh.put_file_contents(
-                owner=owner,
-                repo=repo,
-                path=path,
-                branch=branch_name,
-                message=f"AI test suggestion: {path}",
-                content=content,
-            )
-        except Exception:  # noqa: BLE001
-            logger.warning("test_file_commit_failed", extra={"extra": {"path": path}})
+    _commit_test_files(gh, owner, repo, branch_name, branch_head, test_files)
 
     # Create draft PR — fall back to a comment if the PR already exists or the call fails.
     pr_body = (
@@ -258,6 +413,146 @@ def _post_as_draft_pr(
     except Exception:  # noqa: BLE001
         logger.warning("test_draft_pr_create_failed_fallback_to_comment", extra={"extra": {"pr_number": pr_number}})
         _post_as_comment(gh, owner, repo, pr_number, test_output)
+        return False
+    return True
+
+
+def _draft_branch_name(pr_number: int, head_sha: str) -> str:
+    return f"ai-tests/pr-{pr_number}-{head_sha[:8]}"
+
+
+def _prepare_draft_branch(gh: GitHubClient, owner: str, repo: str, branch: str, base_ref: str) -> str | None:
+    """Create *branch* from *base_ref*; return its head SHA, or None if it already existed.
+
+    Raises if the base SHA cannot be resolved.
+    """
+    base_ref_data = gh.get_ref(owner, repo, f"heads/{base_ref}")
+    base_sha = ((base_ref_data.get("object") or {}).get("sha"))
+    if not base_sha:
+        raise ValueError("Could not resolve base SHA")
+    try:
+        gh.create_ref(owner, repo, f"refs/heads/{branch}", base_sha)
+    except Exception:  # noqa: BLE001
+        # Branch likely already exists from a previous run — continue using it.
+        return None
+    return base_sha
+
+
+class _EarlyDraftBranch:
+    """``on_test_file`` callback that starts draft-branch setup on the first streamed test file.
+
+    The base-ref lookup and branch creation then overlap with the rest of generation;
+    :func:`_post_as_draft_pr` picks the result up from :attr:`future`.
+    """
+
+    def __init__(self, gh: GitHubClient, owner: str, repo: str, pr_number: int, head_sha: str, base_ref: str):
+        self._args = (gh, owner, repo, _draft_branch_name(pr_number, head_sha), base_ref)
+        self.future: Future[str | None] | None = None
+
+    def __call__(self, _path: str, _content: str) -> None:
+        if self.future is None:
+            pool = ThreadPoolExecutor(max_workers=1)
+            self.future = pool.submit(_prepare_draft_branch, *self._args)
+            pool.shutdown(wait=False)
+
+    def discard(self) -> None:
+        """Delete the branch if this callback created it; call when no draft PR was opened."""
+        if self.future is None:
+            return
+        gh, owner, repo, branch, _base_ref = self._args
+        try:
+            created = self.future.result() is not None
+        except Exception:  # noqa: BLE001
+            return  # setup failed, so there is no branch to clean up
+        if not created:
+            return  # the branch predates this run
+        try:
+            gh.delete_ref(owner, repo, f"heads/{branch}")
+        except Exception:  # noqa: BLE001
+            logger.warning("test_draft_branch_cleanup_failed", extra={"extra": {"branch": branch}})
+
+
+def _commit_test_files(
+    gh: GitHubClient,
+    owner: str,
+    repo: str,
+    branch: str,
+    branch_head: str | None,
+    test_files: list[tuple[str, str]],
+) -> None:
+    """Commit all test files to *branch* as a single commit.
+
+    Tries the GraphQL ``createCommitOnBranch`` mutation, then the REST git-data API,
+    and only falls back to one contents PUT per file if both fail. *branch_head* is
+    the branch's current head SHA, or None if it must be looked up (e.g. the branch
+    already existed).
+    """
+    # Encode each file once; every commit path takes base64 contents.
+    encoded = [(path, base64.b64encode(content.encode("utf-8")).decode("ascii")) for path, content in test_files]
+    message = f"AI test suggestions ({len(test_files)} file(s))"
+    try:
+        if branch_head is None:
+            branch_head = ((gh.get_ref(owner, repo, f"heads/{branch}").get("object") or {}).get("sha"))
+            if not branch_head:
+                raise ValueError("Could not resolve branch head SHA")
+    except Exception:  # noqa: BLE001
+        logger.warning("test_files_branch_head_failed", extra={"extra": {"branch": branch}})
+    else:
+        try:
+            gh.create_commit_on_branch(
+                owner,
+                repo,
+                branch,
+                branch_head,
+                [{"path": path, "contents": contents} for path, contents in encoded],
+                message=message,
+            )
+            return
+        except Exception:  # noqa: BLE001
+            logger.warning("test_files_graphql_commit_failed", extra={"extra": {"branch": branch}})
+        try:
+            _commit_via_git_data(gh, owner, repo, branch, branch_head, encoded, message)
+            return
+        except Exception:  # noqa: BLE001
+            logger.warning("test_files_git_data_commit_failed", extra={"extra": {"branch": branch}})
+
+    for path, contents in encoded:
+        try:
+            gh.put_file_contents(
+                owner=owner,
+                repo=repo,
+                path=path,
+                branch=branch,
+                message=f"AI test suggestion: {path}",
+                content_b64=contents,
+            )
+        except Exception:  # noqa: BLE001
+            logger.warning("test_file_commit_failed", extra={"extra": {"path": path}})
+
+
+def _commit_via_git_data(
+    gh: GitHubClient,
+    owner: str,
+    repo: str,
+    branch: str,
+    branch_head: str,
+    encoded: list[tuple[str, str]],
+    message: str,
+) -> None:
+    """Commit base64 *encoded* files with blob/tree/commit/ref calls, uploading each distinct content once."""
+    blob_shas: dict[str, str] = {}
+    tree_entries: dict[str, str] = {}
+    for path, contents in encoded:
+        blob_sha = blob_shas.get(contents)
+        if blob_sha is None:
+            blob_sha = blob_shas[contents] = gh.create_blob(owner, repo, contents)
+        tree_entries[path] = blob_sha
+    base_tree = (gh.get_git_commit(owner, repo, branch_head).get("tree") or {}).get("sha")
+    if not base_tree:
+        raise ValueError("Could not resolve branch head tree")
+    tree_sha = gh.create_tree(owner, repo, base_tree, tree_entries)
+    commit_sha = gh.create_commit(owner, repo, message, tree_sha, [branch_head])
+    gh.update_ref(owner, repo, f"heads/{branch}", commit_sha)
 
 
 def _is_safe_generated_test_path(path: str) -> bool:
@@ -276,6 +571,55 @@ def _is_safe_generated_test_path(path: str) -> bool:
     return lower.startswith(allowed_prefixes)
 
 
+_TEST_FILE_PATH_RE = re.compile(r"^[ \t]*#[^:\n]*test file:[ \t]*(.*?)[ \t]*$", re.IGNORECASE | re.MULTILINE)
+
+
+def _find_fence(text: str, pos: int) -> int:
+    """Return the index of the next ``` at *pos* or later that opens its line (after optional indent)."""
+    while True:
+        idx = text.find("```", pos)
+        if idx < 0:
+            return -1
+        line_start = text.rfind("\n", 0, idx) + 1
+        if line_start >= pos and not text[line_start:idx].strip(" \t"):
+            return idx
+        pos = idx + 3
+
+
+def _iter_code_blocks(markdown: str, pos: int = 0) -> Iterator[tuple[str, int]]:
+    """Yield ``(body, end)`` for each complete fenced code block at *pos* or later.
+
+    *end* is the offset just past the closing fence, so a caller holding a growing
+    buffer can resume from it.
+    """
+    while True:
+        open_fence = _find_fence(markdown, pos)
+        if open_fence < 0:
+            return
+        body_start = markdown.find("\n", open_fence) + 1
+        if not body_start:
+            return
+        close_fence = _find_fence(markdown, body_start)
+        if close_fence < 0:
+            return
+        pos = close_fence + 3
+        yield markdown[body_start:markdown.rfind("\n", 0, close_fence) + 1], pos
+
+
+def _test_file_from_block(body: str) -> tuple[str, str] | None:
+    """Return ``(path, content)`` if a code block body declares a safe test-file path."""
+    for path_match in _TEST_FILE_PATH_RE.finditer(body):
+        path = path_match.group(1)
+        if path and _is_safe_generated_test_path(path):
+            break
+    else:
+        return None
+    content = body[:path_match.start()] + body[path_match.end() + 1:]
+    if not content:
+        return None
+    return path, content.removesuffix("\n")
+
+
 def _parse_test_files(markdown: str) -> list[tuple[str, str]]:
     """Extract (path, content) tuples from markdown code blocks.
 
@@ -283,35 +627,34 @@ def _parse_test_files(markdown: str) -> list[tuple[str, str]]:
         # Test file: tests/test_example.py
     """
     files: list[tuple[str, str]] = []
-    in_block = False
-    current_path = ""
-    current_lines: list[str] = []
-
-    for line in markdown.split("\n"):
-        if line.strip().startswith("```") and not in_block:
-            in_block = True
-            current_lines = []
-            continue
-        if line.strip().startswith("```") and in_block:
-            in_block = False
-            if current_path and current_lines:
-                files.append((current_path, "\n".join(current_lines)))
-            current_path = ""
-            current_lines = []
-            continue
-        if in_block:
-            # Check for path comment on first non-empty line
-            stripped = line.strip()
-            if not current_path and stripped.startswith("#") and "test file:" in stripped.lower():
-                path = stripped.split(":", 1)[1].strip()
-                if path and _is_safe_generated_test_path(path):
-                    current_path = path
-                    continue
-            current_lines.append(line)
-
+    for body, _ in _iter_code_blocks(markdown):
+        test_file = _test_file_from_block(body)
+        if test_file:
+            files.append(test_file)
     return files
 
 
+class _StreamingTestFileParser:
+    """Incremental :func:`_parse_test_files` over streamed text deltas.
+
+    Calls *on_test_file* with ``(path, content)`` as soon as each block's closing
+    fence arrives; the emitted files match what :func:`_parse_test_files` returns
+    for the concatenated text.
+    """
+
+    def __init__(self, on_test_file: Callable[[str, str], None]):
+        self._on_test_file = on_test_file
+        self._text = ""
+        self._pos = 0
+
+    def feed(self, delta: str) -> None:
+        self._text += delta
+        for body, self._pos in _iter_code_blocks(self._text, self._pos):
+            test_file = _test_file_from_block(body)
+            if test_file:
+                self._on_test_file(*test_file)
+
+
 # ---- Lambda handler ----------------------------------------------------------
 
 
@@ -393,7 +736,7 @@ def generate_tests_for_file(
         ]
     user_prompt = "\n".join(lines)
 
-    chat = BedrockChatClient(region=region, model_id=model_id, max_tokens=4000)
+    chat = _chat_client(region, model_id)
     return chat.answer(_FILE_SYSTEM_PROMPT, user_prompt)
 
 
@@ -405,7 +748,7 @@ def _handle_file_request(
     try:
         body = json.loads(event.get("body") or "{}")
     except json.JSONDecodeError:
-        return {"statusCode": 400, "body": json.dumps({"error": "invalid_json"})}
+        return _RESP_INVALID_JSON
 
     repo_full = (body.get("repo") or "").strip()
     path = (body.get("path") or "").strip()
@@ -419,22 +762,16 @@ def _handle_file_request(
         }
 
     owner, repo = repo_full.split("/", maxsplit=1)
-    region = os.getenv("AWS_REGION", DEFAULT_REGION)
-    model_id = os.environ.get("TEST_GEN_MODEL_ID") or os.environ.get("BEDROCK_MODEL_ID", "")
 
     token = auth.get_installation_token()
-    gh = GitHubClient(
-        token_provider=lambda: token,
-        api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"),
-    )
+    gh = _github_client(token)
 
     # Build KB client if configured
-    kb_id = os.getenv("BEDROCK_KNOWLEDGE_BASE_ID", "").strip()
     kb_client: "BedrockKnowledgeBaseClient | None" = None
-    if kb_id:
+    if _CFG.knowledge_base_id:
         kb_client = BedrockKnowledgeBaseClient(
-            region=region,
-            knowledge_base_id=kb_id,
+            region=_CFG.region,
+            knowledge_base_id=_CFG.knowledge_base_id,
             top_k=TEST_GEN_KB_TOP_K,
         )
 
@@ -446,16 +783,16 @@ def _handle_file_request(
             ref=ref,
             path=path,
             symbol=symbol,
-            model_id=model_id,
-            region=region,
+            model_id=_CFG.model_id,
+            region=_CFG.region,
             kb_client=kb_client,
         )
     except Exception:
         logger.exception("test_gen_file_failed")
-        return {"statusCode": 500, "body": json.dumps({"error": "generation_failed"})}
+        return _RESP_GENERATION_FAILED
 
     if not test_output:
-        return {"statusCode": 200, "body": json.dumps({"status": "empty_file"})}
+        return _RESP_EMPTY_FILE
 
     return {
         "statusCode": 200,
@@ -482,35 +819,40 @@ def _process_sqs_record(record: dict[str, Any]) -> None:
     base_ref = message.get("base_ref", "main")
 
     owner, repo = repo_full.split("/", maxsplit=1)
-    region = os.getenv("AWS_REGION", DEFAULT_REGION)
-    model_id = os.environ.get("TEST_GEN_MODEL_ID") or os.environ.get("BEDROCK_MODEL_ID", "")
-    delivery_mode = os.getenv("TEST_GEN_DELIVERY_MODE", "comment").lower()
-    dry_run = os.getenv("DRY_RUN", "false").lower() == "true"
 
-    auth = GitHubAppAuth(
-        app_ids_secret_arn=os.environ["GITHUB_APP_IDS_SECRET_ARN"],
-        private_key_secret_arn=os.environ["GITHUB_APP_PRIVATE_KEY_SECRET_ARN"],
-        api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"),
-    )
-    token = auth.get_installation_token(
+    token = _github_auth().get_installation_token(
         installation_id_override=str(message.get("installation_id")) if message.get("installation_id") else None,
     )
-    gh = GitHubClient(token_provider=lambda: token, api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"))
+    gh = _github_client(token)
 
-    test_output, testable = generate_tests(gh, owner, repo, pr_number, head_sha, model_id, region)
-    if not test_output:
-        return
-
-    if dry_run:
-        logger.info("dry_run_test_gen", extra={"extra": {
-            "pr_number": pr_number, "delivery_mode": delivery_mode, "files": len(testable),
-        }})
-        return
+    early_branch = None
+    if _CFG.delivery_mode == "draft_pr" and not _CFG.dry_run:
+        early_branch = _EarlyDraftBranch(gh, owner, repo, pr_number, head_sha, base_ref)
 
-    if delivery_mode == "draft_pr":
-        _post_as_draft_pr(gh, owner, repo, pr_number, head_sha, base_ref, test_output)
-    else:
-        _post_as_comment(gh, owner, repo, pr_number, test_output)
+    pr_opened = False
+    try:
+        test_output, testable = generate_tests(
+            gh, owner, repo, pr_number, head_sha, _CFG.model_id, _CFG.region, on_test_file=early_branch,
+        )
+        if not test_output:
+            return
+
+        if _CFG.dry_run:
+            logger.info("dry_run_test_gen", extra={"extra": {
+                "pr_number": pr_number, "delivery_mode": _CFG.delivery_mode, "files": len(testable),
+            }})
+            return
+
+        if early_branch is not None:
+            pr_opened = _post_as_draft_pr(
+                gh, owner, repo, pr_number, head_sha, base_ref, test_output, branch_setup=early_branch.future,
+            )
+        else:
+            _post_as_comment(gh, owner, repo, pr_number, test_output)
+    finally:
+        # Don't leave an early-created branch behind when no draft PR uses it.
+        if early_branch is not None and not pr_opened:
+            early_branch.discard()
 
 
 def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
@@ -533,13 +875,9 @@ def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
     path_info = http.get("path", "")
 
     if method != "POST":
-        return {"statusCode": 405, "body": json.dumps({"error": "method_not_allowed"})}
+        return _RESP_METHOD_NOT_ALLOWED
 
-    auth = GitHubAppAuth(
-        app_ids_secret_arn=os.environ["GITHUB_APP_IDS_SECRET_ARN"],
-        private_key_secret_arn=os.environ["GITHUB_APP_PRIVATE_KEY_SECRET_ARN"],
-        api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"),
-    )
+    auth = _github_auth()
 
     # Route: POST /test-gen/file — on-demand single-file test generation
     if path_info.rstrip("/").endswith("/test-gen/file"):
@@ -549,7 +887,7 @@ def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
     try:
         body = json.loads(event.get("body") or "{}")
     except json.JSONDecodeError:
-        return {"statusCode": 400, "body": json.dumps({"error": "invalid_json"})}
+        return _RESP_INVALID_JSON
 
     repo_full = (body.get("repo") or "").strip()
     pr_number = body.get("pr_number")
@@ -560,32 +898,45 @@ def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
         })}
 
     owner, repo = repo_full.split("/", maxsplit=1)
-    region = os.getenv("AWS_REGION", DEFAULT_REGION)
-    model_id = os.environ.get("TEST_GEN_MODEL_ID") or os.environ.get("BEDROCK_MODEL_ID", "")
-    delivery_mode = os.getenv("TEST_GEN_DELIVERY_MODE", "comment").lower()
-    dry_run = str(body.get("dry_run", os.getenv("DRY_RUN", "false"))).lower() == "true"
+    delivery_mode = _CFG.delivery_mode
+    dry_run = str(body["dry_run"]).lower() == "true" if "dry_run" in body else _CFG.dry_run
 
     token = auth.get_installation_token()
-    gh = GitHubClient(token_provider=lambda: token, api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"))
+    gh = _github_client(token)
 
     pr = gh.get_pull_request(owner, repo, int(pr_number))
     head_sha = (pr.get("head") or {}).get("sha") or ""
     base_ref = (pr.get("base") or {}).get("ref") or "main"
 
-    try:
-        test_output, testable = generate_tests(gh, owner, repo, int(pr_number), head_sha, model_id, region)
-    except Exception:
-        logger.exception("test_gen_failed")
-        return {"statusCode": 500, "body": json.dumps({"error": "generation_failed"})}
+    early_branch = None
+    if delivery_mode == "draft_pr" and not dry_run:
+        early_branch = _EarlyDraftBranch(gh, owner, repo, int(pr_number), head_sha, base_ref)
 
-    if not test_output:
-        return {"statusCode": 200, "body": json.dumps({"status": "no_testable_files"})}
-
-    if not dry_run:
-        if delivery_mode == "draft_pr":
-            _post_as_draft_pr(gh, owner, repo, int(pr_number), head_sha, base_ref, test_output)
-        else:
-            _post_as_comment(gh, owner, repo, int(pr_number), test_output)
+    pr_opened = False
+    try:
+        try:
+            test_output, testable = generate_tests(
+                gh, owner, repo, int(pr_number), head_sha, _CFG.model_id, _CFG.region, on_test_file=early_branch,
+            )
+        except Exception:
+            logger.exception("test_gen_failed")
+            return _RESP_GENERATION_FAILED
+
+        if not test_output:
+            return _RESP_NO_TESTABLE_FILES
+
+        if not dry_run:
+            if early_branch is not None:
+                pr_opened = _post_as_draft_pr(
+                    gh, owner, repo, int(pr_number), head_sha, base_ref, test_output,
+                    branch_setup=early_branch.future,
+                )
+            else:
+                _post_as_comment(gh, owner, repo, int(pr_number), test_output)
+    finally:
+        # Don't leave an early-created branch behind when no draft PR uses it.
+        if early_branch is not None and not pr_opened:
+            early_branch.discard()
 
     return {
         "statusCode": 200,
@@ -1,22 +1,33 @@
 from __future__ import annotations
 
 import base64
+import binascii
 import hashlib
 import hmac
 import json
 import os
 import re
 import time
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import boto3
 from botocore.client import BaseClient
 
 from shared.logging import get_logger
 
+if TYPE_CHECKING:
+    import requests
+
+    from shared.github_app_auth import GitHubAppAuth
+
 logger = get_logger("webhook_receiver")
 
-ALLOWED_ACTIONS = {"opened", "synchronize", "reopened", "ready_for_review", "labeled"}
+ALLOWED_ACTIONS = frozenset({"opened", "synchronize", "reopened", "ready_for_review", "labeled"})
+_SUPPORTED_EVENTS = frozenset({"pull_request", "issue_comment", "check_run"})
+# GitHub serializes "action" as the first key. Used only to *ignore* unsupported
+# pull_request actions before paying for HMAC; anything that doesn't match is verified.
+_LEADING_ACTION_RE = re.compile(rb'\A\s*\{\s*"action"\s*:\s*"([a-z_]+)"')
+_COMMENT_ACTIONS = frozenset({"created", "edited"})
 
 # Maximum age (seconds) of a webhook delivery to accept. Deliveries older than
 # this are rejected as potential replays. Set to 0 to disable. Default: 5 min.
@@ -25,6 +36,37 @@ MAX_WEBHOOK_AGE_SECONDS = int(os.getenv("MAX_WEBHOOK_AGE_SECONDS", "300"))
 # Manual trigger: comment containing this phrase (case-insensitive) triggers a review.
 # Configurable via REVIEW_TRIGGER_PHRASE env var. Also matches @<BOT_USERNAME> review.
 _DEFAULT_TRIGGER_PHRASE = "/review"
+_TRIGGER_PHRASE = os.getenv("REVIEW_TRIGGER_PHRASE", _DEFAULT_TRIGGER_PHRASE).strip().lower()
+_BOT_USERNAME = os.getenv("BOT_USERNAME", "").strip().lower()
+# "@bot review" / "@bot /review": find the literal mention, then match what follows it.
+_BOT_MENTION = f"@{_BOT_USERNAME}" if _BOT_USERNAME else ""
+_REVIEW_AFTER_MENTION_RE = re.compile(r"\s+/?review")
+
+
+def _build_trigger_prefilter(literals: list[str]) -> re.Pattern[bytes] | None:
+    """Compile a raw-body prefilter that matches whenever _is_manual_trigger could.
+
+    Returns None (no prefilter) when a literal could appear differently in the JSON
+    encoding than in the decoded comment (non-ASCII, quotes, backslashes, control
+    chars), or could be produced by str.lower() from non-ASCII input ("k" from the
+    Kelvin sign, a trailing "i" from dotted capital I).
+    """
+    if not literals or any(
+        not lit
+        or not lit.isascii()
+        or not lit.isprintable()
+        or any(ch in lit for ch in '"\\k')
+        or lit.endswith("i")
+        for lit in literals
+    ):
+        return None
+    # "/" may legally be escaped as "\/" in JSON.
+    alternatives = (re.escape(lit).encode("ascii").replace(b"/", rb"\\?/") for lit in literals)
+    return re.compile(b"|".join(alternatives), re.IGNORECASE)
+
+
+# Lets issue_comment deliveries without any trigger text skip JSON parsing entirely.
+_TRIGGER_PREFILTER_RE = _build_trigger_prefilter([_TRIGGER_PHRASE] + ([_BOT_MENTION] if _BOT_MENTION else []))
 
 # When set, the "labeled" action only triggers a review if the applied label is in this set.
 # Comma-separated list of label names. Empty = any label triggers a review (not recommended).
@@ -34,40 +76,132 @@ REVIEW_TRIGGER_LABELS: frozenset[str] = frozenset(
     lbl.strip() for lbl in _review_trigger_labels_raw.split(",") if lbl.strip()
 )
 
+
+# Deployment config, fixed for the life of a container.
+_QUEUE_URL = os.getenv("QUEUE_URL", "")
+_PR_DESCRIPTION_QUEUE_URL = os.getenv("PR_DESCRIPTION_QUEUE_URL", "")
+_CHECK_RUN_NAME = os.getenv("CHECK_RUN_NAME", "AI PR Reviewer")
+# None = every repository is allowed.
+_ALLOWED_REPOS: frozenset[str] | None = frozenset(
+    repo.strip() for repo in os.getenv("GITHUB_ALLOWED_REPOS", "").split(",") if repo.strip()
+) or None
+
+
+def _static_response(status_code: int, **body: str) -> dict[str, Any]:
+    return {"statusCode": status_code, "body": json.dumps(body)}
+
+
+# Webhook acknowledgements that never vary: "accepted", the "ignored" reasons
+# for events we skip, and the fixed error replies. Bodies are encoded at import.
+_RESP_ACCEPTED = _static_response(202, status="accepted")
+_RESP_ACTION_NOT_SUPPORTED = _static_response(202, ignored="action_not_supported")
+_RESP_CHECK_RUN_ACTION_NOT_REREQUESTED = _static_response(202, ignored="check_run_action_not_rerequested")
+_RESP_CHECK_RUN_NO_PR = _static_response(202, ignored="check_run_no_pr")
+_RESP_COMMENT_ACTION_NOT_SUPPORTED = _static_response(202, ignored="comment_action_not_supported")
+_RESP_LABEL_NOT_IN_TRIGGER_SET = _static_response(202, ignored="label_not_in_trigger_set")
+_RESP_NON_PULL_REQUEST_EVENT = _static_response(202, ignored="non_pull_request_event")
+_RESP_NOT_A_PR_COMMENT = _static_response(202, ignored="not_a_pr_comment")
+_RESP_NOT_OUR_CHECK_RUN = _static_response(202, ignored="not_our_check_run")
+_RESP_NO_TRIGGER_PHRASE = _static_response(202, ignored="no_trigger_phrase")
+_RESP_PULL_REQUEST_REVIEW_COMMENT_EVENT = _static_response(202, ignored="pull_request_review_comment_event")
+_RESP_REPO_NOT_ALLOWED = _static_response(202, ignored="repo_not_allowed")
+_RESP_MISSING_DELIVERY_ID = _static_response(400, error="missing_delivery_id")
+_RESP_MISSING_REQUIRED_FIELDS = _static_response(400, error="missing_required_fields")
+_RESP_WEBHOOK_TOO_OLD = _static_response(400, error="webhook_too_old")
+_RESP_INVALID_SIGNATURE = _static_response(401, error="invalid_signature")
+_RESP_COULD_NOT_RESOLVE_HEAD_SHA = _static_response(500, error="could_not_resolve_head_sha")
+
 _sqs = boto3.client("sqs")
 _secrets = boto3.client("secretsmanager")
 _cached_webhook_secret: bytes | None = None
+# (app ids JSON, private key) fetched in the same batch as the webhook secret.
+_prefetched_app_secrets: tuple[str, str] | None = None
+# (secret, keyed HMAC-SHA256 with no data) — copying it skips the ipad/opad key setup.
+_cached_hmac_template: tuple[bytes, hmac.HMAC] | None = None
+# GitHub API session for the manual-trigger path; kept warm across invocations.
+_http_session_cached: requests.Session | None = None
+
+
+def _lower_headers(headers: dict[str, str] | None) -> dict[str, str]:
+    """Return *headers* keyed by lowercased name so lookups are plain dict gets."""
+    return {k.lower(): v for k, v in (headers or {}).items()}
 
 
-def _get_header(headers: dict[str, str], key: str) -> str | None:
-    target = key.lower()
-    for k, v in (headers or {}).items():
-        if k.lower() == target:
-            return v
-    return None
+def _batch_get_secret_strings(client: BaseClient, secret_ids: list[str]) -> dict[str, str]:
+    """Fetch several secrets in one BatchGetSecretValue call, keyed by both ARN and name."""
+    response = client.batch_get_secret_value(SecretIdList=secret_ids)
+    values: dict[str, str] = {}
+    for entry in response.get("SecretValues") or []:
+        secret_string = entry.get("SecretString")
+        if not secret_string:
+            continue
+        for key in (entry.get("ARN"), entry.get("Name")):
+            if key:
+                values[key] = secret_string
+    return values
 
 
 def _load_webhook_secret(secrets_client: BaseClient | None = None) -> bytes:
-    global _cached_webhook_secret
+    global _cached_webhook_secret, _prefetched_app_secrets  # noqa: PLW0603
     if _cached_webhook_secret is not None:
         return _cached_webhook_secret
 
     client = secrets_client or _secrets
     secret_arn = os.environ["WEBHOOK_SECRET_ARN"]
-    response = client.get_secret_value(SecretId=secret_arn)
-    secret = response.get("SecretString")
+    secret: str | None = None
+    app_ids_arn = os.getenv("GITHUB_APP_IDS_SECRET_ARN", "")
+    private_key_arn = os.getenv("GITHUB_APP_PRIVATE_KEY_SECRET_ARN", "")
+    if app_ids_arn and private_key_arn:
+        # Cold start: fetch the GitHub App secrets in the same round trip so a later
+        # manual trigger does not pay two more serial Secrets Manager calls.
+        try:
+            values = _batch_get_secret_strings(client, [secret_arn, app_ids_arn, private_key_arn])
+        except Exception:  # noqa: BLE001
+            logger.warning("secrets_batch_fetch_failed")
+        else:
+            secret = values.get(secret_arn)
+            if app_ids_arn in values and private_key_arn in values:
+                _prefetched_app_secrets = (values[app_ids_arn], values[private_key_arn])
+    if not secret:
+        response = client.get_secret_value(SecretId=secret_arn)
+        secret = response.get("SecretString")
     if not secret:
         raise ValueError("Webhook secret must exist in SecretString")
     _cached_webhook_secret = secret.encode("utf-8")
     return _cached_webhook_secret
 
 
-def verify_signature(raw_body: bytes, signature_header: str, secret: bytes) -> bool:
-    if not signature_header or not signature_header.startswith("sha256="):
-        return False
+_SHA256_DIGEST_SIZE = hashlib.sha256().digest_size
+_DUMMY_DIGEST = bytes(_SHA256_DIGEST_SIZE)
+
+
+def _keyed_hmac(secret: bytes) -> hmac.HMAC:
+    """Return a fresh HMAC-SHA256 context for *secret*, cloned from a cached keyed template."""
+    global _cached_hmac_template
+    if _cached_hmac_template is None or _cached_hmac_template[0] != secret:
+        _cached_hmac_template = (secret, hmac.new(secret, None, hashlib.sha256))
+    return _cached_hmac_template[1].copy()
 
-    expected = "sha256=" + hmac.new(secret, raw_body, hashlib.sha256).hexdigest()
-    return hmac.compare_digest(expected, signature_header)
+
+def verify_signature(raw_body: bytes, signature_header: str | bytes, secret: bytes) -> bool:
+    if isinstance(signature_header, str):
+        signature_header = signature_header.encode("utf-8")
+
+    # Compare raw 32-byte digests rather than building the hex "sha256=..." string.
+    # Malformed headers are compared against a dummy digest so every request runs the
+    # same fixed-size constant-time compare.
+    provided = b""
+    if signature_header.startswith(b"sha256="):
+        try:
+            provided = binascii.unhexlify(signature_header[7:])
+        except (binascii.Error, ValueError):
+            pass
+    well_formed = len(provided) == _SHA256_DIGEST_SIZE
+
+    mac = _keyed_hmac(secret)
+    mac.update(raw_body)
+    matches = hmac.compare_digest(mac.digest(), provided if well_formed else _DUMMY_DIGEST)
+    return well_formed and matches
 
 
 def _extract_raw_body(event: dict[str, Any]) -> bytes:
@@ -78,52 +212,58 @@ def _extract_raw_body(event: dict[str, Any]) -> bytes:
 
 
 def _repo_allowed(repo_full_name: str) -> bool:
-    configured = os.getenv("GITHUB_ALLOWED_REPOS", "").strip()
-    if not configured:
-        return True
-    allowed = {repo.strip() for repo in configured.split(",") if repo.strip()}
-    return repo_full_name in allowed
+    return _ALLOWED_REPOS is None or repo_full_name in _ALLOWED_REPOS
 
 
 def _is_manual_trigger(comment_body: str) -> bool:
     """Return True if the comment body contains a recognized trigger phrase."""
-    trigger = os.getenv("REVIEW_TRIGGER_PHRASE", _DEFAULT_TRIGGER_PHRASE).strip()
-    bot_username = os.getenv("BOT_USERNAME", "").strip()
     text = comment_body.strip().lower()
 
     # Match exact trigger phrase (e.g. /review) or @bot review / @bot /review
-    if trigger.lower() in text:
-        return True
-    if bot_username and re.search(rf"@{re.escape(bot_username.lower())}\s+(/?review)", text):
+    if _TRIGGER_PHRASE in text:
         return True
+    if not _BOT_MENTION:
+        return False
+    idx = text.find(_BOT_MENTION)
+    while idx != -1:
+        if _REVIEW_AFTER_MENTION_RE.match(text, idx + len(_BOT_MENTION)):
+            return True
+        idx = text.find(_BOT_MENTION, idx + 1)
     return False
 
 
 def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
-    headers = event.get("headers") or {}
-    github_event = _get_header(headers, "X-GitHub-Event")
-    delivery_id = _get_header(headers, "X-GitHub-Delivery")
-    signature = _get_header(headers, "X-Hub-Signature-256")
+    headers = _lower_headers(event.get("headers"))
+    github_event = headers.get("x-github-event")
+    delivery_id = headers.get("x-github-delivery")
+    signature = (headers.get("x-hub-signature-256") or "").encode("utf-8")
 
     if github_event == "pull_request_review_comment":
-        return {"statusCode": 202, "body": json.dumps({"ignored": "pull_request_review_comment_event"})}
+        return _RESP_PULL_REQUEST_REVIEW_COMMENT_EVENT
 
-    if github_event not in {"pull_request", "issue_comment", "check_run"}:
-        return {"statusCode": 202, "body": json.dumps({"ignored": "non_pull_request_event"})}
+    if github_event not in _SUPPORTED_EVENTS:
+        return _RESP_NON_PULL_REQUEST_EVENT
 
     if not delivery_id:
-        return {"statusCode": 400, "body": json.dumps({"error": "missing_delivery_id"})}
+        return _RESP_MISSING_DELIVERY_ID
 
     raw_body = _extract_raw_body(event)
+
+    if github_event == "pull_request":
+        # Cheap early exit for actions we never act on (closed, assigned, edited, ...).
+        # Ignoring is non-mutating, so it is safe to answer before verification.
+        leading_action = _LEADING_ACTION_RE.match(raw_body)
+        if leading_action and leading_action.group(1).decode("ascii") not in ALLOWED_ACTIONS:
+            return _RESP_ACTION_NOT_SUPPORTED
+
     secret = _load_webhook_secret()
 
-    if not verify_signature(raw_body, signature or "", secret):
+    if not verify_signature(raw_body, signature, secret):
         logger.warning("signature_verification_failed", extra={"delivery_id": delivery_id})
-        return {"statusCode": 401, "body": json.dumps({"error": "invalid_signature"})}
+        return _RESP_INVALID_SIGNATURE
 
     # Replay-attack window: reject stale deliveries
     if MAX_WEBHOOK_AGE_SECONDS > 0:
-        gh_timestamp = _get_header(headers, "X-GitHub-Hook-Installation-Target-ID") or ""
         # GitHub sets X-GitHub-Delivery as a UUID; use the request timestamp from
         # API Gateway context if available, otherwise skip the check gracefully.
         request_epoch = (event.get("requestContext") or {}).get("timeEpoch")
@@ -134,9 +274,17 @@ def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
                     "webhook_replay_rejected",
                     extra={"delivery_id": delivery_id, "age_seconds": age_seconds},
                 )
-                return {"statusCode": 400, "body": json.dumps({"error": "webhook_too_old"})}
+                return _RESP_WEBHOOK_TOO_OLD
+
+    if (
+        github_event == "issue_comment"
+        and _TRIGGER_PREFILTER_RE is not None
+        and not _TRIGGER_PREFILTER_RE.search(raw_body)
+    ):
+        return _RESP_NO_TRIGGER_PHRASE
 
-    payload = json.loads(raw_body.decode("utf-8"))
+    # json.loads detects UTF-8 on bytes input, so parse the verified body without a decoded copy.
+    payload = json.loads(raw_body)
 
     # ---- check_run: re-run button path -------------------------------------
     if github_event == "check_run":
@@ -149,7 +297,7 @@ def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
     # ---- pull_request: auto trigger path ------------------------------------
     action = payload.get("action")
     if action not in ALLOWED_ACTIONS:
-        return {"statusCode": 202, "body": json.dumps({"ignored": "action_not_supported"})}
+        return _RESP_ACTION_NOT_SUPPORTED
 
     pull_request = payload.get("pull_request") or {}
     repository = payload.get("repository") or {}
@@ -160,20 +308,20 @@ def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
     head_sha = ((pull_request.get("head") or {}).get("sha"))
 
     if not repo_full_name or not pr_number or not head_sha:
-        return {"statusCode": 400, "body": json.dumps({"error": "missing_required_fields"})}
+        return _RESP_MISSING_REQUIRED_FIELDS
 
     if not _repo_allowed(repo_full_name):
         logger.info(
             "repo_not_allowed",
             extra={"delivery_id": delivery_id, "repo": repo_full_name, "pr_number": pr_number, "sha": head_sha},
         )
-        return {"statusCode": 202, "body": json.dumps({"ignored": "repo_not_allowed"})}
+        return _RESP_REPO_NOT_ALLOWED
 
     # For "labeled" actions, only proceed if the applied label is in the trigger set.
     if action == "labeled" and REVIEW_TRIGGER_LABELS:
         label_name = str((payload.get("label") or {}).get("name") or "")
         if label_name not in REVIEW_TRIGGER_LABELS:
-            return {"statusCode": 202, "body": json.dumps({"ignored": "label_not_in_trigger_set"})}
+            return _RESP_LABEL_NOT_IN_TRIGGER_SET
 
     return _enqueue_review(
         delivery_id=delivery_id,
@@ -190,19 +338,18 @@ def _handle_check_run(payload: dict[str, Any], delivery_id: str) -> dict[str, An
     """Handle check_run rerequested — fires when user clicks 'Re-run' in GitHub UI."""
     action = payload.get("action")
     if action != "rerequested":
-        return {"statusCode": 202, "body": json.dumps({"ignored": "check_run_action_not_rerequested"})}
+        return _RESP_CHECK_RUN_ACTION_NOT_REREQUESTED
 
     check_run = payload.get("check_run") or {}
     # Only handle our own check runs, not third-party ones.
     check_run_name = check_run.get("name") or ""
-    expected_name = os.getenv("CHECK_RUN_NAME", "AI PR Reviewer")
-    if check_run_name != expected_name:
-        return {"statusCode": 202, "body": json.dumps({"ignored": "not_our_check_run"})}
+    if check_run_name != _CHECK_RUN_NAME:
+        return _RESP_NOT_OUR_CHECK_RUN
 
     # A check_run payload contains pull_requests[] — use the first one.
     pull_requests = check_run.get("pull_requests") or []
     if not pull_requests:
-        return {"statusCode": 202, "body": json.dumps({"ignored": "check_run_no_pr"})}
+        return _RESP_CHECK_RUN_NO_PR
 
     pr_ref = pull_requests[0]
     pr_number = pr_ref.get("number")
@@ -211,10 +358,10 @@ def _handle_check_run(payload: dict[str, Any], delivery_id: str) -> dict[str, An
     repo_full_name = repository.get("full_name")
 
     if not repo_full_name or not pr_number or not head_sha:
-        return {"statusCode": 400, "body": json.dumps({"error": "missing_required_fields"})}
+        return _RESP_MISSING_REQUIRED_FIELDS
 
     if not _repo_allowed(repo_full_name):
-        return {"statusCode": 202, "body": json.dumps({"ignored": "repo_not_allowed"})}
+        return _RESP_REPO_NOT_ALLOWED
 
     logger.info(
         "check_run_rerun_triggered",
@@ -235,18 +382,18 @@ def _handle_check_run(payload: dict[str, Any], delivery_id: str) -> dict[str, An
 def _handle_issue_comment(payload: dict[str, Any], delivery_id: str) -> dict[str, Any]:
     """Handle issue_comment events for manual /review triggers on PRs."""
     action = payload.get("action")
-    if action not in {"created", "edited"}:
-        return {"statusCode": 202, "body": json.dumps({"ignored": "comment_action_not_supported"})}
+    if action not in _COMMENT_ACTIONS:
+        return _RESP_COMMENT_ACTION_NOT_SUPPORTED
 
     # Only handle PR comments (issues have pull_request key in the issue object)
     issue = payload.get("issue") or {}
     if not issue.get("pull_request"):
-        return {"statusCode": 202, "body": json.dumps({"ignored": "not_a_pr_comment"})}
+        return _RESP_NOT_A_PR_COMMENT
 
     comment = payload.get("comment") or {}
     comment_body = comment.get("body") or ""
     if not _is_manual_trigger(comment_body):
-        return {"statusCode": 202, "body": json.dumps({"ignored": "no_trigger_phrase"})}
+        return _RESP_NO_TRIGGER_PHRASE
 
     repository = payload.get("repository") or {}
     installation = payload.get("installation") or {}
@@ -255,17 +402,17 @@ def _handle_issue_comment(payload: dict[str, Any], delivery_id: str) -> dict[str
     pr_number = issue.get("number")
 
     if not repo_full_name or not pr_number:
-        return {"statusCode": 400, "body": json.dumps({"error": "missing_required_fields"})}
+        return _RESP_MISSING_REQUIRED_FIELDS
 
     if not _repo_allowed(repo_full_name):
-        return {"statusCode": 202, "body": json.dumps({"ignored": "repo_not_allowed"})}
+        return _RESP_REPO_NOT_ALLOWED
 
     # Fetch the current head SHA from the PR — use the pull_request URL stored in the issue
     pr_url = (issue.get("pull_request") or {}).get("url") or ""
     head_sha = _fetch_pr_head_sha_from_url(pr_url)
     if not head_sha:
         logger.warning("manual_trigger_head_sha_missing", extra={"delivery_id": delivery_id, "pr_number": pr_number})
-        return {"statusCode": 500, "body": json.dumps({"error": "could_not_resolve_head_sha"})}
+        return _RESP_COULD_NOT_RESOLVE_HEAD_SHA
 
     logger.info(
         "manual_review_triggered",
@@ -283,6 +430,43 @@ def _handle_issue_comment(payload: dict[str, Any], delivery_id: str) -> dict[str
     )
 
 
+def _http_session() -> requests.Session:
+    """Return the container-wide GitHub API session, created on first use."""
+    global _http_session_cached  # noqa: PLW0603
+    if _http_session_cached is None:
+        # Import here; requests is only needed for the manual-trigger path.
+        import requests
+
+        session = requests.Session()
+        session.headers.update({
+            "Accept": "application/vnd.github+json",
+            "X-GitHub-Api-Version": "2022-11-28",
+        })
+        _http_session_cached = session
+    return _http_session_cached
+
+
+def _github_auth() -> GitHubAppAuth:
+    """Return the container-wide GitHub App auth, primed with any batch-fetched secrets."""
+    global _prefetched_app_secrets  # noqa: PLW0603
+    # Import here to avoid circular imports; only needed for the manual path
+    from shared.github_app_auth import cached_github_app_auth
+
+    auth = cached_github_app_auth(
+        app_ids_secret_arn=os.environ["GITHUB_APP_IDS_SECRET_ARN"],
+        private_key_secret_arn=os.environ["GITHUB_APP_PRIVATE_KEY_SECRET_ARN"],
+        api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"),
+        http_session=_http_session(),
+    )
+    if _prefetched_app_secrets is not None:
+        secrets, _prefetched_app_secrets = _prefetched_app_secrets, None
+        try:
+            auth.prime_secrets(*secrets)
+        except Exception:  # noqa: BLE001
+            logger.warning("github_app_secret_prime_failed")
+    return auth
+
+
 def _fetch_pr_head_sha_from_url(pr_api_url: str) -> str | None:
     """Resolve the current head SHA of a PR from its API URL.
 
@@ -292,26 +476,9 @@ def _fetch_pr_head_sha_from_url(pr_api_url: str) -> str | None:
     if not pr_api_url:
         return None
 
-    # Import here to avoid circular imports; these are only needed for the manual path
-    import requests
-    from shared.github_app_auth import GitHubAppAuth
-
     try:
-        auth = GitHubAppAuth(
-            app_ids_secret_arn=os.environ["GITHUB_APP_IDS_SECRET_ARN"],
-            private_key_secret_arn=os.environ["GITHUB_APP_PRIVATE_KEY_SECRET_ARN"],
-            api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"),
-        )
-        token = auth.get_installation_token()
-        resp = requests.get(
-            pr_api_url,
-            headers={
-                "Authorization": f"token {token}",
-                "Accept": "application/vnd.github+json",
-                "X-GitHub-Api-Version": "2022-11-28",
-            },
-            timeout=10,
-        )
+        token = _github_auth().get_installation_token()
+        resp = _http_session().get(pr_api_url, headers={"Authorization": f"token {token}"}, timeout=10)
         resp.raise_for_status()
         pr_data = resp.json()
         return (pr_data.get("head") or {}).get("sha")
@@ -320,6 +487,18 @@ def _fetch_pr_head_sha_from_url(pr_api_url: str) -> str | None:
         return None
 
 
+def _send_message_kwargs(queue_url: str, message_body: str, group_id: str, dedup_id: str) -> dict[str, Any]:
+    """Build SendMessage arguments; FIFO queues also get the group and dedup ids."""
+    if queue_url.endswith(".fifo"):
+        return {
+            "QueueUrl": queue_url,
+            "MessageBody": message_body,
+            "MessageGroupId": group_id,
+            "MessageDeduplicationId": dedup_id,
+        }
+    return {"QueueUrl": queue_url, "MessageBody": message_body}
+
+
 def _enqueue_review(
     delivery_id: str,
     repo_full_name: str,
@@ -339,7 +518,7 @@ def _enqueue_review(
         "event_action": event_action,
         "trigger": trigger,
     }
-    message_body = json.dumps(message)
+    message_body = json.dumps(message, separators=(",", ":"))
 
     # Dedup key: same repo + PR + SHA should only be reviewed once, even if multiple
     # webhooks fire in rapid succession (e.g. fast-push synchronize storms, rerequested
@@ -348,23 +527,19 @@ def _enqueue_review(
     # way.  The dedup window is 5 minutes (SQS FIFO hardcoded minimum).
     dedup_id = f"{repo_full_name}:{pr_number}:{head_sha}"
 
-    send_kwargs: dict[str, Any] = {"QueueUrl": os.environ["QUEUE_URL"], "MessageBody": message_body}
-    queue_url: str = os.environ["QUEUE_URL"]
-    if queue_url.endswith(".fifo"):
-        send_kwargs["MessageGroupId"] = f"{repo_full_name}:{pr_number}"
-        send_kwargs["MessageDeduplicationId"] = dedup_id
+    group_id = f"{repo_full_name}:{pr_number}"
+    send_kwargs = _send_message_kwargs(_QUEUE_URL, message_body, group_id, dedup_id)
 
     _sqs.send_message(**send_kwargs)
 
-    # Fan-out: enqueue PR description generation if enabled (auto triggers only)
-    pr_desc_queue = os.getenv("PR_DESCRIPTION_QUEUE_URL")
-    if pr_desc_queue and trigger == "auto":
+    # Fan-out: enqueue PR description generation if enabled (auto triggers only).
+    # Sent only after the review message succeeds: a failed review send makes
+    # GitHub redeliver the webhook, which would otherwise duplicate this message.
+    if _PR_DESCRIPTION_QUEUE_URL and trigger == "auto":
         try:
-            desc_kwargs: dict[str, Any] = {"QueueUrl": pr_desc_queue, "MessageBody": message_body}
-            if pr_desc_queue.endswith(".fifo"):
-                desc_kwargs["MessageGroupId"] = f"{repo_full_name}:{pr_number}"
-                desc_kwargs["MessageDeduplicationId"] = f"pr-desc:{dedup_id}"
-            _sqs.send_message(**desc_kwargs)
+            _sqs.send_message(**_send_message_kwargs(
+                _PR_DESCRIPTION_QUEUE_URL, message_body, group_id, f"pr-desc:{dedup_id}"
+            ))
             logger.info("pr_description_enqueued", extra={"delivery_id": delivery_id, "pr_number": pr_number})
         except Exception:  # noqa: BLE001
             logger.warning("pr_description_enqueue_failed", extra={"delivery_id": delivery_id})
@@ -373,4 +548,4 @@ def _enqueue_review(
         "webhook_enqueued",
         extra={"delivery_id": delivery_id, "repo": repo_full_name, "pr_number": pr_number, "sha": head_sha, "trigger": trigger},
     )
-    return {"statusCode": 202, "body": json.dumps({"status": "accepted"})}
+    return _RESP_ACCEPTED
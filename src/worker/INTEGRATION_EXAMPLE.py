@@ -175,20 +175,22 @@ def generate_pr_review_v2(
         deletions=deletions
     )
     
-    # Call Bedrock
+    # Call Bedrock. The static system prompt and review instructions go first
+    # as cache_control blocks, so repeat reviews within the cache window are
+    # billed at the cached-input rate; only the PR header + diffs vary.
     response = self.invoke_model(
-        system=prompt_data['system'],
+        system=prompt_data['system_blocks'],
         messages=[{
             'role': 'user',
-            'content': prompt_data['prompt']
+            'content': prompt_data['content_blocks']
         }],
         temperature=temperature,
         max_tokens=4096
     )
     
-    # Parse and return
-    import json
-    return json.loads(response)
+    # Parse and return. _parse_text_to_json tolerates prose around the JSON
+    # object, so a chatty answer does not cost a re-invoke.
+    return self._parse_text_to_json(response)
 
 
 # ============================================================================
@@ -241,29 +243,22 @@ def test_file_scoring():
     assert test_score.score < score.score
 
 
+def _code_patch(prefix: str, lines: int) -> str:
+    """Code-like added lines; repeated single characters ('a' * 2000) collapse
+    to a handful of tokens under a real BPE tokenizer and break budget tests."""
+    return "\n".join(
+        f"+    {prefix}_{i} = compute_{prefix}(arg_{i}, limit={i * 7})" for i in range(lines)
+    )
+
+
 def test_compression():
     """Test file compression within token budget."""
     compressor = PRFileCompressor(max_tokens=1000)
     
     files = [
-        {
-            'filename': 'src/app.py',
-            'status': 'modified',
-            'changes': 10,
-            'patch': 'a' * 2000  # ~500 tokens
-        },
-        {
-            'filename': 'src/lib.py',
-            'status': 'modified',
-            'changes': 10,
-            'patch': 'b' * 2000  # ~500 tokens
-        },
-        {
-            'filename': 'src/util.py',
-            'status': 'modified',
-            'changes': 10,
-            'patch': 'c' * 2000  # ~500 tokens
-        }
+        {'filename': f'src/{name}.py', 'status': 'modified', 'changes': 10,
+         'patch': _code_patch(name, 40)}  # ~500 tokens
+        for name in ('app', 'lib', 'util')
     ]
     
     compressed = compressor.compress_files(files)
@@ -271,8 +266,9 @@ def test_compression():
     # Should fit within budget (first 2 files)
     assert len(compressed) <= 2
     
-    # Total tokens should be under budget
-    total_tokens = sum(len(f['patch']) // 4 for f in compressed)
+    # Total tokens should be under budget, measured with the compressor's own
+    # counter (counts are memoized, so this does not re-tokenize)
+    total_tokens = sum(compressor.count_tokens(f['patch']) for f in compressed)
     assert total_tokens <= 1000
 
 
@@ -347,6 +343,7 @@ def get_review_configuration() -> dict:
     """Get review configuration from environment."""
     return {
         'compression_enabled': os.getenv('PR_COMPRESSION_ENABLED', 'true').lower() == 'true',
+        'drop_context': os.getenv('PR_DROP_CONTEXT', 'false').lower() == 'true',
         'max_tokens': int(os.getenv('PR_MAX_TOKENS', '32000')),
         'improved_prompts': os.getenv('PR_IMPROVED_PROMPTS', 'true').lower() == 'true',
         'skip_lock_files': os.getenv('PR_SKIP_LOCK_FILES', 'true').lower() == 'true'
@@ -369,7 +366,10 @@ def review_pull_request_with_feature_flags(
     # Optionally compress files
     if config['compression_enabled']:
         from worker.pr_agent_patterns import PRFileCompressor
-        compressor = PRFileCompressor(max_tokens=config['max_tokens'])
+        compressor = PRFileCompressor(
+            max_tokens=config['max_tokens'],
+            drop_context=config['drop_context']
+        )
         files = compressor.compress_files(files)
     
     # Use improved or legacy prompts
@@ -401,11 +401,13 @@ def review_pull_request_with_feature_flags(
 # STEP 8: Monitoring and Metrics
 # ============================================================================
 
-# Add CloudWatch metrics to track improvements:
-
-import boto3
+# Add CloudWatch metrics to track improvements. Emit them in CloudWatch
+# Embedded Metric Format (EMF): Lambda ships stdout to CloudWatch Logs, which
+# extracts the metrics, so there is no boto3 client to build on cold start and
+# no synchronous PutMetricData round trip per review.
 
-cloudwatch = boto3.client('cloudwatch', region_name='us-gov-west-1')
+import json
+import time
 
 def log_compression_metrics(
     original_file_count: int,
@@ -413,27 +415,25 @@ def log_compression_metrics(
     original_tokens: int,
     compressed_tokens: int
 ):
-    """Log compression metrics to CloudWatch."""
-    cloudwatch.put_metric_data(
-        Namespace='PRReviewer/Compression',
-        MetricData=[
-            {
-                'MetricName': 'FilesCompressed',
-                'Value': original_file_count - compressed_file_count,
-                'Unit': 'Count'
-            },
-            {
-                'MetricName': 'TokensSaved',
-                'Value': original_tokens - compressed_tokens,
-                'Unit': 'Count'
-            },
-            {
-                'MetricName': 'CompressionRatio',
-                'Value': compressed_tokens / original_tokens if original_tokens > 0 else 1.0,
-                'Unit': 'Percent'
-            }
-        ]
-    )
+    """Log compression metrics to CloudWatch via EMF."""
+    ratio = compressed_tokens / original_tokens if original_tokens > 0 else 1.0
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': 'PRReviewer/Compression',
+                'Dimensions': [[]],
+                'Metrics': [
+                    {'Name': 'FilesCompressed', 'Unit': 'Count'},
+                    {'Name': 'TokensSaved', 'Unit': 'Count'},
+                    {'Name': 'CompressionRatio', 'Unit': 'Percent'}
+                ]
+            }]
+        },
+        'FilesCompressed': original_file_count - compressed_file_count,
+        'TokensSaved': original_tokens - compressed_tokens,
+        'CompressionRatio': ratio * 100
+    }))
 
 
 # ============================================================================
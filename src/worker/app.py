@@ -2,43 +2,89 @@ from __future__ import annotations
 
 import contextlib
 import datetime
+import hashlib
 import json
 import os
+import pathlib
 import re
+import threading
 import time
-from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby, islice
 from typing import Any
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
 from shared.atlassian_client import AtlassianClient
 from shared.bedrock_client import BedrockReviewClient
 from shared.bedrock_kb import BedrockKnowledgeBaseClient
 from shared.constants import DEFAULT_REGION
-from shared.github_app_auth import GitHubAppAuth
+from shared.github_app_auth import GitHubAppAuth, cached_github_app_auth
 from shared.github_client import GitHubClient
 from shared.logging import get_logger
 from shared.schema import Finding, ReviewResult, parse_review_result
 from worker.build_context import build_pr_context
 from worker.patch_apply import PatchApplyError, apply_unified_patch
+from worker.prompts import planner_prompt, review_prompt
 from worker.render_markdown import render_check_run_body
-from worker.review_mapper import map_new_line_to_diff_position
+from worker.review_mapper import build_line_to_position_index
 
 logger = get_logger("pr_review_worker")
 
-_dynamodb = boto3.client("dynamodb")
-_cloudwatch = boto3.client("cloudwatch")
-_sqs = boto3.client("sqs")
-
+# Shared client config: pooled keep-alive connections and adaptive (token
+# bucket) retries so throttled DynamoDB/CloudWatch calls back off client-side.
+_AWS_CLIENT_CONFIG = Config(
+    max_pool_connections=32,
+    retries={"mode": "adaptive", "max_attempts": 3},
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=10,
+)
+_dynamodb = boto3.client("dynamodb", config=_AWS_CLIENT_CONFIG)
+_cloudwatch = boto3.client("cloudwatch", config=_AWS_CLIENT_CONFIG)
+_sqs = boto3.client("sqs", config=_AWS_CLIENT_CONFIG)
+# Per-container TTL caches for lookups repeated across events on the same PR.
+JIRA_CACHE_TTL_SECONDS = int(os.getenv("JIRA_CACHE_TTL_SECONDS", "600"))
+REPO_CONFIG_CACHE_TTL_SECONDS = int(os.getenv("REPO_CONFIG_CACHE_TTL_SECONDS", "900"))
+# Background pool for GitHub/AWS calls that can overlap the critical path;
+# Jira lookups get their own so they never queue behind those.
+_io_pool_cached: ThreadPoolExecutor | None = None
+_jira_pool_cached: ThreadPoolExecutor | None = None
+# Concurrent records hit the lazy pool initialisers together on a cold start.
+_pool_init_lock = threading.Lock()
+# Review client (and its botocore clients) built once per container; the lock
+# keeps concurrent cold records from each loading the service models.
+_bedrock_client_cached: BedrockReviewClient | None = None
+_bedrock_client_lock = threading.Lock()
+
+METRICS_NAMESPACE = os.getenv("METRICS_NAMESPACE", "AIPrReviewer")
+# Per-record settings, resolved once instead of on every SQS record.
+GITHUB_API_BASE = os.getenv("GITHUB_API_BASE", "https://api.github.com")
+AWS_REGION = os.getenv("AWS_REGION", DEFAULT_REGION)
+DRY_RUN = os.getenv("DRY_RUN", "false").lower() == "true"
+BEDROCK_MODEL_ID = os.getenv("BEDROCK_MODEL_ID", "")
+ATLASSIAN_CREDENTIALS_SECRET_ARN = os.getenv("ATLASSIAN_CREDENTIALS_SECRET_ARN", "")
+BEDROCK_KNOWLEDGE_BASE_ID = os.getenv("BEDROCK_KNOWLEDGE_BASE_ID", "")
 SAFE_PATCH_CHAR_BUDGET = int(os.getenv("PATCH_CHAR_BUDGET", "45000"))
 IDEMPOTENCY_TTL_SECONDS = int(os.getenv("IDEMPOTENCY_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+AUTO_PR_ENABLED = os.getenv("AUTO_PR_ENABLED", "false").lower() == "true"
 AUTO_PR_MAX_FILES = int(os.getenv("AUTO_PR_MAX_FILES", "5"))
 AUTO_PR_BRANCH_PREFIX = os.getenv("AUTO_PR_BRANCH_PREFIX", "ai-autofix")
 REVIEW_COMMENT_MODE = os.getenv("REVIEW_COMMENT_MODE", "inline_best_effort")
 CHECK_RUN_NAME = os.getenv("CHECK_RUN_NAME", "AI PR Reviewer")
 BEDROCK_MODEL_LIGHT = os.getenv("BEDROCK_MODEL_LIGHT", "")
 BEDROCK_MODEL_HEAVY = os.getenv("BEDROCK_MODEL_HEAVY", "")
+# Reuse a stored review when an identical context is reviewed again with the
+# same models and prompts (rebases / new SHAs with an unchanged diff; a re-run
+# at the same head SHA is already stopped by the idempotency claim).
+REVIEW_CACHE_ENABLED = os.getenv("REVIEW_CACHE_ENABLED", "true").lower() == "true"
+# Record runs of one SQS batch processed concurrently (FIFO groups stay sequential).
+RECORD_CONCURRENCY = max(1, int(os.getenv("RECORD_CONCURRENCY", "10")))
+# PRs changing fewer lines than this skip the stage-1 planner and go straight to
+# the reviewer with a deterministic plan; 0 always runs the planner.
+TWO_STAGE_MIN_DELTA = int(os.getenv("TWO_STAGE_MIN_DELTA", "50"))
 INCREMENTAL_REVIEW_ENABLED = os.getenv("INCREMENTAL_REVIEW_ENABLED", "true").lower() == "true"
 PR_REVIEW_STATE_TABLE = os.getenv("PR_REVIEW_STATE_TABLE", "")
 # Config filter knobs (pr-agent style)
@@ -52,6 +98,9 @@ REVIEW_TRIGGER_LABELS: frozenset[str] = frozenset(
 )
 IGNORE_PR_SOURCE_BRANCHES_RAW = [p.strip() for p in os.getenv("IGNORE_PR_SOURCE_BRANCHES", "").split(",") if p.strip()]
 IGNORE_PR_TARGET_BRANCHES_RAW = [p.strip() for p in os.getenv("IGNORE_PR_TARGET_BRANCHES", "").split(",") if p.strip()]
+# Compiled once; a bad pattern fails at cold start instead of on every PR.
+_IGNORE_PR_SOURCE_BRANCH_RES = [re.compile(p) for p in IGNORE_PR_SOURCE_BRANCHES_RAW]
+_IGNORE_PR_TARGET_BRANCH_RES = [re.compile(p) for p in IGNORE_PR_TARGET_BRANCHES_RAW]
 NUM_MAX_FINDINGS = int(os.getenv("NUM_MAX_FINDINGS", "0"))  # 0 = unlimited
 REQUIRE_SECURITY_REVIEW = os.getenv("REQUIRE_SECURITY_REVIEW", "true").lower() == "true"
 REQUIRE_TESTS_REVIEW = os.getenv("REQUIRE_TESTS_REVIEW", "true").lower() == "true"
@@ -73,6 +122,42 @@ POST_REVIEW_COMMENT = os.getenv("POST_REVIEW_COMMENT", "false").lower() == "true
 
 _JIRA_KEY_RE = re.compile(r"\b([A-Z][A-Z0-9_]+-\d+)\b")
 
+
+class _TTLCache:
+    """Small thread-safe TTL cache for per-container memoisation."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256) -> None:
+        self._ttl = ttl_seconds
+        self._max_entries = max_entries
+        self._entries: dict[Any, tuple[float, Any]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any) -> Any | None:
+        """Return the live value for *key*, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            return entry[1]
+
+    def put(self, key: Any, value: Any) -> None:
+        with self._lock:
+            if len(self._entries) >= self._max_entries:
+                now = time.monotonic()
+                self._entries = {k: e for k, e in self._entries.items() if e[0] > now}
+                if len(self._entries) >= self._max_entries:
+                    # Still full of live entries: drop the oldest insert.
+                    del self._entries[next(iter(self._entries))]
+            self._entries[key] = (time.monotonic() + self._ttl, value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
 # Supported keys that .ai-reviewer.yml may override (all values are strings).
 _REPO_CONFIG_KEYS = frozenset({
     "skip_draft_prs",
@@ -88,6 +173,15 @@ _REPO_CONFIG_KEYS = frozenset({
     "require_tests_review",
     "num_max_findings",
 })
+# `key: value` lines for the keys above (case-insensitive, indentation allowed).
+_REPO_CONFIG_LINE_RE = re.compile(
+    r"^[ \t]*(" + "|".join(sorted(_REPO_CONFIG_KEYS)) + r")[ \t]*:(.*)$",
+    re.MULTILINE | re.IGNORECASE,
+)
+
+# (owner, repo, ref) -> parsed .ai-reviewer.yml; Jira key -> trimmed issue dict
+_repo_config_cache = _TTLCache(REPO_CONFIG_CACHE_TTL_SECONDS)
+_jira_issue_cache = _TTLCache(JIRA_CACHE_TTL_SECONDS)
 
 
 def _load_repo_config(gh: "GitHubClient", owner: str, repo: str, ref: str) -> dict[str, str]:
@@ -95,49 +189,47 @@ def _load_repo_config(gh: "GitHubClient", owner: str, repo: str, ref: str) -> di
 
     Returns a dict of string key/value pairs for recognised config keys.
     Silently returns empty dict on any error (file absent, YAML parse error, etc.).
-    The file format is simple flat YAML, e.g.::
+    Parsed configs, and "file absent", are cached per (owner, repo, ref) for
+    REPO_CONFIG_CACHE_TTL_SECONDS; pass a commit SHA as *ref* so a cached entry
+    can never be stale. The file format is simple flat YAML, e.g.::
 
         failure_on_severity: medium
         skip_draft_prs: false
         post_review_comment: true
         ignore_pr_labels: wip, do-not-review
     """
+    cache_key = (owner, repo, ref)
+    cached = _repo_config_cache.get(cache_key)
+    if cached is not None:
+        return dict(cached)
     try:
         raw_yaml, _ = gh.get_file_contents(owner, repo, ".ai-reviewer.yml", ref)
 
-        # Minimal YAML parser — only flat key: value lines, no deps on pyyaml
-        config: dict[str, str] = {}
-        for line in raw_yaml.splitlines():
-            line = line.strip()
-            if not line or line.startswith("#"):
-                continue
-            if ":" not in line:
-                continue
-            key, _, value = line.partition(":")
-            key = key.strip().lower()
-            value = value.strip().strip("\"'")
-            if key in _REPO_CONFIG_KEYS:
-                config[key] = value
-        return config
-    except Exception:  # noqa: BLE001
+        # Minimal YAML parser — only flat key: value lines, no deps on pyyaml.
+        # One regex scan yields just the recognised keys (last one wins).
+        config = {
+            key.lower(): value.strip().strip("\"'")
+            for key, value in _REPO_CONFIG_LINE_RE.findall(raw_yaml)
+        }
+    except Exception as exc:  # noqa: BLE001
+        # Remember "no config file" too; other errors may be transient.
+        if getattr(getattr(exc, "response", None), "status_code", None) == 404:
+            _repo_config_cache.put(cache_key, {})
         return {}
+    _repo_config_cache.put(cache_key, config)
+    return dict(config)
 
 
 def _extract_jira_keys(pr: dict[str, Any]) -> list[str]:
     """Extract unique Jira issue keys from PR title, body, and branch name."""
-    sources = [
+    # One scan over all sources; the newline separator keeps a key from
+    # spanning two sources, and dict.fromkeys dedups in first-seen order.
+    combined = "\n".join((
         pr.get("title") or "",
         pr.get("body") or "",
         (pr.get("head") or {}).get("ref") or "",
-    ]
-    keys: list[str] = []
-    seen: set[str] = set()
-    for source in sources:
-        for match in _JIRA_KEY_RE.findall(source):
-            if match not in seen:
-                seen.add(match)
-                keys.append(match)
-    return keys
+    ))
+    return list(dict.fromkeys(_JIRA_KEY_RE.findall(combined)))
 
 
 def _fetch_jira_context(
@@ -145,26 +237,50 @@ def _fetch_jira_context(
     credentials_secret_arn: str,
     max_issues: int = 5,
 ) -> list[dict[str, Any]]:
-    """Fetch Jira issue details for the given keys. Failures are silently skipped."""
+    """Fetch Jira issue details for the given keys. Failures are silently skipped.
+
+    Fetched issues are cached per key for JIRA_CACHE_TTL_SECONDS.
+    """
     if not jira_keys or not credentials_secret_arn:
         return []
 
-    atlassian = AtlassianClient(credentials_secret_arn=credentials_secret_arn)
-    issues: list[dict[str, Any]] = []
-    for key in jira_keys[:max_issues]:
-        try:
-            issue = atlassian.get_jira_issue(key)
+    wanted = jira_keys[:max_issues]
+    issues_by_key: dict[str, dict[str, Any]] = {}
+    misses: list[str] = []
+    for key in wanted:
+        cached = _jira_issue_cache.get(key)
+        if cached is not None:
+            issues_by_key[key] = cached
+        else:
+            misses.append(key)
+
+    if misses:
+        atlassian = AtlassianClient(credentials_secret_arn=credentials_secret_arn)
+
+        def _fetch(key: str) -> dict[str, Any] | None:
+            try:
+                issue = atlassian.get_jira_issue(key)
+            except Exception:  # noqa: BLE001
+                logger.warning("jira_fetch_failed", extra={"extra": {"key": key}})
+                return None
             fields = issue.get("fields") or {}
-            issues.append({
+            summary = {
                 "key": issue.get("key") or key,
                 "summary": str(fields.get("summary") or ""),
                 "status": str((fields.get("status") or {}).get("name") or ""),
                 "type": str((fields.get("issuetype") or {}).get("name") or ""),
                 "description": str(fields.get("description") or "")[:500],
-            })
-        except Exception:  # noqa: BLE001
-            logger.warning("jira_fetch_failed", extra={"extra": {"key": key}})
-    return issues
+            }
+            _jira_issue_cache.put(key, summary)
+            return summary
+
+        # Independent round-trips: fetch concurrently when there is more than one.
+        fetched = _jira_pool().map(_fetch, misses) if len(misses) > 1 else map(_fetch, misses)
+        for key, summary in zip(misses, fetched):
+            if summary is not None:
+                issues_by_key[key] = summary
+
+    return [issues_by_key[key] for key in wanted if key in issues_by_key]
 
 
 def _fetch_kb_context(
@@ -224,29 +340,62 @@ SENSITIVE_FILE_PATTERNS = (
 )
 
 
+_SENSITIVE_FILE_RE = re.compile(
+    "|".join(re.escape(marker) for marker in SENSITIVE_FILE_PATTERNS), re.IGNORECASE
+)
+
+
 def _is_sensitive_file(path: str) -> bool:
-    lower = path.lower()
-    return any(marker in lower for marker in SENSITIVE_FILE_PATTERNS)
+    return _SENSITIVE_FILE_RE.search(path) is not None
 
 
-def _emit_metric(metric_name: str, value: float, unit: str = "Count") -> None:
-    namespace = os.getenv("METRICS_NAMESPACE", "AIPrReviewer")
-    try:
-        _cloudwatch.put_metric_data(
-            Namespace=namespace,
-            MetricData=[
-                {
-                    "MetricName": metric_name,
-                    "Unit": unit,
-                    "Value": value,
-                }
-            ],
-        )
-    except Exception:  # noqa: BLE001
-        logger.warning(
-            "metric_emit_failed",
-            extra={"extra": {"metric_name": metric_name, "namespace": namespace}},
-        )
+# Metrics emitted while lambda_handler runs are buffered here and sent in as
+# few PutMetricData calls as possible; outside a batch they go out directly.
+_metric_buffer: list[dict[str, Any]] | None = None
+_METRIC_DATA_MAX_PER_CALL = 1000
+
+
+def _emit_metric(
+    metric_name: str,
+    value: float,
+    unit: str = "Count",
+    dimensions: dict[str, str] | None = None,
+) -> None:
+    datum: dict[str, Any] = {
+        "MetricName": metric_name,
+        "Unit": unit,
+        "Value": value,
+        "Timestamp": datetime.datetime.now(datetime.UTC),
+    }
+    if dimensions:
+        datum["Dimensions"] = [{"Name": k, "Value": v} for k, v in dimensions.items()]
+    if _metric_buffer is not None:
+        _metric_buffer.append(datum)
+        return
+    _put_metric_data([datum])
+
+
+def _put_metric_data(metric_data: list[dict[str, Any]]) -> None:
+    for i in range(0, len(metric_data), _METRIC_DATA_MAX_PER_CALL):
+        chunk = metric_data[i:i + _METRIC_DATA_MAX_PER_CALL]
+        try:
+            _cloudwatch.put_metric_data(Namespace=METRICS_NAMESPACE, MetricData=chunk)
+        except Exception:  # noqa: BLE001
+            logger.warning(
+                "metric_emit_failed",
+                extra={"extra": {
+                    "metric_names": sorted({d["MetricName"] for d in chunk}),
+                    "namespace": METRICS_NAMESPACE,
+                }},
+            )
+
+
+def _flush_metrics() -> None:
+    """Send everything buffered since the batch started and stop buffering."""
+    global _metric_buffer  # noqa: PLW0603
+    buffered, _metric_buffer = _metric_buffer, None
+    if buffered:
+        _put_metric_data(buffered)
 
 
 def _claim_idempotency(repo_full_name: str, pr_number: int, head_sha: str) -> bool:
@@ -270,6 +419,92 @@ def _claim_idempotency(repo_full_name: str, pr_number: int, head_sha: str) -> bo
         raise
 
 
+def _small_pr_plan(reviewed_files: list[str]) -> dict[str, Any]:
+    """Planner-shaped triage plan for PRs too small to be worth a planner call.
+
+    Files keep build_pr_context's largest-change-first order as the risk ranking.
+    The risk estimate is a neutral "medium": no planner looked at the diff, so a
+    "low" here would only anchor the reviewer's own risk call.
+    """
+    return {
+        "risk_ranking": list(reviewed_files),
+        "hotspots": [],
+        "file_clusters": [],
+        "skip_files": [],
+        "overall_risk_estimate": "medium",
+    }
+
+
+# Bump when review output changes in ways the templates/schemas below don't show
+# (e.g. post-processing of the model's answer), so stale cached reviews miss.
+REVIEW_PROMPT_VERSION = "1"
+
+
+def _prompt_fingerprint() -> str:
+    """Digest of the planner/reviewer templates and output schemas."""
+    digest = hashlib.sha256(REVIEW_PROMPT_VERSION.encode())
+    for template in (
+        planner_prompt.PLANNER_SYSTEM,
+        planner_prompt.PLANNER_USER_TMPL,
+        review_prompt.REVIEWER_SYSTEM,
+        review_prompt.REVIEWER_USER_TMPL,
+    ):
+        digest.update(b"\0")
+        digest.update(template.encode())
+    schema_dir = pathlib.Path(__file__).resolve().parent.parent / "shared" / "schemas"
+    for name in ("planner.schema.json", "review.schema.json"):
+        digest.update(b"\0")
+        digest.update((schema_dir / name).read_bytes())
+    return digest.hexdigest()
+
+
+_PROMPT_FINGERPRINT = _prompt_fingerprint()
+
+
+def _review_cache_key(context: dict[str, Any], *model_ids: str) -> str:
+    """Content address for a review: prompt version, models and the full planner/reviewer context."""
+    digest = hashlib.sha256(_PROMPT_FINGERPRINT.encode())
+    digest.update(b"\0")
+    digest.update("\0".join(model_ids).encode())
+    digest.update(b"\0")
+    digest.update(json.dumps(context, sort_keys=True, default=str).encode())
+    return f"review-cache:{digest.hexdigest()}"
+
+
+def _get_cached_review(cache_key: str) -> dict[str, Any] | None:
+    """Return the stored review for *cache_key*, or None on miss/expiry/error."""
+    try:
+        response = _dynamodb.get_item(
+            TableName=os.environ["IDEMPOTENCY_TABLE"],
+            Key={"idempotency_key": {"S": cache_key}},
+            ProjectionExpression="review_json, expires_at",
+        )
+        item = response.get("Item") or {}
+        # DynamoDB TTL deletion is lazy; honour expires_at ourselves.
+        if not item or int(item["expires_at"]["N"]) <= int(time.time()):
+            return None
+        return json.loads(item["review_json"]["S"])
+    except Exception:  # noqa: BLE001
+        logger.warning("review_cache_get_failed")
+        return None
+
+
+def _put_cached_review(cache_key: str, review: dict[str, Any]) -> None:
+    """Store *review* under *cache_key* with the idempotency TTL."""
+    try:
+        _dynamodb.put_item(
+            TableName=os.environ["IDEMPOTENCY_TABLE"],
+            Item={
+                "idempotency_key": {"S": cache_key},
+                "review_json": {"S": json.dumps(review, separators=(",", ":"))},
+                "expires_at": {"N": str(int(time.time()) + IDEMPOTENCY_TTL_SECONDS)},
+                "created_at": {"N": str(int(time.time()))},
+            },
+        )
+    except Exception:  # noqa: BLE001
+        logger.warning("review_cache_put_failed")
+
+
 # ---------------------------------------------------------------------------
 # Incremental review: track last reviewed SHA per PR
 # ---------------------------------------------------------------------------
@@ -381,10 +616,14 @@ def _should_skip_review(
     if effective_skip_drafts and pr.get("draft"):
         return True, "PR is a draft (SKIP_DRAFT_PRS=true)"
 
+    # Label names are str|None in the GitHub payload; collect them once for both label filters.
+    labels: set[str] = set()
+    if REVIEW_TRIGGER_LABELS or IGNORE_PR_LABELS:
+        labels = {name for lbl in (pr.get("labels") or []) if (name := lbl.get("name"))}
+
     # Require a specific label before reviewing (opt-in mode)
     if REVIEW_TRIGGER_LABELS:
-        labels = {str(lbl.get("name") or "") for lbl in (pr.get("labels") or [])}
-        if not (REVIEW_TRIGGER_LABELS & labels):
+        if labels.isdisjoint(REVIEW_TRIGGER_LABELS):
             return True, f"PR does not have any of the required trigger label(s): {', '.join(sorted(REVIEW_TRIGGER_LABELS))}"
 
     # Ignore PR by author
@@ -395,24 +634,23 @@ def _should_skip_review(
 
     # Ignore PR by label
     if IGNORE_PR_LABELS:
-        labels = {str(lbl.get("name") or "") for lbl in (pr.get("labels") or [])}
         matched = IGNORE_PR_LABELS & labels
         if matched:
             return True, f"PR has ignored label(s): {', '.join(sorted(matched))}"
 
     # Ignore PR by source branch
-    if IGNORE_PR_SOURCE_BRANCHES_RAW:
+    if _IGNORE_PR_SOURCE_BRANCH_RES:
         head_ref = str((pr.get("head") or {}).get("ref") or "")
-        for pattern in IGNORE_PR_SOURCE_BRANCHES_RAW:
-            if re.search(pattern, head_ref):
-                return True, f"Source branch '{head_ref}' matches IGNORE_PR_SOURCE_BRANCHES pattern '{pattern}'"
+        for pattern in _IGNORE_PR_SOURCE_BRANCH_RES:
+            if pattern.search(head_ref):
+                return True, f"Source branch '{head_ref}' matches IGNORE_PR_SOURCE_BRANCHES pattern '{pattern.pattern}'"
 
     # Ignore PR by target branch
-    if IGNORE_PR_TARGET_BRANCHES_RAW:
+    if _IGNORE_PR_TARGET_BRANCH_RES:
         base_ref = str((pr.get("base") or {}).get("ref") or "")
-        for pattern in IGNORE_PR_TARGET_BRANCHES_RAW:
-            if re.search(pattern, base_ref):
-                return True, f"Target branch '{base_ref}' matches IGNORE_PR_TARGET_BRANCHES pattern '{pattern}'"
+        for pattern in _IGNORE_PR_TARGET_BRANCH_RES:
+            if pattern.search(base_ref):
+                return True, f"Target branch '{base_ref}' matches IGNORE_PR_TARGET_BRANCHES pattern '{pattern.pattern}'"
 
     return False, ""
 
@@ -421,30 +659,41 @@ def _should_skip_review(
 # Structured verdict derivation
 # ---------------------------------------------------------------------------
 
+# Severity / priority values that count as blocking at each failure threshold.
+_HIGH_SEVERITIES = frozenset({"high"})
+_HIGH_PRIORITIES = frozenset({0})
+_MEDIUM_OR_HIGH_SEVERITIES = frozenset({"high", "medium"})
+_MEDIUM_OR_HIGH_PRIORITIES = frozenset({0, 1})
+
+
 def _derive_conclusion(findings: list[dict[str, Any]], threshold: str | None = None) -> tuple[str, str]:
     """Map review findings to a GitHub Check Run conclusion and a verdict string.
 
     Returns (conclusion, verdict_line) where conclusion is one of:
     success | neutral | failure
     """
-    high_count = 0
-    medium_count = 0
-    for f in findings:
-        priority = int(f.get("priority", 2)) if "priority" in f else -1
-        severity = str(f.get("severity", "")).lower()
-        is_high = priority == 0 or severity == "high"
-        is_medium = priority == 1 or severity == "medium"
-        if is_high:
-            high_count += 1
-        elif is_medium:
-            medium_count += 1
-
     effective_threshold = (threshold or FAILURE_ON_SEVERITY).lower()
+    blocking = False
+    if effective_threshold != "none":
+        if effective_threshold == "medium":
+            blocking_severities, blocking_priorities = _MEDIUM_OR_HIGH_SEVERITIES, _MEDIUM_OR_HIGH_PRIORITIES
+        else:
+            blocking_severities, blocking_priorities = _HIGH_SEVERITIES, _HIGH_PRIORITIES
+        # Stop at the first blocking finding; the rest cannot change the outcome.
+        for f in findings:
+            severity = f.get("severity")
+            if severity in blocking_severities or (
+                isinstance(severity, str) and severity.lower() in blocking_severities
+            ):
+                blocking = True
+                break
+            if "priority" in f and int(f["priority"]) in blocking_priorities:
+                blocking = True
+                break
+
     if effective_threshold == "none":
         conclusion = "neutral"
-    elif effective_threshold == "medium" and (high_count > 0 or medium_count > 0):
-        conclusion = "failure"
-    elif high_count > 0:
+    elif blocking:
         conclusion = "failure"
     else:
         conclusion = "neutral" if findings else "success"
@@ -459,6 +708,25 @@ def _derive_conclusion(findings: list[dict[str, Any]], threshold: str | None = N
     return conclusion, verdict
 
 
+_LEGACY_PATCH_CHAR_LIMIT = 3000
+# Fixed keys plus status/additions/deletions/changes values of one file entry.
+_LEGACY_ENTRY_OVERHEAD_CHARS = 80
+_LEGACY_HARD_RULES = (
+    "Do not output markdown.",
+    "Never include secrets in output.",
+    "Do not suggest patches for sensitive files (.env, secrets, keys, pem, credentials).",
+    "For security findings, provide remediation guidance without copying secret material.",
+)
+_LEGACY_JIRA_RULE = (
+    "Verify code changes align with the linked Jira ticket requirements. "
+    "Flag any discrepancies between the ticket scope and the actual changes."
+)
+_LEGACY_KB_RULE = (
+    "Use the provided org_knowledge_base passages as authoritative coding standards and "
+    "architecture guidance. Flag violations as findings."
+)
+
+
 def _build_prompt(
     pr: dict[str, Any],
     files: list[dict[str, Any]],
@@ -474,37 +742,28 @@ def _build_prompt(
         if not patch:
             continue
 
-        truncated_patch = patch[: min(len(patch), 3000)]
-        entry = {
+        truncated_patch = patch[:_LEGACY_PATCH_CHAR_LIMIT]
+        filename = file_obj.get("filename") or ""
+        # Estimate the serialised entry size rather than json.dumps-ing it.
+        entry_size = len(truncated_patch) + len(filename) + _LEGACY_ENTRY_OVERHEAD_CHARS
+        if entry_size > patch_budget:
+            # Skip just this file; smaller ones later in the list may still fit.
+            continue
+        selected_files.append({
             "filename": file_obj.get("filename"),
             "status": file_obj.get("status"),
             "additions": file_obj.get("additions"),
             "deletions": file_obj.get("deletions"),
             "changes": file_obj.get("changes"),
             "patch": truncated_patch,
-        }
-        candidate = json.dumps(entry)
-        if len(candidate) > patch_budget:
-            break
-        selected_files.append(entry)
-        patch_budget -= len(candidate)
-
-    hard_rules = [
-        "Do not output markdown.",
-        "Never include secrets in output.",
-        "Do not suggest patches for sensitive files (.env, secrets, keys, pem, credentials).",
-        "For security findings, provide remediation guidance without copying secret material.",
-    ]
+        })
+        patch_budget -= entry_size
+
+    hard_rules = list(_LEGACY_HARD_RULES)
     if jira_issues:
-        hard_rules.append(
-            "Verify code changes align with the linked Jira ticket requirements. "
-            "Flag any discrepancies between the ticket scope and the actual changes."
-        )
+        hard_rules.append(_LEGACY_JIRA_RULE)
     if kb_passages:
-        hard_rules.append(
-            "Use the provided org_knowledge_base passages as authoritative coding standards and "
-            "architecture guidance. Flag violations as findings."
-        )
+        hard_rules.append(_LEGACY_KB_RULE)
 
     instruction: dict[str, Any] = {
         "task": "Review this pull request and return only strict JSON that matches the requested schema.",
@@ -545,22 +804,19 @@ def _sanitize_findings(findings: list[Finding]) -> list[Finding]:
     sanitized: list[Finding] = []
     for finding in findings:
         if _is_sensitive_file(finding.file):
-            finding.suggested_patch = None
+            update: dict[str, Any] = {"suggested_patch": None}
             if finding.type == "security":
-                finding.message = (
+                update["message"] = (
                     "Sensitive file detected. Review access controls, rotate any exposed values, and "
                     "store secrets in a secure manager."
                 )
+            finding = finding.model_copy(update=update)
         sanitized.append(finding)
     return sanitized
 
 
 def _format_review_body(result: ReviewResult) -> str:
     """Format a ReviewResult (legacy schema) into a markdown review body."""
-    grouped: dict[str, list[Finding]] = defaultdict(list)
-    for finding in result.findings:
-        grouped[f"{finding.severity}:{finding.type}"].append(finding)
-
     lines = [
         "## AI PR Reviewer Summary",
         "",
@@ -575,9 +831,13 @@ def _format_review_body(result: ReviewResult) -> str:
         lines.append("- No significant issues found.")
         return "\n".join(lines)
 
-    for group_key in sorted(grouped.keys()):
-        lines.append(f"\n### {group_key}")
-        for finding in grouped[group_key]:
+    # Stable sort keeps finding order within each severity:type group.
+    def _group_key(finding: Finding) -> tuple[str, str]:
+        return finding.severity, finding.type
+
+    for (severity, finding_type), group in groupby(sorted(result.findings, key=_group_key), key=_group_key):
+        lines.append(f"\n### {severity}:{finding_type}")
+        for finding in group:
             range_str = ""
             if finding.start_line is not None:
                 if finding.end_line and finding.end_line != finding.start_line:
@@ -591,12 +851,20 @@ def _format_review_body(result: ReviewResult) -> str:
     return "\n".join(lines)
 
 
+def _with_suggested_patch(message: str, suggested_patch: str) -> str:
+    """Append a fenced diff block to an inline comment body in a single join."""
+    return "\n".join((message, "", "Suggested patch:", "```diff", suggested_patch, "```"))
+
+
 def _build_inline_comments(
     findings: list[Finding],
     files_by_name: dict[str, dict[str, Any]],
 ) -> tuple[list[dict[str, Any]], int]:
     comments: list[dict[str, Any]] = []
     unmapped_count = 0
+    sensitive: dict[str, bool] = {}
+    # Findings cluster on a few files: walk each patch once, then look lines up.
+    position_indexes: dict[str, dict[int, int]] = {}
 
     for finding in findings:
         if finding.start_line is None:
@@ -610,14 +878,18 @@ def _build_inline_comments(
         if not patch:
             continue
 
-        position = map_new_line_to_diff_position(patch, finding.start_line)
+        if finding.file not in position_indexes:
+            position_indexes[finding.file] = build_line_to_position_index(patch)
+        position = position_indexes[finding.file].get(finding.start_line)
         if position is None:
             unmapped_count += 1
             continue
 
         body = finding.message
-        if finding.suggested_patch and not _is_sensitive_file(finding.file):
-            body = f"{body}\n\nSuggested patch:\n```diff\n{finding.suggested_patch}\n```"
+        if finding.file not in sensitive:
+            sensitive[finding.file] = _is_sensitive_file(finding.file)
+        if finding.suggested_patch and not sensitive[finding.file]:
+            body = _with_suggested_patch(body, finding.suggested_patch)
 
         comments.append(
             {
@@ -645,10 +917,6 @@ def _select_inline_comments(
     return comments
 
 
-def _autopr_enabled() -> bool:
-    return os.getenv("AUTO_PR_ENABLED", "false").lower() == "true"
-
-
 def _build_autopr_changes(
     gh: GitHubClient,
     owner: str,
@@ -657,34 +925,75 @@ def _build_autopr_changes(
     findings: list[Finding],
 ) -> list[tuple[str, str, str]]:
     """Build a list of (path, old_sha, updated_content) changes for safe fixable findings."""
-    updates: list[tuple[str, str, str]] = []
-    updated_files: set[str] = set()
-
+    # Every suggested patch per file, in finding order; later ones are fallbacks
+    # for when an earlier patch no longer applies.
+    patches_by_file: dict[str, list[str]] = {}
     for finding in findings:
-        if not finding.suggested_patch:
-            continue
-        if _is_sensitive_file(finding.file):
-            continue
-        if finding.file in updated_files:
-            continue
-        if len(updates) >= AUTO_PR_MAX_FILES:
-            break
+        if finding.suggested_patch and not _is_sensitive_file(finding.file):
+            patches_by_file.setdefault(finding.file, []).append(finding.suggested_patch)
 
+    def _fetch(path: str) -> tuple[str, str] | None:
         try:
-            original_content, sha = gh.get_file_contents(owner, repo, finding.file, head_ref)
-            updated_content = apply_unified_patch(original_content, finding.suggested_patch)
-        except (PatchApplyError, ValueError):
-            continue
-
-        if updated_content == original_content:
-            continue
+            return gh.get_file_contents(owner, repo, path, head_ref)
+        except ValueError:
+            return None
 
-        updates.append((finding.file, sha, updated_content))
-        updated_files.add(finding.file)
+    updates: list[tuple[str, str, str]] = []
+    pending = iter(patches_by_file)
+    while len(updates) < AUTO_PR_MAX_FILES:
+        wave = list(islice(pending, AUTO_PR_MAX_FILES - len(updates)))
+        if not wave:
+            break
+        # Independent GitHub reads: fetch the wave concurrently, then patch in order.
+        for path, fetched in zip(wave, _io_pool().map(_fetch, wave)):
+            if fetched is None:
+                continue
+            original_content, sha = fetched
+            for patch in patches_by_file[path]:
+                try:
+                    updated_content = apply_unified_patch(original_content, patch)
+                except (PatchApplyError, ValueError):
+                    continue
+                if updated_content != original_content:
+                    updates.append((path, sha, updated_content))
+                    break
 
     return updates
 
 
+# 2-stage priority (0 = most urgent) to legacy Finding severity; other values map to "low".
+_PRIO2SEV = ("high", "medium", "low")
+
+
+def _adapt_fixable_findings(findings: list[dict[str, Any]]) -> list[Finding]:
+    """Convert 2-stage findings carrying a suggested patch into legacy Findings.
+
+    Findings that fail Finding validation are dropped individually.
+    """
+    adapted: list[Finding] = []
+    for f in findings:
+        if not f.get("suggested_patch"):
+            continue
+        try:
+            # int() accepts JSON floats (1.0) and numeric strings; anything else is "low".
+            priority = int(f.get("priority", 2))
+        except (TypeError, ValueError):
+            priority = 2
+        try:
+            adapted.append(Finding(
+                type=f.get("type", "bug"),
+                severity=_PRIO2SEV[priority if priority in (0, 1) else 2],
+                file=f.get("file", ""),
+                start_line=f.get("start_line"),
+                end_line=f.get("end_line"),
+                message=f.get("message", ""),
+                suggested_patch=f["suggested_patch"],
+            ))
+        except Exception:  # noqa: BLE001
+            pass
+    return adapted
+
+
 def _create_autofix_pr(
     gh: GitHubClient,
     owner: str,
@@ -694,7 +1003,7 @@ def _create_autofix_pr(
     local_logger,
     dry_run: bool,
 ) -> None:
-    if not _autopr_enabled():
+    if not AUTO_PR_ENABLED:
         return
 
     head = pr.get("head") or {}
@@ -799,8 +1108,70 @@ def _enqueue_test_gen(
         local_logger.warning("test_gen_enqueue_failed", extra={"extra": {"pr_number": pr_number}})
 
 
+def _github_auth() -> GitHubAppAuth:
+    """The worker's App auth, shared by every record of the container."""
+    return cached_github_app_auth(
+        app_ids_secret_arn=os.environ["GITHUB_APP_IDS_SECRET_ARN"],
+        private_key_secret_arn=os.environ["GITHUB_APP_PRIVATE_KEY_SECRET_ARN"],
+        api_base=GITHUB_API_BASE,
+    )
+
+
+def _jira_pool() -> ThreadPoolExecutor:
+    global _jira_pool_cached  # noqa: PLW0603
+    if _jira_pool_cached is None:
+        with _pool_init_lock:
+            if _jira_pool_cached is None:
+                _jira_pool_cached = ThreadPoolExecutor(max_workers=5, thread_name_prefix="jira-io")
+    return _jira_pool_cached
+
+
+def _io_pool() -> ThreadPoolExecutor:
+    global _io_pool_cached  # noqa: PLW0603
+    if _io_pool_cached is None:
+        with _pool_init_lock:
+            if _io_pool_cached is None:
+                # Shared by every record of a batch now that records run concurrently.
+                _io_pool_cached = ThreadPoolExecutor(max_workers=16, thread_name_prefix="github-io")
+    return _io_pool_cached
+
+
+def _build_bedrock_client() -> BedrockReviewClient:
+    """Construct the review client; safe to run on a pool thread.
+
+    boto3's default session is not thread-safe for client creation, so the
+    runtime clients come from a session owned by this call.
+    """
+    region = os.getenv("AWS_REGION", DEFAULT_REGION)
+    session = boto3.session.Session()
+    return BedrockReviewClient(
+        region=region,
+        model_id=os.environ["BEDROCK_MODEL_ID"],
+        agent_id=os.getenv("BEDROCK_AGENT_ID") or None,
+        agent_alias_id=os.getenv("BEDROCK_AGENT_ALIAS_ID") or None,
+        guardrail_identifier=os.getenv("BEDROCK_GUARDRAIL_ID") or None,
+        guardrail_version=os.getenv("BEDROCK_GUARDRAIL_VERSION") or None,
+        guardrail_trace=os.getenv("BEDROCK_GUARDRAIL_TRACE") or None,
+        agent_runtime=session.client("bedrock-agent-runtime", region_name=region),
+        bedrock_runtime=session.client("bedrock-runtime", region_name=region),
+    )
+
+
+def _bedrock_client() -> BedrockReviewClient:
+    """Return the container-wide review client, building it on first use.
+
+    botocore clients are thread-safe, so every record shares this one.
+    """
+    global _bedrock_client_cached  # noqa: PLW0603
+    if _bedrock_client_cached is None:
+        with _bedrock_client_lock:
+            if _bedrock_client_cached is None:
+                _bedrock_client_cached = _build_bedrock_client()
+    return _bedrock_client_cached
+
+
 def _now_iso() -> str:
-    return datetime.datetime.utcnow().strftime("%Y-%m-%dT%H:%M:%SZ")
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
 
 @contextlib.contextmanager
@@ -839,22 +1210,34 @@ def _process_record(record: dict[str, Any]) -> None:
 
     owner, repo = repo_full_name.split("/", maxsplit=1)
 
-    auth = GitHubAppAuth(
-        app_ids_secret_arn=os.environ["GITHUB_APP_IDS_SECRET_ARN"],
-        private_key_secret_arn=os.environ["GITHUB_APP_PRIVATE_KEY_SECRET_ARN"],
-        api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"),
-    )
+    # On a cold container build the Bedrock clients, and read the incremental-review
+    # state when it will be needed, while the GitHub calls below are in flight.
+    bedrock_future = _io_pool().submit(_bedrock_client) if _bedrock_client_cached is None else None
+    trigger = message.get("trigger", "auto")
+    event_action = message.get("event_action", "")
+    last_sha_future = None
+    if (
+        INCREMENTAL_REVIEW_ENABLED
+        and trigger != "manual"
+        and event_action == "synchronize"
+        and PR_REVIEW_STATE_TABLE
+    ):
+        last_sha_future = _io_pool().submit(_get_last_reviewed_sha, repo_full_name, pr_number)
 
-    token = auth.get_installation_token(
+    token = _github_auth().get_installation_token(
         installation_id_override=str(installation_id) if installation_id else None
     )
-    gh = GitHubClient(token_provider=lambda: token, api_base=os.getenv("GITHUB_API_BASE", "https://api.github.com"))
+    gh = GitHubClient(token_provider=lambda: token, api_base=GITHUB_API_BASE)
 
+    # The file list is needed for every review that isn't skipped; fetch it
+    # alongside the PR metadata instead of after it.
+    files_future = _io_pool().submit(gh.get_pull_request_files, owner, repo, pr_number)
     pr = gh.get_pull_request(owner, repo, pr_number)
 
     # -- Per-repo config override (.ai-reviewer.yml) --------------------------
-    head_ref = (pr.get("head") or {}).get("ref") or head_sha
-    repo_cfg = _load_repo_config(gh, owner, repo, head_ref)
+    # Read the config at the commit under review: exact, and safe to cache.
+    config_ref = head_sha or (pr.get("head") or {}).get("ref") or ""
+    repo_cfg = _load_repo_config(gh, owner, repo, config_ref)
     if repo_cfg:
         local_logger.info("repo_config_loaded", extra={"extra": {"keys": list(repo_cfg.keys())}})
 
@@ -864,7 +1247,7 @@ def _process_record(record: dict[str, Any]) -> None:
             return default
         return val.lower() not in {"false", "0", "no", "off"}
 
-    dry_run = os.getenv("DRY_RUN", "false").lower() == "true"
+    dry_run = DRY_RUN
     effective_skip_draft = _cfg_bool("skip_draft_prs", SKIP_DRAFT_PRS)
     effective_post_comment = _cfg_bool("post_review_comment", POST_REVIEW_COMMENT)
     effective_failure_on_severity = repo_cfg.get("failure_on_severity", FAILURE_ON_SEVERITY)
@@ -873,12 +1256,18 @@ def _process_record(record: dict[str, Any]) -> None:
     effective_require_tests = _cfg_bool("require_tests_review", REQUIRE_TESTS_REVIEW)
     _num_max_raw = repo_cfg.get("num_max_findings")
     effective_num_max_findings = int(_num_max_raw) if _num_max_raw and _num_max_raw.isdigit() else NUM_MAX_FINDINGS
+    # Finding filters applied in one pass to whichever review path runs.
+    dropped_finding_types = frozenset(
+        finding_type
+        for finding_type, required in (("security", effective_require_security), ("tests", effective_require_tests))
+        if not required
+    )
+    max_findings = effective_num_max_findings if effective_num_max_findings > 0 else None
 
     # -- Skip filters (pr-agent style) ----------------------------------------
-    trigger = message.get("trigger", "auto")
     should_skip, skip_reason = _should_skip_review(
         pr,
-        event_action=message.get("event_action", ""),
+        event_action=event_action,
         trigger=trigger,
         skip_draft_prs_override=effective_skip_draft,
     )
@@ -897,26 +1286,52 @@ def _process_record(record: dict[str, Any]) -> None:
         return
 
     # -- Determine review scope: full vs incremental ---------------------------
-    event_action = message.get("event_action", "")
     is_incremental = False
     incremental_base_sha: str | None = None
 
-    if (
-        INCREMENTAL_REVIEW_ENABLED
-        and trigger != "manual"
-        and event_action == "synchronize"
-        and PR_REVIEW_STATE_TABLE
-    ):
-        incremental_base_sha = _get_last_reviewed_sha(repo_full_name, pr_number)
+    if last_sha_future is not None:
+        incremental_base_sha = last_sha_future.result()
         if incremental_base_sha and incremental_base_sha != head_sha:
             is_incremental = True
             local_logger.info("incremental_review_mode", extra={"extra": {"base_sha": incremental_base_sha, "head_sha": head_sha}})
 
-    files = gh.get_pull_request_files(owner, repo, pr_number)
-
+    # -- Context fetches: incremental diff, Jira, KB ---------------------------
+    # Independent round-trips: start them together so they overlap each other
+    # and the check-run create below.
+    compare_future = None
     if is_incremental and incremental_base_sha:
+        compare_future = _io_pool().submit(gh.compare_commits, owner, repo, incremental_base_sha, head_sha)
+
+    jira_future = None
+    atlassian_secret_arn = ATLASSIAN_CREDENTIALS_SECRET_ARN
+    if atlassian_secret_arn:
+        jira_keys = _extract_jira_keys(pr)
+        if jira_keys:
+            local_logger.info("jira_keys_detected", extra={"extra": {"keys": jira_keys}})
+            jira_future = _io_pool().submit(_fetch_jira_context, jira_keys, atlassian_secret_arn)
+
+    # Org standards, architecture docs, etc.
+    kb_future = None
+    if BEDROCK_KB_REVIEW_ENABLED:
+        kb_id = BEDROCK_KNOWLEDGE_BASE_ID
+        if kb_id:
+            pr_title = pr.get("title") or ""
+            pr_body = (pr.get("body") or "")[:500]
+            kb_query = f"{pr_title}\n{pr_body}".strip()
+            kb_future = _io_pool().submit(
+                _fetch_kb_context,
+                query=kb_query,
+                region=AWS_REGION,
+                knowledge_base_id=kb_id,
+                top_k=BEDROCK_KB_REVIEW_TOP_K,
+                max_chars=BEDROCK_KB_REVIEW_MAX_CHARS,
+            )
+
+    files = files_future.result()
+
+    if compare_future is not None:
         try:
-            comparison = gh.compare_commits(owner, repo, incremental_base_sha, head_sha)
+            comparison = compare_future.result()
             incremental_files = comparison.get("files") or []
             if incremental_files:
                 files = incremental_files
@@ -945,51 +1360,23 @@ def _process_record(record: dict[str, Any]) -> None:
         except Exception:  # noqa: BLE001
             local_logger.warning("check_run_create_failed")
 
-    # -- Jira context ---------------------------------------------------------
-    jira_issues: list[dict[str, Any]] = []
-    atlassian_secret_arn = os.getenv("ATLASSIAN_CREDENTIALS_SECRET_ARN", "")
-    if atlassian_secret_arn:
-        jira_keys = _extract_jira_keys(pr)
-        if jira_keys:
-            local_logger.info("jira_keys_detected", extra={"extra": {"keys": jira_keys}})
-            jira_issues = _fetch_jira_context(jira_keys, atlassian_secret_arn)
-
-    # -- KB context (org standards, architecture docs, etc.) ------------------
-    kb_passages: list[dict[str, Any]] = []
-    if BEDROCK_KB_REVIEW_ENABLED:
-        kb_id = os.getenv("BEDROCK_KNOWLEDGE_BASE_ID", "")
-        if kb_id:
-            pr_title = pr.get("title") or ""
-            pr_body = (pr.get("body") or "")[:500]
-            kb_query = f"{pr_title}\n{pr_body}".strip()
-            kb_passages = _fetch_kb_context(
-                query=kb_query,
-                region=os.getenv("AWS_REGION", DEFAULT_REGION),
-                knowledge_base_id=kb_id,
-                top_k=BEDROCK_KB_REVIEW_TOP_K,
-                max_chars=BEDROCK_KB_REVIEW_MAX_CHARS,
-            )
-            if kb_passages:
-                local_logger.info("kb_context_fetched", extra={"extra": {"passages": len(kb_passages)}})
+    jira_issues: list[dict[str, Any]] = jira_future.result() if jira_future is not None else []
+    kb_passages: list[dict[str, Any]] = kb_future.result() if kb_future is not None else []
+    if kb_passages:
+        local_logger.info("kb_context_fetched", extra={"extra": {"passages": len(kb_passages)}})
 
     # -- Run 2-stage Bedrock review -------------------------------------------
-    bedrock = BedrockReviewClient(
-        region=os.getenv("AWS_REGION", DEFAULT_REGION),
-        model_id=os.environ["BEDROCK_MODEL_ID"],
-        agent_id=os.getenv("BEDROCK_AGENT_ID") or None,
-        agent_alias_id=os.getenv("BEDROCK_AGENT_ALIAS_ID") or None,
-        guardrail_identifier=os.getenv("BEDROCK_GUARDRAIL_ID") or None,
-        guardrail_version=os.getenv("BEDROCK_GUARDRAIL_VERSION") or None,
-        guardrail_trace=os.getenv("BEDROCK_GUARDRAIL_TRACE") or None,
-    )
+    bedrock = bedrock_future.result() if bedrock_future is not None else _bedrock_client()
 
-    model_light = BEDROCK_MODEL_LIGHT or os.environ.get("BEDROCK_MODEL_ID", "")
-    model_heavy = BEDROCK_MODEL_HEAVY or os.environ.get("BEDROCK_MODEL_ID", "")
+    model_light = BEDROCK_MODEL_LIGHT or BEDROCK_MODEL_ID
+    model_heavy = BEDROCK_MODEL_HEAVY or BEDROCK_MODEL_ID
 
     two_stage_enabled = bool(BEDROCK_MODEL_LIGHT and BEDROCK_MODEL_HEAVY)
     review_dict: dict[str, Any] | None = None
     total_input_tokens: int = 0
     total_output_tokens: int = 0
+    # Patch lookup for inline comments, shared by the 2-stage and legacy renderers.
+    files_by_name = {f["filename"]: f for f in files if f.get("filename")}
 
     try:
         context, reviewed_files, skipped_files = build_pr_context(
@@ -997,16 +1384,40 @@ def _process_record(record: dict[str, Any]) -> None:
         )
 
         if two_stage_enabled:
-            local_logger.info("two_stage_review_start")
-            plan, in_tok_p, out_tok_p = bedrock.invoke_planner(context, model_id=model_light)
-            total_input_tokens += in_tok_p
-            total_output_tokens += out_tok_p
-            local_logger.info("planner_complete", extra={"extra": {"risk": plan.get("overall_risk_estimate"), "input_tokens": in_tok_p, "output_tokens": out_tok_p}})
-            review_dict, in_tok_r, out_tok_r = bedrock.invoke_reviewer(context, plan, model_id=model_heavy)
-            total_input_tokens += in_tok_r
-            total_output_tokens += out_tok_r
-            local_logger.info("reviewer_complete", extra={"extra": {"risk": review_dict.get("overall_risk"), "input_tokens": in_tok_r, "output_tokens": out_tok_r}})
-            local_logger.info("token_usage", extra={"extra": {"total_input": total_input_tokens, "total_output": total_output_tokens}})
+            cache_key = _review_cache_key(context, model_light, model_heavy) if REVIEW_CACHE_ENABLED else ""
+            # Manual triggers ask for a fresh review; they still refresh the cache.
+            if cache_key and trigger != "manual":
+                review_dict = _get_cached_review(cache_key)
+                # Hit and miss counts together give the cache hit rate.
+                _emit_metric("review_cache_hit" if review_dict is not None else "review_cache_miss", 1)
+            if review_dict is not None:
+                local_logger.info("review_cache_hit")
+            else:
+                local_logger.info("two_stage_review_start")
+                # Both stages embed the same context; serialise it once.
+                context_json = json.dumps(context, indent=2)
+                total_delta = sum((f.get("additions") or 0) + (f.get("deletions") or 0) for f in files)
+                if total_delta < TWO_STAGE_MIN_DELTA:
+                    # Too small for triage to pay off: review every file directly.
+                    plan = _small_pr_plan(reviewed_files)
+                    local_logger.info("planner_skipped_small_pr", extra={"extra": {"total_delta": total_delta}})
+                    _emit_metric("two_stage_skipped_small_pr", 1)
+                else:
+                    plan, in_tok_p, out_tok_p = bedrock.invoke_planner(
+                        context, model_id=model_light, context_json=context_json
+                    )
+                    total_input_tokens += in_tok_p
+                    total_output_tokens += out_tok_p
+                    local_logger.info("planner_complete", extra={"extra": {"risk": plan.get("overall_risk_estimate"), "input_tokens": in_tok_p, "output_tokens": out_tok_p}})
+                review_dict, in_tok_r, out_tok_r = bedrock.invoke_reviewer(
+                    context, plan, model_id=model_heavy, context_json=context_json
+                )
+                total_input_tokens += in_tok_r
+                total_output_tokens += out_tok_r
+                local_logger.info("reviewer_complete", extra={"extra": {"risk": review_dict.get("overall_risk"), "input_tokens": in_tok_r, "output_tokens": out_tok_r}})
+                local_logger.info("token_usage", extra={"extra": {"total_input": total_input_tokens, "total_output": total_output_tokens}})
+                if cache_key and not dry_run:
+                    _put_cached_review(cache_key, review_dict)
 
             # Inject file lists into review for rendering
             if "files_reviewed" not in review_dict or not review_dict["files_reviewed"]:
@@ -1015,14 +1426,10 @@ def _process_record(record: dict[str, Any]) -> None:
                 review_dict["files_skipped"] = skipped_files
 
             # -- Config knob filters -----------------------------------------
-            findings_list: list[dict[str, Any]] = list(review_dict.get("findings") or [])
-            if not effective_require_security:
-                findings_list = [f for f in findings_list if f.get("type") != "security"]
-            if not effective_require_tests:
-                findings_list = [f for f in findings_list if f.get("type") != "tests"]
-            if effective_num_max_findings > 0:
-                findings_list = findings_list[:effective_num_max_findings]
-            review_dict["findings"] = findings_list
+            review_dict["findings"] = list(islice(
+                (f for f in review_dict.get("findings") or [] if f.get("type") not in dropped_finding_types),
+                max_findings,
+            ))
 
     except Exception as exc:  # noqa: BLE001
         local_logger.exception("two_stage_review_failed", extra={"extra": {"error": str(exc)}})
@@ -1034,24 +1441,19 @@ def _process_record(record: dict[str, Any]) -> None:
         prompt = _build_prompt(pr, files, jira_issues=jira_issues or None, kb_passages=kb_passages or None)
         legacy_parsed, leg_in_tok, leg_out_tok = bedrock.analyze_pr(prompt)
         legacy_result = parse_review_result(legacy_parsed)
-        legacy_result.findings = _sanitize_findings(legacy_result.findings)
+        legacy_result = legacy_result.model_copy(update={"findings": _sanitize_findings(legacy_result.findings)})
         total_input_tokens += leg_in_tok
         total_output_tokens += leg_out_tok
         if total_input_tokens or total_output_tokens:
             local_logger.info("token_usage", extra={"extra": {"total_input": total_input_tokens, "total_output": total_output_tokens}})
 
         # Apply the same per-repo filter knobs as the 2-stage path
-        legacy_filtered = list(legacy_result.findings)
-        if not effective_require_security:
-            legacy_filtered = [f for f in legacy_filtered if f.type != "security"]
-        if not effective_require_tests:
-            legacy_filtered = [f for f in legacy_filtered if f.type != "tests"]
-        if effective_num_max_findings > 0:
-            legacy_filtered = legacy_filtered[:effective_num_max_findings]
-        legacy_result.findings = legacy_filtered
+        legacy_filtered = list(islice(
+            (f for f in legacy_result.findings if f.type not in dropped_finding_types), max_findings
+        ))
+        legacy_result = legacy_result.model_copy(update={"findings": legacy_filtered})
 
         body = _format_review_body(legacy_result)
-        files_by_name = {f.get("filename"): f for f in files}
         inline_comments = _select_inline_comments(legacy_result.findings, files_by_name, effective_review_comment_mode)
 
         legacy_findings_dicts = [
@@ -1136,9 +1538,10 @@ def _process_record(record: dict[str, Any]) -> None:
     incremental_prefix = "[Incremental] " if is_incremental else ""
 
     # Build inline comments from 2-stage findings
-    files_by_name = {f.get("filename"): f for f in files}
     inline_comments_2stage: list[dict[str, Any]] = []
     _2stage_unmapped = 0
+    position_indexes: dict[str, dict[int, int]] = {}
+    sensitive: dict[str, bool] = {}
     for finding in (review_dict.get("findings") or []):
         file_data = files_by_name.get(finding.get("file", ""))
         if not file_data:
@@ -1146,15 +1549,19 @@ def _process_record(record: dict[str, Any]) -> None:
         patch = file_data.get("patch")
         if not patch or finding.get("start_line") is None:
             continue
-        if _is_sensitive_file(finding.get("file", "")):
+        if finding["file"] not in sensitive:
+            sensitive[finding["file"]] = _is_sensitive_file(finding["file"])
+        if sensitive[finding["file"]]:
             continue
-        position = map_new_line_to_diff_position(patch, finding["start_line"])
+        if finding["file"] not in position_indexes:
+            position_indexes[finding["file"]] = build_line_to_position_index(patch)
+        position = position_indexes[finding["file"]].get(finding["start_line"])
         if position is None:
             _2stage_unmapped += 1
             continue
         comment_body = finding.get("message", "")
         if finding.get("suggested_patch"):
-            comment_body += f"\n\nSuggested patch:\n```diff\n{finding['suggested_patch']}\n```"
+            comment_body = _with_suggested_patch(comment_body, finding["suggested_patch"])
         inline_comments_2stage.append({
             "path": finding["file"],
             "position": position,
@@ -1225,21 +1632,8 @@ def _process_record(record: dict[str, Any]) -> None:
         _emit_metric("bedrock_output_tokens", total_output_tokens)
 
     # Adapt review_dict findings to Finding objects for autofix/test-gen
-    adapted_findings: list[Finding] = []
-    for f in (review_dict.get("findings") or []):
-        try:
-            adapted_findings.append(Finding(
-                type=f.get("type", "bug"),
-                severity="high" if f.get("priority", 2) == 0 else ("medium" if f.get("priority", 2) == 1 else "low"),
-                file=f.get("file", ""),
-                start_line=f.get("start_line"),
-                end_line=f.get("end_line"),
-                message=f.get("message", ""),
-                suggested_patch=f.get("suggested_patch"),
-            ))
-        except Exception:  # noqa: BLE001
-            pass
-
+    # Only the auto-fix PR consumes adapted findings, and only those with a patch.
+    adapted_findings = _adapt_fixable_findings(review_dict.get("findings") or []) if AUTO_PR_ENABLED else []
     _create_autofix_pr(gh=gh, owner=owner, repo=repo, pr=pr,
                        findings=adapted_findings, local_logger=local_logger, dry_run=dry_run)
     _enqueue_test_gen(repo_full_name, pr_number, head_sha, pr, local_logger)
@@ -1258,16 +1652,61 @@ def _process_record(record: dict[str, Any]) -> None:
     _emit_metric("duration_ms", duration_ms, unit="Milliseconds")
 
 
-def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
-    failures: list[dict[str, str]] = []
+def _process_record_group(records: list[dict[str, Any]]) -> list[str]:
+    """Process *records* in order; return the message ids to report as failed.
 
-    for record in event.get("Records", []):
+    After the first failure the rest of the group is left unprocessed and
+    reported too, so SQS redelivers it in order (FIFO partial-batch rule).
+    """
+    for index, record in enumerate(records):
         message_id = record.get("messageId", "unknown")
         try:
             _process_record(record)
         except Exception:  # noqa: BLE001
             logger.exception("record_processing_failed", extra={"message_id": message_id})
             _emit_metric("reviews_failed", 1)
-            failures.append({"itemIdentifier": message_id})
+            return [message_id] + [r.get("messageId", "unknown") for r in records[index + 1:]]
+    return []
+
+
+def _record_groups(records: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    """Split a batch into runs that must be processed in order.
 
-    return {"batchItemFailures": failures}
\ No newline at end of file
+    Records from a FIFO queue keep their MessageGroupId (one per PR) order;
+    standard-queue records carry no ordering and each run alone.
+    """
+    groups: dict[tuple[str, Any], list[dict[str, Any]]] = {}
+    for index, record in enumerate(records):
+        if str(record.get("eventSourceARN", "")).endswith(".fifo"):
+            key: tuple[str, Any] = ("group", (record.get("attributes") or {}).get("MessageGroupId", ""))
+        else:
+            key = ("record", index)
+        groups.setdefault(key, []).append(record)
+    return list(groups.values())
+
+
+def lambda_handler(event: dict[str, Any], _context: Any) -> dict[str, Any]:
+    global _metric_buffer  # noqa: PLW0603
+    records = event.get("Records", [])
+    groups = _record_groups(records)
+
+    _metric_buffer = []
+    try:
+        # Independent runs spend their time waiting on GitHub and Bedrock, so
+        # they are processed concurrently; records within a run stay sequential.
+        if len(groups) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(RECORD_CONCURRENCY, len(groups)), thread_name_prefix="sqs-record"
+            ) as pool:
+                failed = {message_id for ids in pool.map(_process_record_group, groups) for message_id in ids}
+        else:
+            failed = {message_id for group in groups for message_id in _process_record_group(group)}
+    finally:
+        _flush_metrics()
+
+    # Report failures in batch order.
+    return {"batchItemFailures": [
+        {"itemIdentifier": message_id}
+        for record in records
+        if (message_id := record.get("messageId", "unknown")) in failed
+    ]}
\ No newline at end of file
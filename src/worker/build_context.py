@@ -10,6 +10,7 @@ from __future__ import annotations
 
 import fnmatch
 import os
+import re
 from typing import Any
 
 DEFAULT_SKIP_PATTERNS = [
@@ -68,19 +69,30 @@ def _load_skip_patterns() -> list[str]:
     return DEFAULT_SKIP_PATTERNS + extra
 
 
-def _matches_any(path: str, patterns: list[str]) -> bool:
-    lower = path.lower()
+def _compile_patterns(patterns: list[str]) -> re.Pattern[str]:
+    """Fold glob/substring *patterns* into one regex to ``match`` lower-cased paths.
+
+    Each pattern matches as a case-insensitive glob over the whole path;
+    patterns without ``*`` also match as a plain substring.
+    """
+    alternatives: list[str] = []
     for pattern in patterns:
-        if fnmatch.fnmatch(lower, pattern.lower()):
-            return True
-        # Also check plain substring for patterns without wildcards
-        if "*" not in pattern and pattern.lower() in lower:
-            return True
-    return False
+        lower = pattern.lower()
+        alternatives.append(fnmatch.translate(lower))
+        if "*" not in pattern:
+            alternatives.append(f"(?s:.*{re.escape(lower)})")
+    return re.compile("|".join(alternatives) if alternatives else "(?!)")
+
+
+def _matches_any(path: str, patterns: list[str]) -> bool:
+    return _compile_patterns(patterns).match(path.lower()) is not None
+
+
+_SENSITIVE_RE = _compile_patterns(SENSITIVE_PATTERNS)
 
 
 def _is_sensitive(path: str) -> bool:
-    return _matches_any(path, SENSITIVE_PATTERNS)
+    return _SENSITIVE_RE.match(path.lower()) is not None
 
 
 def build_pr_context(
@@ -101,6 +113,7 @@ def build_pr_context(
     effective_max_files = max_files if max_files is not None else MAX_REVIEW_FILES
     effective_max_diff = max_diff_bytes if max_diff_bytes is not None else MAX_DIFF_BYTES
     large_patch_policy = LARGE_PATCH_POLICY
+    skip_re = _compile_patterns(patterns)
     # 0 means unlimited total budget
     total_diff_budget = MAX_TOTAL_DIFF_BYTES if MAX_TOTAL_DIFF_BYTES > 0 else float("inf")
 
@@ -120,7 +133,7 @@ def build_pr_context(
             skipped_files.append(f"{filename} — sensitive file")
             continue
 
-        if _matches_any(filename, patterns):
+        if skip_re.match(filename.lower()):
             skipped_files.append(f"{filename} — matches skip pattern")
             continue
 
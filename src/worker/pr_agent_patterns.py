@@ -6,15 +6,33 @@ No external dependencies - integrates with existing bedrock_client.py.
 """
 
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Callable, List, Dict, Any, Optional
 from dataclasses import dataclass
 
 logger = logging.getLogger(__name__)
 
+# Characters per token for the default estimator.
+CHARS_PER_TOKEN = 4
 
-@dataclass
+# Stands in for dropped hunks when a patch is truncated; a long run of '='
+# is one or two tokens in common BPE vocabularies.
+HUNK_ELISION = '=' * 80 + '\n...[{n} hunks elided]...'
+
+# Splits a unified diff before each hunk header
+_HUNK_SPLIT_RE = re.compile(r'\n(?=@@ )')
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars per token); used when no tokenizer is supplied."""
+    return len(text) // CHARS_PER_TOKEN
+
+
+@dataclass(slots=True)
 class FileScore:
-    """Scoring for PR file prioritization."""
+    """Scoring for PR file prioritization (slotted: one is built per PR file)."""
     filename: str
     score: float
     changes: int
@@ -68,14 +86,67 @@ class PRFileCompressor:
         '.yaml', '.yml', '.toml', '.tf', '.hcl'
     }
     
-    def __init__(self, max_tokens: int = 32000):
+    # Scoring tables (see score_file for the rationale behind each weight)
+    STATUS_SCORES = {'modified': 10.0, 'added': 7.0, 'removed': 2.0}
+    EXTENSION_BONUS = {
+        '.py': 5.0,
+        '.js': 4.0, '.ts': 4.0, '.tsx': 4.0, '.jsx': 4.0,
+        '.yaml': 3.0, '.yml': 3.0,
+        '.tf': 4.0,
+    }
+    SECURITY_PATTERNS = ('auth', 'security', 'secrets', 'credentials', 'password')
+    
+    def __init__(
+        self,
+        max_tokens: int = 32000,
+        token_counter: Optional[Callable[[str], int]] = None,
+        drop_context: bool = False,
+        batch_token_counter: Optional[Callable[[List[str]], List[int]]] = None
+    ):
         """
         Initialize compressor.
         
         Args:
             max_tokens: Maximum tokens to use for all files combined
+            token_counter: Returns the token count of a patch; defaults to
+                estimate_tokens. Plug in the model's tokenizer for exact budgets.
+            drop_context: Strip unchanged context lines from patches (see
+                densify_patch) before they are counted and packed
+            batch_token_counter: Optional list-in/list-out counter (e.g. a
+                tokenizer's encode_batch) used to count every uncached patch
+                of a PR in one call instead of one call per file
         """
         self.max_tokens = max_tokens
+        self.drop_context = drop_context
+        self._token_counter = token_counter or estimate_tokens
+        # patch text -> token count, so re-scoring the same patch never re-tokenizes
+        self._token_cache: Dict[str, int] = {}
+        self._batch_token_counter = batch_token_counter
+        # One regex scan / one endswith call per filename instead of a Python
+        # loop over every pattern (longest first so alternation order is moot)
+        self._skip_re = re.compile('|'.join(
+            re.escape(p) for p in sorted(self.SKIP_PATTERNS, key=len, reverse=True)
+        ))
+        self._code_extensions = tuple(self.CODE_EXTENSIONS)
+        # Whole-filename entries (lock files, changelogs): one set lookup on
+        # the basename rejects them before the regex scan
+        self._skip_basenames = frozenset(
+            p.lower() for p in self.SKIP_PATTERNS
+            if '/' not in p and p[0] not in '.-' and '.' in p
+        )
+    
+    def count_tokens(self, text: str) -> int:
+        """Token count of *text* using the configured counter (memoized per text)."""
+        cached = self._token_cache.get(text)
+        if cached is None:
+            cached = self._token_cache[text] = self._token_counter(text)
+        return cached
+    
+    def _prime_token_cache(self, texts: List[str]) -> None:
+        """Count all not-yet-cached *texts* with one batch_token_counter call."""
+        missing = list(dict.fromkeys(t for t in texts if t not in self._token_cache))
+        if missing:
+            self._token_cache.update(zip(missing, self._batch_token_counter(missing)))
     
     def should_review_file(self, filename: str) -> bool:
         """
@@ -87,15 +158,15 @@ class PRFileCompressor:
         Returns:
             True if file should be reviewed
         """
-        filename_lower = filename.lower()
-        
         # Skip if matches any skip pattern
-        if any(pattern in filename_lower for pattern in self.SKIP_PATTERNS):
+        filename_lower = filename.lower()
+        if (filename_lower.rpartition('/')[2] in self._skip_basenames
+                or self._skip_re.search(filename_lower)):
             logger.debug(f"Skipping {filename}: matches skip pattern")
             return False
         
         # Must have code extension
-        if not any(filename.endswith(ext) for ext in self.CODE_EXTENSIONS):
+        if not filename.endswith(self._code_extensions):
             logger.debug(f"Skipping {filename}: not a code file")
             return False
         
@@ -117,61 +188,68 @@ class PRFileCompressor:
         Returns:
             FileScore object
         """
-        filename = file_data['filename']
-        status = file_data.get('status', 'modified')
-        changes = file_data.get('changes', 0)
-        patch = file_data.get('patch', '')
-        
-        score = 0.0
-        
-        # 1. Prioritize by change type
-        if status == 'modified':
-            score += 10.0  # Modified files most important
-        elif status == 'added':
-            score += 7.0   # New files important but less than modifications
-        elif status == 'removed':
-            score += 2.0   # Deletions less important
-        
-        # 2. Prioritize by file type
-        if filename.endswith('.py'):
-            score += 5.0  # Python (our main language)
-        elif filename.endswith(('.js', '.ts', '.tsx', '.jsx')):
-            score += 4.0  # JavaScript/TypeScript
-        elif filename.endswith('.yaml') or filename.endswith('.yml'):
-            score += 3.0  # Config files important for infra
-        elif filename.endswith('.tf'):
-            score += 4.0  # Terraform very important
-        
-        # 3. Penalize test files (review but lower priority)
-        if 'test_' in filename or '_test.' in filename or '/tests/' in filename:
-            score -= 3.0
-        
-        # 4. Penalize very large files (hard to review, often generated)
-        if changes > 500:
-            score -= 5.0
-        elif changes > 1000:
-            score -= 10.0
-        
-        # 5. Boost critical security files
-        security_patterns = ['auth', 'security', 'secrets', 'credentials', 'password']
-        if any(pattern in filename.lower() for pattern in security_patterns):
-            score += 8.0
-        
-        # 6. Boost core business logic
-        if '/src/' in filename and not 'test' in filename:
-            score += 3.0
-        
-        # Estimate tokens (rough: 4 chars per token)
-        estimated_tokens = len(patch) // 4
-        
-        return FileScore(
-            filename=filename,
-            score=score,
-            changes=changes,
-            patch=patch,
-            status=status,
-            estimated_tokens=estimated_tokens
-        )
+        return self.score_files_batch([file_data])[0]
+    
+    def score_files_batch(self, files: List[Dict[str, Any]]) -> List[FileScore]:
+        """
+        Score many files in one pass (same weights as score_file).
+        
+        Weights come from the class-level lookup tables, hoisted into locals so
+        the per-file work is a handful of dict lookups and substring checks.
+        
+        Args:
+            files: GitHub API file data (see score_file)
+        
+        Returns:
+            FileScore objects in input order
+        """
+        if self._batch_token_counter is not None:
+            self._prime_token_cache([f.get('patch', '') for f in files])
+        
+        status_scores = self.STATUS_SCORES
+        extension_bonus = self.EXTENSION_BONUS
+        security_patterns = self.SECURITY_PATTERNS
+        count_tokens = self.count_tokens
+        
+        scored = []
+        for file_data in files:
+            filename = file_data['filename']
+            status = file_data.get('status', 'modified')
+            changes = file_data.get('changes', 0)
+            patch = file_data.get('patch', '')
+            
+            # 1. Change type, 2. file type
+            dot = filename.rfind('.')
+            score = status_scores.get(status, 0.0)
+            if dot >= 0:
+                score += extension_bonus.get(filename[dot:], 0.0)
+            
+            # 3. Penalize test files (review but lower priority)
+            if 'test_' in filename or '_test.' in filename or '/tests/' in filename:
+                score -= 3.0
+            
+            # 4. Penalize very large files (hard to review, often generated)
+            if changes > 500:
+                score -= 5.0
+            
+            # 5. Boost critical security files
+            filename_lower = filename.lower()
+            if any(pattern in filename_lower for pattern in security_patterns):
+                score += 8.0
+            
+            # 6. Boost core business logic
+            if '/src/' in filename and 'test' not in filename:
+                score += 3.0
+            
+            scored.append(FileScore(
+                filename=filename,
+                score=score,
+                changes=changes,
+                patch=patch,
+                status=status,
+                estimated_tokens=count_tokens(patch)
+            ))
+        return scored
     
     def compress_files(
         self,
@@ -188,6 +266,9 @@ class PRFileCompressor:
         4. Take as many as fit within token budget
         5. Optionally truncate last file if needed
         
+        When every reviewable file fits, steps 3-5 are skipped and files keep
+        their original order.
+        
         Args:
             files: List of GitHub API file objects
             allow_truncation: If True, truncate last file to fit budget
@@ -197,6 +278,11 @@ class PRFileCompressor:
         """
         # 1. Filter non-reviewable files
         reviewable = [f for f in files if self.should_review_file(f['filename'])]
+        if self.drop_context:
+            # Before scoring, so the budget reflects what is actually sent
+            reviewable = [
+                {**f, 'patch': self.densify_patch(f.get('patch', ''))} for f in reviewable
+            ]
         
         logger.info(
             f"Filtered {len(files)} files -> {len(reviewable)} reviewable "
@@ -206,47 +292,55 @@ class PRFileCompressor:
         if not reviewable:
             return []
         
+        # Fast path: everything fits, so there is nothing to rank or drop;
+        # keep the PR's own file order and skip the sort and packing
+        if self._batch_token_counter is not None:
+            self._prime_token_cache([f.get('patch', '') for f in reviewable])
+        total_tokens = sum(self.count_tokens(f.get('patch', '')) for f in reviewable)
+        if total_tokens <= self.max_tokens:
+            logger.info(
+                f"All {len(reviewable)} reviewable files fit "
+                f"(~{total_tokens} tokens / {self.max_tokens} budget)"
+            )
+            return [self._file_entry(s) for s in self.score_files_batch(reviewable)]
+        
         # 2. Score all files
-        scored = [self.score_file(f) for f in reviewable]
+        scored = self.score_files_batch(reviewable)
         
         # 3. Sort by score (descending)
         scored.sort(key=lambda x: x.score, reverse=True)
         
-        # 4. Select files within token budget
-        compressed = []
-        tokens_used = 0
-        
-        for file_score in scored:
-            if tokens_used + file_score.estimated_tokens <= self.max_tokens:
-                # File fits completely
-                compressed.append({
-                    'filename': file_score.filename,
-                    'status': file_score.status,
-                    'changes': file_score.changes,
-                    'patch': file_score.patch,
-                    'score': file_score.score
-                })
-                tokens_used += file_score.estimated_tokens
-                
-            elif len(compressed) == 0 and allow_truncation:
-                # At least include first file (truncated)
-                logger.warning(
-                    f"Truncating {file_score.filename} to fit token budget "
-                    f"({file_score.estimated_tokens} -> {self.max_tokens - tokens_used})"
-                )
-                
-                max_chars = (self.max_tokens - tokens_used) * 4
-                truncated_patch = file_score.patch[:max_chars]
-                
-                compressed.append({
-                    'filename': file_score.filename,
-                    'status': file_score.status,
-                    'changes': file_score.changes,
-                    'patch': truncated_patch + "\n\n[... truncated due to size ...]",
-                    'score': file_score.score,
-                    'truncated': True
-                })
-                break
+        # 4. Select files within token budget: the leading run that fits is
+        # found with a running total + binary search, then smaller files
+        # further down are packed greedily into whatever budget is left
+        cumulative = list(accumulate(s.estimated_tokens for s in scored))
+        keep_n = bisect_right(cumulative, self.max_tokens)
+        compressed = [self._file_entry(s) for s in scored[:keep_n]]
+        tokens_used = cumulative[keep_n - 1] if keep_n else 0
+        excluded_files = []
+        
+        if keep_n == 0 and allow_truncation:
+            # At least include first file (truncated)
+            file_score = scored[0]
+            logger.warning(
+                f"Truncating {file_score.filename} to fit token budget "
+                f"({file_score.estimated_tokens} -> {self.max_tokens})"
+            )
+            
+            entry = self._file_entry(file_score)
+            entry['patch'] = self._truncate_patch(
+                file_score.patch, self.max_tokens, file_score.estimated_tokens
+            )
+            entry['truncated'] = True
+            compressed.append(entry)
+            excluded_files = [s.filename for s in scored[1:]]
+        else:
+            for file_score in scored[keep_n:]:
+                if tokens_used + file_score.estimated_tokens <= self.max_tokens:
+                    compressed.append(self._file_entry(file_score))
+                    tokens_used += file_score.estimated_tokens
+                else:
+                    excluded_files.append(file_score.filename)
         
         logger.info(
             f"Compressed {len(reviewable)} files -> {len(compressed)} files "
@@ -254,12 +348,106 @@ class PRFileCompressor:
         )
         
         # Log what was excluded
-        excluded_count = len(reviewable) - len(compressed)
-        if excluded_count > 0:
-            excluded_files = [s.filename for s in scored[len(compressed):]]
-            logger.info(f"Excluded {excluded_count} files: {', '.join(excluded_files[:5])}")
+        if excluded_files:
+            logger.info(f"Excluded {len(excluded_files)} files: {', '.join(excluded_files[:5])}")
         
         return compressed
+    
+    @staticmethod
+    def densify_patch(patch: str) -> str:
+        """
+        Drop unchanged context lines from a unified diff.
+        
+        Keeps hunk headers, +/- lines and '\\ No newline' markers, plus the
+        single context line directly before and after each change. Hunk
+        header line counts are left as-is, so the result is for prompts only,
+        not for applying or mapping diff positions.
+        """
+        lines = patch.split('\n')
+        changed = [line[:1] in ('+', '-') for line in lines]
+        last = len(lines) - 1
+        return '\n'.join(
+            line for i, line in enumerate(lines)
+            if changed[i]
+            or line[:1] == '\\'
+            or line.startswith(('@@', 'diff '))
+            or (i > 0 and changed[i - 1])
+            or (i < last and changed[i + 1])
+        )
+    
+    def _truncate_patch(self, patch: str, budget_tokens: int, patch_tokens: int) -> str:
+        """
+        Cut a patch down to at most *budget_tokens*, keeping whole hunks.
+        
+        Hunks with the highest share of +/- lines are kept first and shown
+        in their original order; each run of dropped hunks is replaced by a
+        single HUNK_ELISION line, and those lines count against the budget.
+        Falls back to a plain prefix cut when no whole hunk fits.
+        """
+        hunks = _HUNK_SPLIT_RE.split(patch)
+        if len(hunks) > 1:
+            elision_cost = self._token_counter(HUNK_ELISION.format(n=1))
+            hunk_costs = [self._token_counter(hunk) for hunk in hunks]
+            
+            def density(i: int) -> float:
+                lines = hunks[i].splitlines()
+                changed = sum(1 for line in lines if line[:1] in ('+', '-'))
+                return changed / max(len(lines), 1)
+            
+            def elided_runs(keep: set) -> int:
+                return sum(
+                    1 for i in range(len(hunks))
+                    if i not in keep and (i == 0 or i - 1 in keep)
+                )
+            
+            def render(keep: set) -> str:
+                parts = []
+                elided = 0
+                for i, hunk in enumerate(hunks):
+                    if i in keep:
+                        if elided:
+                            parts.append(HUNK_ELISION.format(n=elided))
+                            elided = 0
+                        parts.append(hunk)
+                    else:
+                        elided += 1
+                if elided:
+                    parts.append(HUNK_ELISION.format(n=elided))
+                return '\n'.join(parts)
+            
+            # Greedy pick by density, charging one elision line per run of
+            # dropped hunks the selection would actually leave.
+            by_density = sorted(range(len(hunks)), key=density, reverse=True)
+            keep = set()
+            for i in by_density:
+                candidate = keep | {i}
+                cost = sum(hunk_costs[j] for j in candidate) + elided_runs(candidate) * elision_cost
+                if cost <= budget_tokens:
+                    keep = candidate
+            
+            # Separators and wider elision counts can still tip the rendered
+            # text over; drop the least dense kept hunks until it fits.
+            while keep:
+                result = render(keep)
+                if self._token_counter(result) <= budget_tokens:
+                    return result
+                keep.discard(min(keep, key=density))
+        
+        # Scale by this patch's own chars-per-token ratio so the cut
+        # respects whichever counter produced patch_tokens
+        max_chars = len(patch) * budget_tokens // patch_tokens
+        return patch[:max_chars] + "\n\n[... truncated due to size ...]"
+    
+    @staticmethod
+    def _file_entry(file_score: FileScore) -> Dict[str, Any]:
+        """Output dict for a selected file."""
+        return {
+            'filename': file_score.filename,
+            'status': file_score.status,
+            'changes': file_score.changes,
+            'patch': file_score.patch,
+            'score': file_score.score
+        }
 
 
 class PRAgentPromptBuilder:
@@ -373,6 +561,22 @@ Provide your review as a JSON object:
 Begin your review now.
 """
     
+    # Split once at class creation: only the header is formatted per call; the
+    # instruction block after {file_changes} is static and pre-unescaped.
+    _PROMPT_HEADER, _, _PROMPT_INSTRUCTIONS = REVIEW_PROMPT_TEMPLATE.partition('{file_changes}')
+    _PROMPT_INSTRUCTIONS = _PROMPT_INSTRUCTIONS.format()
+    
+    # Static prompt-cache prefix (system, then instructions); Bedrock caches
+    # everything up to the last cache_control marker for ~5 minutes
+    _SYSTEM_BLOCKS = [
+        {'type': 'text', 'text': SYSTEM_PROMPT, 'cache_control': {'type': 'ephemeral'}}
+    ]
+    _INSTRUCTIONS_BLOCK = {
+        'type': 'text',
+        'text': _PROMPT_INSTRUCTIONS.strip(),
+        'cache_control': {'type': 'ephemeral'}
+    }
+    
     def build_review_prompt(
         self,
         repo: str,
@@ -398,20 +602,22 @@ Begin your review now.
             deletions: Total lines deleted
             
         Returns:
-            Dict with 'system' and 'prompt' keys for Bedrock
+            Dict for Bedrock with:
+                - system / prompt: plain strings (prompt = header, changes,
+                  instructions)
+                - system_blocks / content_blocks: Anthropic Messages content
+                  blocks with the static system prompt and instructions first,
+                  marked cache_control so repeat reviews hit the prompt cache
         """
         # Format file changes for prompt
-        file_changes_parts = []
-        for idx, f in enumerate(files, 1):
-            file_changes_parts.append(
-                f"### File {idx}: `{f['filename']}` ({f['status'].upper()}, {f['changes']} changes)\n\n"
-                f"```diff\n{f['patch']}\n```\n"
-            )
-        
-        file_changes_text = "\n".join(file_changes_parts)
+        file_changes_text = "\n".join(
+            f"### File {idx}: `{f['filename']}` ({f['status'].upper()}, {f['changes']} changes)\n\n"
+            f"```diff\n{f['patch']}\n```\n"
+            for idx, f in enumerate(files, 1)
+        )
         
-        # Build full prompt
-        prompt = self.REVIEW_PROMPT_TEMPLATE.format(
+        # Build full prompt: formatted header + file changes + static instructions
+        header = self._PROMPT_HEADER.format(
             repo=repo,
             pr_number=pr_number,
             title=title,
@@ -419,13 +625,18 @@ Begin your review now.
             author=author,
             files_changed=len(files),
             additions=additions,
-            deletions=deletions,
-            file_changes=file_changes_text
+            deletions=deletions
         )
+        prompt = header + file_changes_text + self._PROMPT_INSTRUCTIONS
         
         return {
             'system': self.SYSTEM_PROMPT,
-            'prompt': prompt
+            'prompt': prompt,
+            'system_blocks': list(self._SYSTEM_BLOCKS),
+            'content_blocks': [
+                self._INSTRUCTIONS_BLOCK,
+                {'type': 'text', 'text': header + file_changes_text}
+            ]
         }
 
 
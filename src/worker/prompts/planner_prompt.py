@@ -39,15 +39,21 @@ Produce the triage plan JSON now.
 """
 
 
-def build_planner_messages(context: dict[str, Any]) -> list[dict]:
-    """Return the messages list for Bedrock Anthropic API invocation."""
+def build_planner_messages(context: dict[str, Any], context_json: str | None = None) -> list[dict]:
+    """Return the messages list for Bedrock Anthropic API invocation.
+
+    Pass *context_json* (``json.dumps(context, indent=2)``) to reuse a
+    serialisation shared with the reviewer stage.
+    """
+    if context_json is None:
+        context_json = json.dumps(context, indent=2)
     return [
         {
             "role": "user",
             "content": [
                 {
                     "type": "text",
-                    "text": PLANNER_USER_TMPL.format(context_json=json.dumps(context, indent=2)),
+                    "text": PLANNER_USER_TMPL.format(context_json=context_json),
                 }
             ],
         }
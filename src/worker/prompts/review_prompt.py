@@ -80,8 +80,18 @@ Produce the complete review JSON now.
 """
 
 
-def build_reviewer_messages(context: dict[str, Any], plan: dict[str, Any]) -> list[dict]:
-    """Return the messages list for Bedrock Anthropic API invocation."""
+def build_reviewer_messages(
+    context: dict[str, Any],
+    plan: dict[str, Any],
+    context_json: str | None = None,
+) -> list[dict]:
+    """Return the messages list for Bedrock Anthropic API invocation.
+
+    Pass *context_json* (``json.dumps(context, indent=2)``) to reuse a
+    serialisation shared with the planner stage.
+    """
+    if context_json is None:
+        context_json = json.dumps(context, indent=2)
     return [
         {
             "role": "user",
@@ -90,7 +100,7 @@ def build_reviewer_messages(context: dict[str, Any], plan: dict[str, Any]) -> li
                     "type": "text",
                     "text": REVIEWER_USER_TMPL.format(
                         plan_json=json.dumps(plan, indent=2),
-                        context_json=json.dumps(context, indent=2),
+                        context_json=context_json,
                     ),
                 }
             ],
@@ -48,3 +48,41 @@ def map_new_line_to_diff_position(patch: str, target_new_line: int) -> Optional[
         current_new_line += 1
 
     return None
+
+
+def build_line_to_position_index(patch: str) -> dict[int, int]:
+    """
+    Map every new-file line number in a patch to its GitHub review 'position'.
+
+    Same walk as map_new_line_to_diff_position, done once per patch so repeated
+    lookups for findings in the same file are dict hits.
+    """
+    index: dict[int, int] = {}
+    if not patch:
+        return index
+
+    position = 0
+    current_new_line: Optional[int] = None
+
+    for raw_line in patch.splitlines():
+        if raw_line.startswith("@@"):
+            match = _HUNK_HEADER_RE.match(raw_line)
+            if match:
+                current_new_line = int(match.group(1))
+            continue
+
+        if current_new_line is None:
+            continue
+
+        if raw_line.startswith("\\"):
+            continue
+
+        position += 1
+
+        if raw_line.startswith("-"):
+            continue
+
+        index.setdefault(current_new_line, position)
+        current_new_line += 1
+
+    return index
@@ -0,0 +1,35 @@
+import sys
+
+import pytest
+
+from shared.github_app_auth import clear_cached_github_app_auth
+
+# Some tests re-import worker.app from scratch, while others hold functions
+# imported at collection time; clear the caches of every copy seen.
+_worker_app_modules: dict[int, object] = {}
+
+
+def _remember_worker_app() -> None:
+    app = sys.modules.get("worker.app")
+    if app is not None:
+        _worker_app_modules[id(app)] = app
+
+
+@pytest.fixture(autouse=True)
+def _clear_worker_caches():
+    """Per-container TTL caches in worker.app must not leak between tests."""
+    _remember_worker_app()
+    yield
+    _remember_worker_app()
+    for module in _worker_app_modules.values():
+        module._repo_config_cache.clear()
+        module._jira_issue_cache.clear()
+        module._bedrock_client_cached = None
+
+
+@pytest.fixture(autouse=True)
+def _clear_github_app_auth():
+    """The container-wide GitHubAppAuth cache must not leak mocks between tests."""
+    clear_cached_github_app_auth()
+    yield
+    clear_cached_github_app_auth()
@@ -129,3 +129,34 @@ def test_bedrock_chat_streaming_with_callback_and_telemetry() -> None:
     assert deltas == ["hello ", "world"]
     assert telemetry["stop_reason"] == "guardrail_intervened"
     assert telemetry["guardrail_intervened"] is True
+
+
+def test_bedrock_chat_client_cache_system_prompt_adds_cache_point() -> None:
+    runtime = _FakeRuntime()
+    client = BedrockChatClient(
+        region="us-gov-west-1",
+        model_id="anthropic.claude-3-5-sonnet",
+        bedrock_runtime=runtime,
+        cache_system_prompt=True,
+    )
+
+    _ = client.answer("system", "user")
+
+    assert runtime.last_kwargs is not None
+    assert runtime.last_kwargs["system"] == [{"text": "system"}, {"cachePoint": {"type": "default"}}]
+
+
+def test_bedrock_chat_client_captures_cache_usage_telemetry() -> None:
+    class _CachingRuntime(_FakeRuntime):
+        def converse(self, **kwargs) -> dict:
+            out = super().converse(**kwargs)
+            out["usage"] = {"inputTokens": 10, "cacheReadInputTokens": 900, "cacheWriteInputTokens": 0}
+            return out
+
+    client = BedrockChatClient(region="us-gov-west-1", model_id="anthropic.model", bedrock_runtime=_CachingRuntime())
+    telemetry: dict = {}
+
+    _ = client.answer("system", "user", telemetry=telemetry)
+
+    assert telemetry["cache_read_input_tokens"] == 900
+    assert telemetry["cache_write_input_tokens"] == 0
@@ -1,6 +1,8 @@
 import json
 from unittest.mock import MagicMock
 
+import pytest
+
 from shared.bedrock_client import BedrockReviewClient
 
 
@@ -62,3 +64,51 @@ def test_review_client_with_guardrail_adds_invoke_model_fields() -> None:
     assert kwargs["guardrailIdentifier"] == "gr-123"
     assert kwargs["guardrailVersion"] == "1"
     assert kwargs["trace"] == "ENABLED_FULL"
+
+
+def test_parse_text_to_json_skips_leading_prose_with_braces() -> None:
+    review = '{"summary": "a } in a string", "findings": [{"x": "\\"}"}]}'
+    text = "Use {braces} here: " + review + " trailing prose"
+
+    parsed = BedrockReviewClient._parse_text_to_json(text)
+
+    assert parsed["summary"] == "a } in a string"
+    assert parsed["findings"][0]["x"] == '"}'
+
+
+def test_parse_text_to_json_ignores_trailing_prose_with_braces() -> None:
+    text = 'Sure:\n{"summary": "ok", "findings": []}\nNote: use {braces} carefully.'
+
+    assert BedrockReviewClient._parse_text_to_json(text) == {"summary": "ok", "findings": []}
+
+
+def test_parse_text_to_json_without_object_raises() -> None:
+    with pytest.raises(ValueError):
+        BedrockReviewClient._parse_text_to_json("no json here")
+
+
+def test_planner_and_reviewer_reuse_shared_context_json() -> None:
+    plan = {"risk_ranking": [], "hotspots": [], "file_clusters": [], "skip_files": [], "overall_risk_estimate": "low"}
+    review = {
+        "summary": "Looks fine overall.", "overall_risk": "low", "findings": [], "suggested_tests": [],
+        "risk_hotspots": [], "files_reviewed": [], "files_skipped": [],
+    }
+    runtime = MagicMock()
+    runtime.invoke_model.side_effect = [
+        {"body": _BodyReader({"content": [{"text": json.dumps(plan)}], "usage": {}})},
+        {"body": _BodyReader({"content": [{"text": json.dumps(review)}], "usage": {}})},
+    ]
+    client = BedrockReviewClient(
+        region="us-gov-west-1",
+        model_id="anthropic.model",
+        agent_runtime=MagicMock(),
+        bedrock_runtime=runtime,
+    )
+
+    client.invoke_planner({"ignored": True}, context_json="<<shared>>")
+    client.invoke_reviewer({"ignored": True}, plan, context_json="<<shared>>")
+
+    for call in runtime.invoke_model.call_args_list:
+        text = json.loads(call.kwargs["body"])["messages"][0]["content"][0]["text"]
+        assert "<<shared>>" in text
+        assert "ignored" not in text
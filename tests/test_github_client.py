@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from typing import Any
 
+import pytest
+
 from shared.github_client import GitHubClient
 
 
@@ -47,6 +49,8 @@ class FakeSession:
                     ]
                 },
             )
+        if "/contents/" in url and method == "PUT":
+            return FakeResponse(201, {"content": {"path": url.split("/contents/", 1)[1]}})
         if url.endswith("/reviews"):
             return FakeResponse(200, {"id": 777})
         if "/releases/tags/" in url:
@@ -191,3 +195,102 @@ def test_update_pull_request() -> None:
     client = GitHubClient(token_provider=lambda: "tok", session=session)
     result = client.update_pull_request("o", "r", 1, body="new body")
     assert result["number"] == 1
+
+
+def test_get_files_contents_batch_uses_single_graphql_query() -> None:
+    class GraphQLSession:
+        def __init__(self):
+            self.calls = []
+
+        def request(self, method: str, url: str, headers=None, timeout=None, **kwargs):
+            self.calls.append((method, url, kwargs))
+            return FakeResponse(200, {"data": {"repository": {
+                "f0": {"text": "print(1)", "isBinary": False, "isTruncated": False},
+                "f1": None,
+                "f2": {"text": None, "isBinary": True, "isTruncated": False},
+            }}})
+
+    session = GraphQLSession()
+    client = GitHubClient(token_provider=lambda: "tok", api_base="https://ghe.example.com/api/v3", session=session)
+
+    out = client.get_files_contents_batch("o", "r", ["a.py", "missing.py", "logo.png"], "sha1")
+
+    assert out == {"a.py": "print(1)"}
+    assert len(session.calls) == 1
+    method, url, kwargs = session.calls[0]
+    assert (method, url) == ("POST", "https://ghe.example.com/api/graphql")
+    assert kwargs["json"]["variables"]["e1"] == "sha1:missing.py"
+
+
+def test_graphql_raises_on_errors() -> None:
+    class ErrorSession:
+        def request(self, method: str, url: str, headers=None, timeout=None, **kwargs):
+            return FakeResponse(200, {"errors": [{"message": "bad"}]})
+
+    client = GitHubClient(token_provider=lambda: "tok", session=ErrorSession())
+
+    with pytest.raises(RuntimeError, match="bad"):
+        client.graphql("query { viewer { login } }")
+
+
+def test_create_commit_on_branch_sends_single_mutation() -> None:
+    class CommitSession:
+        def __init__(self):
+            self.calls = []
+
+        def request(self, method: str, url: str, headers=None, timeout=None, **kwargs):
+            self.calls.append((method, url, kwargs))
+            return FakeResponse(200, {"data": {"createCommitOnBranch": {"commit": {"oid": "new-sha"}}}})
+
+    session = CommitSession()
+    client = GitHubClient(token_provider=lambda: "tok", session=session)
+    additions = [{"path": "tests/test_a.py", "contents": "ZGVmIHRlc3RfYSgpOiBwYXNz"}]
+
+    oid = client.create_commit_on_branch("o", "r", "ai-tests/x", "base-sha", additions, "msg")
+
+    assert oid == "new-sha"
+    assert len(session.calls) == 1
+    method, url, kwargs = session.calls[0]
+    assert (method, url) == ("POST", "https://api.github.com/graphql")
+    payload = kwargs["json"]["variables"]["input"]
+    assert payload["branch"] == {"repositoryNameWithOwner": "o/r", "branchName": "ai-tests/x"}
+    assert payload["expectedHeadOid"] == "base-sha"
+    assert payload["fileChanges"] == {"additions": additions}
+
+
+def test_put_file_contents_accepts_preencoded_content() -> None:
+    session = FakeSession()
+    client = GitHubClient(token_provider=lambda: "tok", session=session)
+
+    client.put_file_contents("o", "r", "tests/test_a.py", "b", "msg", content="ignored", content_b64="YWJj")
+    client.put_file_contents("o", "r", "tests/test_a.py", "b", "msg", content="abc")
+
+    assert session.calls[0][2]["json"]["content"] == "YWJj"
+    assert session.calls[1][2]["json"]["content"] == "YWJj"
+
+
+def test_git_data_helpers_post_expected_payloads() -> None:
+    class GitDataSession:
+        def __init__(self):
+            self.calls = []
+
+        def request(self, method: str, url: str, headers=None, timeout=None, **kwargs):
+            self.calls.append((method, url, kwargs))
+            return FakeResponse(201, {"sha": "new-sha"})
+
+    session = GitDataSession()
+    client = GitHubClient(token_provider=lambda: "tok", session=session)
+
+    assert client.create_blob("o", "r", "YWJj") == "new-sha"
+    assert client.create_tree("o", "r", "base-tree", {"tests/test_a.py": "blob"}) == "new-sha"
+    assert client.create_commit("o", "r", "msg", "tree", ["parent"]) == "new-sha"
+    client.update_ref("o", "r", "heads/b", "commit")
+
+    assert [(m, u.rsplit("/git/", 1)[1]) for m, u, _ in session.calls] == [
+        ("POST", "blobs"), ("POST", "trees"), ("POST", "commits"), ("PATCH", "refs/heads/b"),
+    ]
+    assert session.calls[0][2]["json"] == {"content": "YWJj", "encoding": "base64"}
+    assert session.calls[1][2]["json"]["tree"] == [
+        {"path": "tests/test_a.py", "mode": "100644", "type": "blob", "sha": "blob"},
+    ]
+    assert session.calls[3][2]["json"] == {"sha": "commit", "force": False}
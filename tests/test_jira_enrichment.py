@@ -3,6 +3,7 @@
 from __future__ import annotations
 
 import json
+import threading
 from unittest.mock import MagicMock, patch
 
 from worker.app import _build_prompt, _extract_jira_keys, _fetch_jira_context
@@ -45,6 +46,11 @@ def test_extract_jira_keys_mixed_sources() -> None:
     assert keys == ["ENG-100", "DEVOPS-50"]
 
 
+
+def test_extract_jira_keys_do_not_span_sources() -> None:
+    pr = {"title": "ENG-1", "body": "2 apples", "head": {"ref": "OPS"}}
+    assert _extract_jira_keys(pr) == ["ENG-1"]
+
 # -- _fetch_jira_context -----------------------------------------------------
 
 @patch("worker.app.AtlassianClient")
@@ -100,6 +106,39 @@ def test_fetch_jira_context_limits_to_max(mock_cls) -> None:
     assert len(issues) == 3
 
 
+@patch("worker.app.AtlassianClient")
+def test_fetch_jira_context_caches_successful_lookups(mock_cls) -> None:
+    def get_issue(key: str) -> dict:
+        if key == "ENG-2":
+            raise RuntimeError("API error")
+        return {"key": key, "fields": {"summary": "cached"}}
+
+    mock_client = MagicMock()
+    mock_client.get_jira_issue.side_effect = get_issue
+    mock_cls.return_value = mock_client
+
+    _fetch_jira_context(["ENG-1", "ENG-2"], "arn:fake")
+    issues = _fetch_jira_context(["ENG-1", "ENG-2"], "arn:fake")
+
+    assert [i["summary"] for i in issues] == ["cached"]
+    assert sorted(c.args[0] for c in mock_client.get_jira_issue.call_args_list) == ["ENG-1", "ENG-2", "ENG-2"]
+
+
+@patch("worker.app.AtlassianClient")
+def test_fetch_jira_context_fetches_concurrently_in_key_order(mock_cls) -> None:
+    started = threading.Barrier(3, timeout=5)
+
+    def get_issue(key: str) -> dict:
+        started.wait()  # only passes if all three fetches are in flight at once
+        return {"key": key, "fields": {"summary": key.lower()}}
+
+    mock_cls.return_value.get_jira_issue.side_effect = get_issue
+
+    issues = _fetch_jira_context(["ENG-3", "ENG-1", "ENG-2"], "arn:fake")
+
+    assert [i["key"] for i in issues] == ["ENG-3", "ENG-1", "ENG-2"]
+
+
 # -- _build_prompt with Jira context -----------------------------------------
 
 def test_build_prompt_without_jira() -> None:
@@ -117,3 +156,15 @@ def test_build_prompt_with_jira() -> None:
     assert prompt["linked_jira_issues"] == jira_issues
     # Hard rules should include Jira verification
     assert any("Jira" in r for r in prompt["hard_rules"])
+
+
+def test_build_prompt_skips_oversize_file_but_keeps_later_ones() -> None:
+    pr = {"title": "fix", "body": "", "base": {"ref": "main"}, "head": {"ref": "fix"}}
+    files = [
+        {"filename": "a.py", "patch": "+" + "a" * 50},
+        {"filename": "big.py", "patch": "+" + "b" * 5000},
+        {"filename": "c.py", "patch": "+c"},
+    ]
+    with patch("worker.app.SAFE_PATCH_CHAR_BUDGET", 300):
+        prompt = json.loads(_build_prompt(pr, files))
+    assert [f["filename"] for f in prompt["pull_request"]["changed_files"]] == ["a.py", "c.py"]
@@ -3,9 +3,12 @@ P2-B skip filters, and P3 structured verdict."""
 from __future__ import annotations
 
 import importlib
+import json
 import os
 import sys
+import threading
 import types
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -126,6 +129,16 @@ class TestShouldSkipReview:
         skip, reason = fn(self._pr(base_ref="release/1.0.0"), "opened", "auto")
         assert skip
 
+    def test_trigger_and_ignore_labels_share_one_label_set(self):
+        fn = self._get_fn(REVIEW_TRIGGER_LABELS="ai-review", IGNORE_PR_LABELS="wip")
+        pr = self._pr(labels=["ai-review"])
+        pr["labels"].append({"name": None})
+        assert fn(pr, "labeled", "auto") == (False, "")
+        skip, reason = fn(self._pr(labels=["ai-review", "wip"]), "labeled", "auto")
+        assert skip and "wip" in reason
+        skip, reason = fn(self._pr(labels=["other"]), "labeled", "auto")
+        assert skip and "trigger label" in reason
+
     def test_manual_trigger_bypasses_author_filter(self):
         fn = self._get_fn(IGNORE_PR_AUTHORS="alice")
         skip, reason = fn(self._pr(author="alice"), "opened", "manual")
@@ -172,6 +185,13 @@ class TestIsManualTrigger:
         fn = self._get_fn("/review")
         assert not fn("LGTM")
 
+    def test_other_user_mention_not_matched(self):
+        fn = self._get_fn("/ai-review", bot="mybot")
+        assert fn("@MyBot  review")
+        assert fn("cc @mybot, thanks @mybot /review")
+        assert not fn("@otherbot review")
+        assert not fn("@mybotreview")
+
     def test_empty_comment_not_matched(self):
         fn = self._get_fn("/review")
         assert not fn("")
@@ -232,6 +252,20 @@ class TestBuildContext:
         assert len(reviewed) >= 1
         assert any("budget" in s for s in skipped)
 
+    def test_sensitive_and_skip_patterns_match_globs_and_substrings(self):
+        files = [
+            {"filename": name, "patch": "+x", "changes": 1, "additions": 1, "deletions": 0, "status": "modified"}
+            for name in ("config/.env.local", "certs/Server.PEM", "web/yarn.lock", "svc/go.sum", "src/app.py")
+        ]
+        ctx, reviewed, skipped = self._build(files)
+        assert reviewed == ["src/app.py"]
+        assert skipped == [
+            "config/.env.local — sensitive file",
+            "certs/Server.PEM — sensitive file",
+            "web/yarn.lock — matches skip pattern",
+            "svc/go.sum — matches skip pattern",
+        ]
+
 
 # ===========================================================================
 # P3 — render_check_run_body with verdict
@@ -304,6 +338,269 @@ class TestIncrementalStateHelpers:
         assert call_kwargs["Item"]["pr_key"]["S"] == "org/repo:42"
 
 
+class TestReviewCache:
+    def _mod(self):
+        return _reload_module("worker.app", {"IDEMPOTENCY_TABLE": "idem"})
+
+    def test_key_depends_on_models_and_context(self):
+        mod = self._mod()
+        ctx = {"files": [{"filename": "a.py", "patch": "+x"}]}
+        key = mod._review_cache_key(ctx, "light", "heavy")
+        assert key.startswith("review-cache:")
+        assert key == mod._review_cache_key({"files": [{"patch": "+x", "filename": "a.py"}]}, "light", "heavy")
+        assert key != mod._review_cache_key(ctx, "light", "other")
+        assert key != mod._review_cache_key({"files": []}, "light", "heavy")
+
+    def test_key_changes_with_prompt_version(self):
+        mod = self._mod()
+        ctx = {"files": []}
+        key = mod._review_cache_key(ctx, "light", "heavy")
+        with patch("worker.app.REVIEW_PROMPT_VERSION", "2"):
+            fingerprint = mod._prompt_fingerprint()
+        with patch("worker.app._PROMPT_FINGERPRINT", fingerprint):
+            assert mod._review_cache_key(ctx, "light", "heavy") != key
+        with patch("worker.app.review_prompt.REVIEWER_SYSTEM", "changed"):
+            assert mod._prompt_fingerprint() != mod._PROMPT_FINGERPRINT
+
+    def test_round_trip(self):
+        mod = self._mod()
+        mock_dynamodb = MagicMock()
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": "idem"}), \
+                patch("worker.app._dynamodb", mock_dynamodb):
+            mod._put_cached_review("review-cache:k", {"summary": "ok", "findings": []})
+            item = mock_dynamodb.put_item.call_args[1]["Item"]
+            mock_dynamodb.get_item.return_value = {"Item": item}
+            assert mod._get_cached_review("review-cache:k") == {"summary": "ok", "findings": []}
+        assert item["idempotency_key"]["S"] == "review-cache:k"
+
+    def test_expired_item_is_a_miss(self):
+        mod = self._mod()
+        mock_dynamodb = MagicMock()
+        mock_dynamodb.get_item.return_value = {
+            "Item": {"review_json": {"S": "{}"}, "expires_at": {"N": "1"}}
+        }
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": "idem"}), \
+                patch("worker.app._dynamodb", mock_dynamodb):
+            assert mod._get_cached_review("review-cache:k") is None
+
+    def test_dynamodb_error_is_a_miss(self):
+        mod = self._mod()
+        mock_dynamodb = MagicMock()
+        mock_dynamodb.get_item.side_effect = RuntimeError("boom")
+        with patch.dict(os.environ, {"IDEMPOTENCY_TABLE": "idem"}), \
+                patch("worker.app._dynamodb", mock_dynamodb):
+            assert mod._get_cached_review("review-cache:k") is None
+
+
+class TestBuildBedrockClient:
+    def test_uses_private_session_clients(self):
+        mod = _reload_module("worker.app", {})
+        session = MagicMock()
+        with patch.dict(os.environ, {"BEDROCK_MODEL_ID": "m", "AWS_REGION": "us-gov-west-1"}), \
+                patch("worker.app.boto3.session.Session", return_value=session):
+            client = mod._build_bedrock_client()
+        services = [c.args[0] for c in session.client.call_args_list]
+        assert services == ["bedrock-agent-runtime", "bedrock-runtime"]
+        assert client._model_id == "m"
+
+    def test_client_built_once_per_container(self):
+        mod = _reload_module("worker.app", {})
+        all_waiting = threading.Barrier(4, timeout=5)
+
+        def call(_):
+            all_waiting.wait()
+            return mod._bedrock_client()
+
+        with patch("worker.app._build_bedrock_client", side_effect=lambda: MagicMock()) as build:
+            with ThreadPoolExecutor(max_workers=4) as pool:
+                clients = list(pool.map(call, range(4)))
+        build.assert_called_once()
+        assert all(c is clients[0] for c in clients)
+
+
+class TestGitHubAuthReuse:
+    def test_auth_built_once_per_container(self):
+        mod = _reload_module("worker.app", {})
+        env = {"GITHUB_APP_IDS_SECRET_ARN": "ids", "GITHUB_APP_PRIVATE_KEY_SECRET_ARN": "pem"}
+        with patch.dict(os.environ, env), patch("shared.github_app_auth.GitHubAppAuth") as auth_cls:
+            assert mod._github_auth() is mod._github_auth()
+        auth_cls.assert_called_once_with(
+            app_ids_secret_arn="ids", private_key_secret_arn="pem", api_base="https://api.github.com",
+            http_session=None,
+        )
+
+
+class TestProcessRecordContextFetch:
+    _ENV = {
+        "GITHUB_APP_IDS_SECRET_ARN": "a",
+        "GITHUB_APP_PRIVATE_KEY_SECRET_ARN": "b",
+    }
+
+    def _mod(self, **env):
+        return _reload_module("worker.app", {
+            "IDEMPOTENCY_TABLE": "x",
+            "PR_REVIEW_STATE_TABLE": "",
+            "BEDROCK_MODEL_LIGHT": "",
+            "BEDROCK_MODEL_HEAVY": "",
+            "BEDROCK_KB_REVIEW_ENABLED": "true",
+            "ATLASSIAN_CREDENTIALS_SECRET_ARN": "arn:jira",
+            "BEDROCK_KNOWLEDGE_BASE_ID": "kb",
+            "DRY_RUN": "false",
+            **env,
+        })
+
+    def _run(self, mod, bedrock, repo_cfg=None, jira=None, kb=None, files=None, trigger="auto"):
+        """Run _process_record for one record with GitHub and AWS mocked out."""
+        pr = {"title": "ENG-7 fix", "body": "", "head": {"ref": "f", "sha": "abc"}, "base": {"ref": "main"}}
+        gh = MagicMock()
+        gh.get_pull_request.return_value = pr
+        gh.get_pull_request_files.return_value = files or [
+            {"filename": "a.py", "patch": "+x", "status": "modified"}
+        ]
+        gh.create_check_run.return_value = {"id": 1}
+        record = {"body": json.dumps(
+            {"repo_full_name": "o/r", "pr_number": 1, "head_sha": "abc", "trigger": trigger}
+        )}
+        self.gh = gh
+        with patch.dict(os.environ, self._ENV), \
+                patch("worker.app._claim_idempotency", return_value=True), \
+                patch("shared.github_app_auth.GitHubAppAuth"), \
+                patch("worker.app.GitHubClient", return_value=gh), \
+                patch("worker.app._build_bedrock_client", return_value=bedrock), \
+                patch("worker.app._fetch_jira_context", side_effect=jira or (lambda keys, arn: [])), \
+                patch("worker.app._fetch_kb_context", side_effect=kb or (lambda **kw: [])), \
+                patch("worker.app._load_repo_config", return_value=repo_cfg or {}), \
+                patch("worker.app._format_review_body", wraps=mod._format_review_body) as format_body, \
+                patch("worker.app._emit_metric") as emit_metric:
+            mod._process_record(record)
+        self.metrics = [c.args[0] for c in emit_metric.call_args_list]
+        return format_body
+
+    @staticmethod
+    def _bedrock(findings=()):
+        bedrock = MagicMock()
+        bedrock.analyze_pr.return_value = (
+            {"summary": "ok", "overall_risk": "low", "findings": list(findings)}, 1, 1
+        )
+        return bedrock
+
+    def test_jira_and_kb_fetched_concurrently_and_fed_to_prompt(self):
+        both_started = threading.Barrier(2, timeout=5)
+
+        def fake_jira(keys, _arn):
+            both_started.wait()
+            return [{"key": k} for k in keys]
+
+        def fake_kb(**_kwargs):
+            both_started.wait()
+            return [{"text": "standard", "uri": "", "score": 1.0}]
+
+        bedrock = self._bedrock()
+        self._run(self._mod(), bedrock, jira=fake_jira, kb=fake_kb)
+
+        prompt = json.loads(bedrock.analyze_pr.call_args.args[0])
+        assert prompt["linked_jira_issues"] == [{"key": "ENG-7"}]
+        assert prompt["org_knowledge_base"][0]["text"] == "standard"
+
+    def test_legacy_findings_filtered_by_repo_knobs(self):
+        def finding(kind, message):
+            return {"type": kind, "severity": "low", "file": "a.py", "start_line": 1,
+                    "end_line": 1, "message": message, "suggested_patch": None}
+
+        bedrock = self._bedrock([
+            finding("tests", "t1"), finding("security", "s1"), finding("bug", "b1"), finding("bug", "b2"),
+        ])
+        format_body = self._run(
+            self._mod(), bedrock,
+            repo_cfg={"require_tests_review": "false", "num_max_findings": "2"},
+        )
+
+        findings = format_body.call_args.args[0].findings
+        assert [f.message for f in findings] == ["s1", "b1"]
+
+    @staticmethod
+    def _two_stage_bedrock():
+        bedrock = MagicMock()
+        bedrock.invoke_planner.return_value = (
+            {"risk_ranking": [], "hotspots": [], "file_clusters": [], "skip_files": [],
+             "overall_risk_estimate": "high"}, 5, 5,
+        )
+        bedrock.invoke_reviewer.return_value = (
+            {"summary": "Looks fine overall.", "overall_risk": "low", "findings": []}, 5, 5
+        )
+        return bedrock
+
+    def test_small_pr_skips_planner(self):
+        mod = self._mod(BEDROCK_MODEL_LIGHT="light", BEDROCK_MODEL_HEAVY="heavy", REVIEW_CACHE_ENABLED="false")
+        bedrock = self._two_stage_bedrock()
+        files = [{"filename": "a.py", "patch": "+x", "status": "modified", "additions": 3, "deletions": 1}]
+        self._run(mod, bedrock, files=files)
+
+        bedrock.invoke_planner.assert_not_called()
+        plan = bedrock.invoke_reviewer.call_args.args[1]
+        assert plan["risk_ranking"] == ["a.py"]
+        assert plan["overall_risk_estimate"] == "medium"
+        assert "two_stage_skipped_small_pr" in self.metrics
+        bedrock.analyze_pr.assert_not_called()
+
+    _CACHED_REVIEW = {"summary": "Cached verdict.", "overall_risk": "low", "findings": []}
+
+    def _run_cached(self, cached, trigger="auto", **env):
+        mod = self._mod(BEDROCK_MODEL_LIGHT="light", BEDROCK_MODEL_HEAVY="heavy", **env)
+        bedrock = self._two_stage_bedrock()
+        with patch("worker.app._get_cached_review", return_value=cached) as get_cached, \
+                patch("worker.app._put_cached_review") as put_cached:
+            self._run(mod, bedrock, trigger=trigger)
+        return bedrock, get_cached, put_cached
+
+    def test_cache_hit_skips_bedrock_and_still_posts(self):
+        bedrock, get_cached, put_cached = self._run_cached(dict(self._CACHED_REVIEW))
+
+        get_cached.assert_called_once()
+        bedrock.invoke_planner.assert_not_called()
+        bedrock.invoke_reviewer.assert_not_called()
+        put_cached.assert_not_called()
+        assert "review_cache_hit" in self.metrics
+        assert "Cached verdict." in self.gh.create_pull_review.call_args.kwargs["body"]
+        assert self.gh.update_check_run.call_args.kwargs["status"] == "completed"
+
+    def test_cache_miss_runs_bedrock_and_stores(self):
+        bedrock, _get_cached, put_cached = self._run_cached(None)
+
+        bedrock.invoke_reviewer.assert_called_once()
+        put_cached.assert_called_once()
+        assert put_cached.call_args.args[1]["summary"] == "Looks fine overall."
+        assert "review_cache_miss" in self.metrics
+
+    def test_manual_trigger_bypasses_lookup_but_refreshes_cache(self):
+        bedrock, get_cached, put_cached = self._run_cached(dict(self._CACHED_REVIEW), trigger="manual")
+
+        get_cached.assert_not_called()
+        bedrock.invoke_reviewer.assert_called_once()
+        put_cached.assert_called_once()
+        assert "review_cache_hit" not in self.metrics
+
+    def test_dry_run_does_not_store_review(self):
+        bedrock, _get_cached, put_cached = self._run_cached(None, DRY_RUN="true")
+
+        bedrock.invoke_reviewer.assert_called_once()
+        put_cached.assert_not_called()
+        self.gh.create_pull_review.assert_not_called()
+
+    def test_large_pr_runs_planner(self):
+        mod = self._mod(
+            BEDROCK_MODEL_LIGHT="light", BEDROCK_MODEL_HEAVY="heavy",
+            REVIEW_CACHE_ENABLED="false", TWO_STAGE_MIN_DELTA="10",
+        )
+        bedrock = self._two_stage_bedrock()
+        files = [{"filename": "a.py", "patch": "+x", "status": "modified", "additions": 8, "deletions": 2}]
+        self._run(mod, bedrock, files=files)
+
+        bedrock.invoke_planner.assert_called_once()
+        assert bedrock.invoke_reviewer.call_args.args[1]["overall_risk_estimate"] == "high"
+        assert "two_stage_skipped_small_pr" not in self.metrics
+
+
 # ===========================================================================
 # Ticket Compliance — render_check_run_body section
 # ===========================================================================
@@ -598,6 +895,246 @@ class TestSqsDeduplication:
         assert "MessageDeduplicationId" not in kwargs
         assert "MessageGroupId" not in kwargs
 
+    def test_base64_utf8_body_parsed_without_decode(self):
+        import hashlib
+        import hmac
+        import json as _json
+
+        queue_url = "https://sqs.us-east-1.amazonaws.com/123/queue"
+        mod = _load_webhook({"QUEUE_URL": queue_url})
+        raw = _json.dumps({
+            "action": "opened",
+            "pull_request": {"number": 3, "head": {"sha": "sha3"}, "title": "Füge Übersetzung hinzu ✓"},
+            "repository": {"full_name": "org/repo"},
+            "installation": {"id": 5},
+        }, ensure_ascii=False).encode("utf-8")
+        event = {
+            "headers": {
+                "X-GitHub-Event": "pull_request",
+                "X-GitHub-Delivery": "abc-123",
+                "X-Hub-Signature-256": "sha256=" + hmac.new(b"s3cr3t", raw, hashlib.sha256).hexdigest(),
+            },
+            "body": base64.b64encode(raw).decode("ascii"),
+            "isBase64Encoded": True,
+        }
+        with (
+            patch("webhook_receiver.app._load_webhook_secret", return_value=b"s3cr3t"),
+            patch("webhook_receiver.app._sqs") as mock_sqs,
+            patch.dict(os.environ, {"QUEUE_URL": queue_url}),
+        ):
+            result = mod.lambda_handler(event, None)
+        assert result["statusCode"] == 202
+        sent = _json.loads(mock_sqs.send_message.call_args.kwargs["MessageBody"])
+        assert sent["pr_number"] == 3
+        assert sent["installation_id"] == 5
+
+    def test_pr_description_fanout_sent_after_review(self):
+        queue_url = "https://sqs.us-east-1.amazonaws.com/123/queue.fifo"
+        desc_url = "https://sqs.us-east-1.amazonaws.com/123/pr-desc.fifo"
+        mod = _load_webhook({"QUEUE_URL": queue_url, "PR_DESCRIPTION_QUEUE_URL": desc_url})
+        event = _make_webhook_event("pull_request", {
+            "action": "opened",
+            "pull_request": {"number": 1, "head": {"sha": "sha1"}},
+            "repository": {"full_name": "org/repo"},
+        })
+
+        def _send(**kwargs):
+            if kwargs["QueueUrl"] == desc_url:
+                raise RuntimeError("description queue unavailable")
+            return {}
+
+        with (
+            patch("webhook_receiver.app._load_webhook_secret", return_value=b"s3cr3t"),
+            patch("webhook_receiver.app._sqs") as mock_sqs,
+            patch.dict(os.environ, {"QUEUE_URL": queue_url, "PR_DESCRIPTION_QUEUE_URL": desc_url}),
+        ):
+            mock_sqs.send_message.side_effect = _send
+            result = mod.lambda_handler(event, None)
+        assert result["statusCode"] == 202
+        sent = {c.kwargs["QueueUrl"]: c.kwargs for c in mock_sqs.send_message.call_args_list}
+        assert set(sent) == {queue_url, desc_url}
+        assert sent[desc_url]["MessageBody"] == sent[queue_url]["MessageBody"]
+        assert sent[desc_url]["MessageDeduplicationId"] == "pr-desc:org/repo:1:sha1"
+
+    def test_pr_description_not_sent_when_review_send_fails(self):
+        queue_url = "https://sqs.us-east-1.amazonaws.com/123/queue"
+        desc_url = "https://sqs.us-east-1.amazonaws.com/123/pr-desc"
+        mod = _load_webhook({"QUEUE_URL": queue_url})
+        with (
+            patch("webhook_receiver.app._sqs") as mock_sqs,
+            patch("webhook_receiver.app._PR_DESCRIPTION_QUEUE_URL", desc_url),
+        ):
+            mock_sqs.send_message.side_effect = RuntimeError("review queue unavailable")
+            with pytest.raises(RuntimeError):
+                mod._enqueue_review("d1", "org/repo", 1, "sha1", 5, "opened")
+        assert [c.kwargs["QueueUrl"] for c in mock_sqs.send_message.call_args_list] == [queue_url]
+
+    def test_unsupported_action_ignored_before_signature_check(self):
+        mod = _load_webhook()
+        event = _make_webhook_event("pull_request", {"action": "closed", "pull_request": {"number": 1}})
+        event["headers"]["X-Hub-Signature-256"] = "sha256=" + "0" * 64
+        with (
+            patch("webhook_receiver.app._load_webhook_secret") as mock_secret,
+            patch("webhook_receiver.app._sqs") as mock_sqs,
+        ):
+            result = mod.lambda_handler(event, None)
+        assert result == mod._RESP_ACTION_NOT_SUPPORTED
+        mock_secret.assert_not_called()
+        mock_sqs.send_message.assert_not_called()
+
+    def test_supported_action_still_requires_valid_signature(self):
+        mod = _load_webhook()
+        event = _make_webhook_event("pull_request", {"action": "opened", "pull_request": {"number": 1}})
+        event["headers"]["X-Hub-Signature-256"] = "sha256=" + "0" * 64
+        with (
+            patch("webhook_receiver.app._load_webhook_secret", return_value=b"s3cr3t"),
+            patch("webhook_receiver.app._sqs") as mock_sqs,
+        ):
+            result = mod.lambda_handler(event, None)
+        assert result["statusCode"] == 401
+        mock_sqs.send_message.assert_not_called()
+
+    def test_header_names_are_case_insensitive(self):
+        queue_url = "https://sqs.us-east-1.amazonaws.com/123/queue"
+        mod = _load_webhook({"QUEUE_URL": queue_url})
+        event = _make_webhook_event("pull_request", {
+            "action": "opened",
+            "pull_request": {"number": 1, "head": {"sha": "sha1"}},
+            "repository": {"full_name": "org/repo"},
+        })
+        event["headers"] = {k.lower(): v for k, v in event["headers"].items()}
+        event["headers"]["X-GITHUB-DELIVERY"] = event["headers"].pop("x-github-delivery")
+        with (
+            patch("webhook_receiver.app._load_webhook_secret", return_value=b"s3cr3t"),
+            patch("webhook_receiver.app._sqs") as mock_sqs,
+            patch.dict(os.environ, {"QUEUE_URL": queue_url}),
+        ):
+            result = mod.lambda_handler(event, None)
+        assert result["statusCode"] == 202
+        mock_sqs.send_message.assert_called_once()
+
+
+class TestIssueCommentPrefilter:
+    def _comment_event(self, comment_body: str) -> dict:
+        return _make_webhook_event("issue_comment", {
+            "action": "created",
+            "issue": {"number": 7, "pull_request": {"url": "https://api.github.com/repos/o/r/pulls/7"}},
+            "comment": {"body": comment_body},
+            "repository": {"full_name": "o/r"},
+        })
+
+    def test_comment_without_trigger_skips_json_parse(self):
+        mod = _load_webhook({"BOT_USERNAME": "mybot"})
+        with (
+            patch("webhook_receiver.app._load_webhook_secret", return_value=b"s3cr3t"),
+            patch("webhook_receiver.app.json.loads") as mock_loads,
+        ):
+            result = mod.lambda_handler(self._comment_event("LGTM, ship it"), None)
+        assert result == mod._RESP_NO_TRIGGER_PHRASE
+        mock_loads.assert_not_called()
+
+    def test_prefilter_is_case_insensitive_and_allows_escaped_slash(self):
+        mod = _load_webhook({"BOT_USERNAME": "mybot"})
+        assert mod._TRIGGER_PREFILTER_RE.search(b'{"body":"please /REVIEW"}')
+        assert mod._TRIGGER_PREFILTER_RE.search(b'{"body":"\\/review"}')
+        assert mod._TRIGGER_PREFILTER_RE.search(b'{"body":"@MyBot review"}')
+        assert not mod._TRIGGER_PREFILTER_RE.search(b'{"body":"@otherbot"}')
+
+    def test_trigger_comment_still_dispatched(self):
+        mod = _load_webhook({"QUEUE_URL": "https://sqs.us-east-1.amazonaws.com/123/queue"})
+        with (
+            patch("webhook_receiver.app._load_webhook_secret", return_value=b"s3cr3t"),
+            patch("webhook_receiver.app._fetch_pr_head_sha_from_url", return_value="sha7"),
+            patch("webhook_receiver.app._sqs") as mock_sqs,
+        ):
+            result = mod.lambda_handler(self._comment_event("/review"), None)
+        assert result["statusCode"] == 202
+        mock_sqs.send_message.assert_called_once()
+
+    def test_prefilter_disabled_for_phrases_it_cannot_match_safely(self):
+        assert _load_webhook({"REVIEW_TRIGGER_PHRASE": "/ré-review"})._TRIGGER_PREFILTER_RE is None
+        assert _load_webhook({"REVIEW_TRIGGER_PHRASE": "/check"})._TRIGGER_PREFILTER_RE is None
+        assert _load_webhook({"REVIEW_TRIGGER_PHRASE": ""})._TRIGGER_PREFILTER_RE is None
+
+
+class TestRepoAllowlist:
+    def test_allowlist_parsed_once_at_load(self):
+        mod = _load_webhook({"GITHUB_ALLOWED_REPOS": " org/a, ,org/b "})
+        assert mod._repo_allowed("org/a")
+        assert mod._repo_allowed("org/b")
+        assert not mod._repo_allowed("org/c")
+
+    def test_empty_allowlist_allows_everything(self):
+        mod = _load_webhook({"GITHUB_ALLOWED_REPOS": ""})
+        assert mod._repo_allowed("any/repo")
+
+
+class TestColdStartSecretsBatch:
+    IDS_ARN = "arn:aws:secretsmanager:us-east-1:123:secret:ids"
+    KEY_ARN = "arn:aws:secretsmanager:us-east-1:123:secret:key"
+    HOOK_ARN = "arn:aws:secretsmanager:us-east-1:123:secret:test"
+
+    def test_batch_fetch_primes_webhook_and_app_secrets(self):
+        mod = _load_webhook()
+        client = MagicMock()
+        client.batch_get_secret_value.return_value = {"SecretValues": [
+            {"ARN": self.HOOK_ARN, "Name": "hook", "SecretString": "s3cr3t"},
+            {"ARN": self.IDS_ARN, "Name": "ids", "SecretString": '{"app_id": 1, "installation_id": 2}'},
+            {"ARN": self.KEY_ARN, "Name": "key", "SecretString": "PEM"},
+        ]}
+        env = {
+            "WEBHOOK_SECRET_ARN": self.HOOK_ARN,
+            "GITHUB_APP_IDS_SECRET_ARN": self.IDS_ARN,
+            "GITHUB_APP_PRIVATE_KEY_SECRET_ARN": self.KEY_ARN,
+        }
+        with patch.dict(os.environ, env), patch("shared.github_app_auth.boto3"):
+            assert mod._load_webhook_secret(client) == b"s3cr3t"
+            auth = mod._github_auth()
+
+        client.batch_get_secret_value.assert_called_once_with(
+            SecretIdList=[self.HOOK_ARN, self.IDS_ARN, self.KEY_ARN],
+        )
+        client.get_secret_value.assert_not_called()
+        assert auth._load_app_ids() == ("1", "2")
+        assert auth._load_private_key() == "PEM"
+
+    def test_falls_back_to_single_fetch_when_batch_unavailable(self):
+        mod = _load_webhook()
+        client = MagicMock()
+        client.batch_get_secret_value.side_effect = RuntimeError("AccessDenied")
+        client.get_secret_value.return_value = {"SecretString": "s3cr3t"}
+        with patch.dict(os.environ, {"WEBHOOK_SECRET_ARN": self.HOOK_ARN}):
+            assert mod._load_webhook_secret(client) == b"s3cr3t"
+        client.get_secret_value.assert_called_once_with(SecretId=self.HOOK_ARN)
+        assert mod._prefetched_app_secrets is None
+
+
+class TestFetchPrHeadSha:
+    """Manual-trigger head SHA lookup reuses one HTTP session and App auth per container."""
+
+    def test_session_and_auth_reused_across_lookups(self):
+        mod = _load_webhook()
+        session = MagicMock()
+        session.get.return_value.json.return_value = {"head": {"sha": "abc"}}
+        with (
+            patch("requests.Session", return_value=session) as mock_session_cls,
+            patch("shared.github_app_auth.GitHubAppAuth") as mock_auth_cls,
+            patch.dict(os.environ, {
+                "GITHUB_APP_IDS_SECRET_ARN": "arn:ids",
+                "GITHUB_APP_PRIVATE_KEY_SECRET_ARN": "arn:key",
+            }),
+        ):
+            mock_auth_cls.return_value.get_installation_token.return_value = "tok"
+            first = mod._fetch_pr_head_sha_from_url("https://api.github.com/repos/o/r/pulls/1")
+            second = mod._fetch_pr_head_sha_from_url("https://api.github.com/repos/o/r/pulls/2")
+
+        assert first == second == "abc"
+        mock_session_cls.assert_called_once()
+        mock_auth_cls.assert_called_once()
+        assert mock_auth_cls.call_args.kwargs["http_session"] is session
+        assert session.get.call_count == 2
+        assert session.get.call_args.kwargs["headers"] == {"Authorization": "token tok"}
+
 
 class TestReviewTriggerLabelsWorkerFilter:
     """Worker _should_skip_review respects REVIEW_TRIGGER_LABELS."""
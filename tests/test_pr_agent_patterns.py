@@ -0,0 +1,255 @@
+"""Tests for PRFileCompressor scoring and token-budget packing."""
+from __future__ import annotations
+
+from worker.pr_agent_patterns import HUNK_ELISION, PRAgentPromptBuilder, PRFileCompressor, estimate_tokens
+
+
+def _file(name: str, patch: str, changes: int = 10, status: str = "modified") -> dict:
+    return {"filename": name, "status": status, "changes": changes, "patch": patch}
+
+
+def test_estimate_tokens_default_ratio() -> None:
+    assert estimate_tokens("a" * 40) == 10
+
+
+def test_custom_token_counter_drives_budget() -> None:
+    def count(text: str) -> int:
+        return len(text.split())
+
+    compressor = PRFileCompressor(max_tokens=5, token_counter=count)
+    files = [
+        _file("src/a.py", "one two three", changes=50),
+        _file("src/b.py", "four five six", changes=5),
+    ]
+
+    result = compressor.compress_files(files)
+
+    assert [f["filename"] for f in result] == ["src/a.py"]
+    assert compressor.score_file(files[0]).estimated_tokens == 3
+
+
+def test_token_counter_memoized_per_patch() -> None:
+    calls: list[str] = []
+
+    def count(text: str) -> int:
+        calls.append(text)
+        return len(text)
+
+    compressor = PRFileCompressor(token_counter=count)
+    f = _file("src/a.py", "x" * 100)
+    compressor.score_file(f)
+    compressor.score_file(f)
+
+    assert calls == ["x" * 100]
+
+
+def test_truncation_uses_counter_ratio() -> None:
+    # 2 chars per token under this counter; 10-token budget -> 20 chars kept
+    compressor = PRFileCompressor(max_tokens=10, token_counter=lambda t: len(t) // 2)
+    result = compressor.compress_files([_file("src/big.py", "y" * 200)])
+
+    assert result[0]["truncated"] is True
+    assert result[0]["patch"].startswith("y" * 20 + "\n")
+
+
+def test_score_files_batch_weights() -> None:
+    compressor = PRFileCompressor()
+    files = [
+        _file("src/auth/login.py", "p"),                    # 10 + 5 + 8
+        _file("app/src/handler.tf", "p", status="added"),   # 7 + 4 + 3
+        _file("tests/test_x.js", "p", changes=600),         # 10 + 4 - 3 - 5
+        _file("README", "p", status="removed"),             # 2
+    ]
+
+    scores = [s.score for s in compressor.score_files_batch(files)]
+
+    assert scores == [23.0, 14.0, 6.0, 2.0]
+    assert compressor.score_file(files[0]).score == 23.0
+
+
+def test_compress_files_packs_smaller_files_after_cutoff() -> None:
+    compressor = PRFileCompressor(max_tokens=10, token_counter=len)
+    files = [
+        _file("src/auth.py", "a" * 6),             # highest score, fits
+        _file("src/big.py", "b" * 8),              # does not fit after auth.py
+        _file("lib/small.go", "c" * 3),            # lower score, still fits
+    ]
+
+    result = compressor.compress_files(files)
+
+    assert [f["filename"] for f in result] == ["src/auth.py", "lib/small.go"]
+    assert "truncated" not in result[0]
+
+
+def test_compress_files_without_truncation_skips_oversized_first() -> None:
+    compressor = PRFileCompressor(max_tokens=5, token_counter=len)
+    files = [_file("src/auth.py", "a" * 50), _file("lib/x.go", "c" * 4)]
+
+    result = compressor.compress_files(files, allow_truncation=False)
+
+    assert [f["filename"] for f in result] == ["lib/x.go"]
+
+
+def test_should_review_file_filters() -> None:
+    compressor = PRFileCompressor()
+
+    assert compressor.should_review_file("src/app/handler.py")
+    assert compressor.should_review_file("infra/main.tf")
+    assert not compressor.should_review_file("web/node_modules/pkg/index.js")
+    assert not compressor.should_review_file("static/app.MIN.js")
+    assert not compressor.should_review_file("api/service.pb.go")
+    assert not compressor.should_review_file("docs/guide.md")
+    assert not compressor.should_review_file("web/pnpm-lock.yaml")
+    assert not compressor.should_review_file("Pipfile.lock")
+
+
+def test_truncation_keeps_densest_hunks_whole() -> None:
+    context = "\n".join(" unchanged" for _ in range(20))
+    hunks = [
+        "@@ -1,20 +1,20 @@\n" + context,                      # no changes
+        "@@ -30,3 +30,3 @@\n-old\n+new\n same",             # dense
+        "@@ -60,20 +60,20 @@\n" + context,                  # no changes
+    ]
+    patch = "\n".join(hunks)
+    compressor = PRFileCompressor(max_tokens=60, token_counter=lambda t: len(t) // 4)
+
+    result = compressor.compress_files([_file("src/big.py", patch)])
+
+    assert result[0]["truncated"] is True
+    assert result[0]["patch"] == "\n".join([
+        HUNK_ELISION.format(n=1),
+        hunks[1],
+        HUNK_ELISION.format(n=1),
+    ])
+
+
+def test_truncation_charges_every_emitted_elision_line() -> None:
+    context = "\n".join(" unchanged" for _ in range(20))
+    dense = "@@ -30,3 +30,3 @@\n-old\n+new\n same"
+    patch = "\n".join(["@@ -1,20 +1,20 @@\n" + context, dense, "@@ -60,20 +60,20 @@\n" + context])
+
+    def count(text: str) -> int:
+        return len(text) // 4
+
+    for budget in range(30, 130, 5):
+        compressor = PRFileCompressor(max_tokens=budget, token_counter=count)
+        result = compressor.compress_files([_file("src/big.py", patch)])[0]["patch"]
+        if "hunks elided" in result:
+            assert count(result) <= budget, budget
+
+
+def test_densify_patch_keeps_changes_and_adjacent_context() -> None:
+    patch = "\n".join([
+        "@@ -1,9 +1,9 @@",
+        " a",
+        " b",
+        " c",
+        "-old",
+        "+new",
+        " d",
+        " e",
+        " f",
+        "\\ No newline at end of file",
+    ])
+
+    assert PRFileCompressor.densify_patch(patch) == "\n".join([
+        "@@ -1,9 +1,9 @@",
+        " c",
+        "-old",
+        "+new",
+        " d",
+        "\\ No newline at end of file",
+    ])
+
+
+def test_drop_context_applies_before_budgeting() -> None:
+    patch = "@@ -1,7 +1,7 @@\n" + " ctx\n" * 40 + "-x\n+y"
+    compressor = PRFileCompressor(max_tokens=40, token_counter=len, drop_context=True)
+
+    result = compressor.compress_files([_file("src/a.py", patch)], allow_truncation=False)
+
+    assert result[0]["patch"] == "@@ -1,7 +1,7 @@\n ctx\n-x\n+y"
+
+
+def test_batch_token_counter_counts_each_patch_once() -> None:
+    batches: list[list[str]] = []
+
+    def count_batch(texts: list[str]) -> list[int]:
+        batches.append(texts)
+        return [len(t) for t in texts]
+
+    def single(_text: str) -> int:
+        raise AssertionError("per-file counter should not be used")
+
+    compressor = PRFileCompressor(token_counter=single, batch_token_counter=count_batch)
+    files = [_file("src/a.py", "aaa"), _file("src/b.py", "bb"), _file("src/c.py", "aaa")]
+
+    scores = compressor.score_files_batch(files)
+    compressor.score_files_batch(files)
+
+    assert [s.estimated_tokens for s in scores] == [3, 2, 3]
+    assert batches == [["aaa", "bb"]]
+
+
+def test_build_review_prompt_matches_full_template() -> None:
+    files = [{"filename": "src/a.py", "status": "modified", "changes": 3, "patch": "+{x}"}]
+    kwargs = dict(
+        repo="o/r", pr_number=7, title="T {y}", description="", author="dev",
+        additions=2, deletions=1,
+    )
+
+    prompt = PRAgentPromptBuilder().build_review_prompt(files=files, **kwargs)["prompt"]
+
+    expected = PRAgentPromptBuilder.REVIEW_PROMPT_TEMPLATE.format(
+        description="(no description provided)",
+        files_changed=1,
+        file_changes="### File 1: `src/a.py` (MODIFIED, 3 changes)\n\n```diff\n+{x}\n```\n",
+        **{k: v for k, v in kwargs.items() if k != "description"},
+    )
+    assert prompt == expected
+
+
+def test_build_review_prompt_cacheable_blocks_lead_with_static_text() -> None:
+    builder = PRAgentPromptBuilder()
+    files = [{"filename": "src/a.py", "status": "added", "changes": 1, "patch": "+x"}]
+    first = builder.build_review_prompt("o/r", 1, "A", "", "dev", files, 1, 0)
+    second = builder.build_review_prompt("o/r", 2, "B", "d", "dev", [], 0, 0)
+
+    assert first["system_blocks"][0]["cache_control"] == {"type": "ephemeral"}
+    static, dynamic = first["content_blocks"]
+    assert static == second["content_blocks"][0]
+    assert static["cache_control"] == {"type": "ephemeral"}
+    assert "## Review Instructions" in static["text"]
+    assert "cache_control" not in dynamic
+    assert "PR #1:** A" in dynamic["text"] and "+x" in dynamic["text"]
+
+
+def _code_patch(prefix: str, lines: int) -> str:
+    # Code-like lines rather than 'a' * N, which real BPE tokenizers collapse
+    return "\n".join(
+        f"+    {prefix}_{i} = compute_{prefix}(arg_{i}, limit={i * 7})" for i in range(lines)
+    )
+
+
+def test_compression_with_code_like_patches_stays_in_budget() -> None:
+    compressor = PRFileCompressor(max_tokens=1000)
+    files = [_file(f"src/{name}.py", _code_patch(name, 40)) for name in ("app", "lib", "util")]
+
+    compressed = compressor.compress_files(files)
+
+    assert len(compressed) == 2
+    assert sum(compressor.count_tokens(f["patch"]) for f in compressed) <= 1000
+
+
+def test_compress_files_fast_path_keeps_order_when_all_fit() -> None:
+    compressor = PRFileCompressor(max_tokens=100, token_counter=len)
+    files = [
+        _file("README.md", "r"),
+        _file("tests/test_a.py", "t"),
+        _file("src/auth.py", "a"),
+    ]
+
+    result = compressor.compress_files(files)
+
+    assert [f["filename"] for f in result] == ["tests/test_a.py", "src/auth.py"]
+    assert result[1]["score"] > result[0]["score"]
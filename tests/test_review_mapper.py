@@ -0,0 +1,27 @@
+from worker.review_mapper import build_line_to_position_index, map_new_line_to_diff_position
+
+PATCH = (
+    "@@ -1,3 +1,4 @@\n"
+    " a\n"
+    "-b\n"
+    "+x\n"
+    "+y\n"
+    " c\n"
+    "\\ No newline at end of file\n"
+    "@@ -20,2 +21,2 @@\n"
+    "-old\n"
+    "+new\n"
+    " tail"
+)
+
+
+def test_index_matches_per_line_mapping() -> None:
+    index = build_line_to_position_index(PATCH)
+
+    for line in range(0, 30):
+        assert index.get(line) == map_new_line_to_diff_position(PATCH, line)
+    assert index == {1: 1, 2: 3, 3: 4, 4: 5, 21: 7, 22: 8}
+
+
+def test_index_of_empty_patch_is_empty() -> None:
+    assert build_line_to_position_index("") == {}
@@ -50,3 +50,9 @@ def test_review_mode_strict_inline_keeps_when_all_mapped() -> None:
     """strict_inline should keep comments when every finding is mappable."""
     comments = _select_inline_comments([_finding()], _files(), "strict_inline")
     assert len(comments) == 1
+
+
+def test_inline_comment_appends_suggested_patch_block() -> None:
+    finding = _finding().model_copy(update={"suggested_patch": "-b\n+x"})
+    comments = _select_inline_comments([finding], _files(), "inline_best_effort")
+    assert comments[0]["body"] == "Issue\n\nSuggested patch:\n```diff\n-b\n+x\n```"
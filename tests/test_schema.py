@@ -1,4 +1,5 @@
 import pytest
+from pydantic import ValidationError
 
 from shared.schema import TicketCompliance, parse_review_result
 
@@ -38,6 +39,31 @@ def test_schema_invalid_extra_field() -> None:
         parse_review_result(payload)
 
 
+def test_schema_models_are_frozen() -> None:
+    result = parse_review_result(
+        {
+            "summary": "x",
+            "overall_risk": "low",
+            "findings": [
+                {
+                    "type": "bug",
+                    "severity": "high",
+                    "file": "a.py",
+                    "start_line": 1,
+                    "end_line": 1,
+                    "message": "boom",
+                    "suggested_patch": None,
+                }
+            ],
+        }
+    )
+
+    with pytest.raises(ValidationError):
+        result.findings[0].message = "changed"
+    with pytest.raises(ValidationError):
+        result.summary = "changed"
+
+
 def test_schema_ticket_compliance_present() -> None:
     payload = {
         "summary": "Adds user auth behind PROJ-42 ticket",
@@ -18,3 +18,51 @@ def test_verify_signature_failure() -> None:
     bad_signature = "sha256=deadbeef"
 
     assert verify_signature(body, bad_signature, secret) is False
+
+
+def test_verify_signature_reuses_template_across_calls_and_secrets() -> None:
+    body_a = b'{"a":1}'
+    body_b = b'{"b":2}'
+    secret = b"topsecret"
+    other_secret = b"rotated"
+
+    for body in (body_a, body_b, body_a):
+        signature = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+        assert verify_signature(body, signature, secret) is True
+
+    rotated = "sha256=" + hmac.new(other_secret, body_a, hashlib.sha256).hexdigest()
+    assert verify_signature(body_a, rotated, other_secret) is True
+    assert verify_signature(body_a, rotated, secret) is False
+
+
+def test_verify_signature_accepts_bytes_and_rejects_non_ascii_header() -> None:
+    body = b'{"hello":"world"}'
+    secret = b"topsecret"
+    signature = b"sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest().encode()
+
+    assert verify_signature(body, signature, secret) is True
+    assert verify_signature(body, "sha256=\u00e9" + "0" * 63, secret) is False
+    assert verify_signature(body, b"", secret) is False
+
+
+def test_verify_signature_rejects_malformed_hex_without_raising() -> None:
+    body = b'{"hello":"world"}'
+    secret = b"topsecret"
+    digest = hmac.new(secret, body, hashlib.sha256).hexdigest()
+
+    assert verify_signature(body, "sha256=" + digest[:-2], secret) is False
+    assert verify_signature(body, "sha256=" + digest + "00", secret) is False
+    assert verify_signature(body, "sha256=" + "zz" * 32, secret) is False
+    assert verify_signature(body, "sha256=" + digest[:-1], secret) is False
+
+
+def test_verify_signature_runs_fixed_size_compare_for_malformed_headers() -> None:
+    from unittest.mock import patch
+
+    body = b'{"hello":"world"}'
+    secret = b"topsecret"
+    with patch("webhook_receiver.app.hmac.compare_digest", wraps=hmac.compare_digest) as compare:
+        for header in ("", "sha1=abc", "sha256=xyz", "sha256=" + "ab" * 31):
+            assert verify_signature(body, header, secret) is False
+    assert compare.call_count == 4
+    assert all(len(c.args[0]) == len(c.args[1]) == 32 for c in compare.call_args_list)
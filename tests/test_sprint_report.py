@@ -80,6 +80,31 @@ def test_fetch_github_activity() -> None:
     gh.list_commits.assert_called_once()
 
 
+def test_fetch_github_activity_pages_until_window_exhausted() -> None:
+    gh = MagicMock()
+    page1 = [
+        {"number": n, "title": f"pr {n}", "user": {"login": "dev"},
+         "merged_at": "2024-06-02T00:00:00Z", "updated_at": "2024-06-02T00:00:00Z"}
+        for n in range(100)
+    ]
+    page2 = [
+        {"number": 100, "title": "recent", "user": {"login": "dev"},
+         "merged_at": "2024-06-01T06:00:00Z", "updated_at": "2024-06-01T06:00:00Z"},
+        {"number": 101, "title": "stale", "user": {"login": "dev"},
+         "merged_at": "2024-05-01T00:00:00Z", "updated_at": "2024-05-01T00:00:00Z"},
+    ] + [{"number": 200 + n, "updated_at": "2024-04-01T00:00:00Z"} for n in range(98)]
+    gh.list_pulls.side_effect = [page1, page2, AssertionError("fetched past window")]
+    gh.list_commits.side_effect = [[{"sha": f"c{n}"} for n in range(100)], [{"sha": "last"}]]
+
+    activity = _fetch_github_activity(gh, "o", "r", "2024-06-01T00:00:00Z")
+
+    assert len(activity["merged_prs"]) == 101
+    assert gh.list_pulls.call_count == 2
+    assert gh.list_pulls.call_args.kwargs["page"] == 2
+    assert len(activity["commits"]) == 101
+    assert gh.list_commits.call_count == 2
+
+
 def test_fetch_jira_sprint_data() -> None:
     mock_atlassian = MagicMock()
     mock_atlassian.search_jira.return_value = [
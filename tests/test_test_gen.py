@@ -2,22 +2,36 @@
 
 from __future__ import annotations
 
+import base64
+import dataclasses
 import json
 from unittest.mock import MagicMock, call, patch
 
+import pytest
+
+import test_gen.app as test_gen_app
 from test_gen.app import (
+    _EarlyDraftBranch,
     _handle_file_request,
     _is_safe_generated_test_path,
     _is_testable,
     _parse_test_files,
     _post_as_draft_pr,
+    _prompt_cache_enabled,
     _select_testable_files,
+    _StreamingTestFileParser,
     generate_tests,
     generate_tests_for_file,
     lambda_handler,
 )
 
 
+@pytest.fixture(autouse=True)
+def _reset_warm_clients() -> None:
+    test_gen_app._http_session_cached = None
+    test_gen_app._chat_clients_cached.clear()
+
+
 # -- File filtering tests ------------------------------------------------------
 
 
@@ -57,6 +71,19 @@ class TestIsTestable:
     def test_go_test_file_excluded(self) -> None:
         assert _is_testable("cmd/main_test.go") is False
 
+    def test_matching_is_case_insensitive(self) -> None:
+        assert _is_testable("docs/GUIDE.MD") is False
+        assert _is_testable("static/App.Min.JS") is False
+        assert _is_testable("src/Tests/helpers.py") is False
+
+    def test_accepts_precomputed_lowercase(self) -> None:
+        assert _is_testable("src/Tests/helpers.py", "src/tests/helpers.py") is False
+        assert _is_testable("src/Main.py", "src/main.py") is True
+
+    def test_nested_known_filename_excluded(self) -> None:
+        assert _is_testable("services/api/Dockerfile") is False
+        assert _is_testable("services/api/Dockerfile.py") is True
+
 
 class TestSelectTestableFiles:
     def test_filters_and_caps(self) -> None:
@@ -136,6 +163,44 @@ def test_safe(): pass
         assert files[0][0] == "tests/test_safe.py"
 
 
+    def test_ignores_unterminated_block(self) -> None:
+        markdown = """```python
+# Test file: tests/test_ok.py
+def test_ok(): pass
+```
+
+```python
+# Test file: tests/test_cut.py
+def test_cut(): pa"""
+        files = _parse_test_files(markdown)
+        assert files == [("tests/test_ok.py", "def test_ok(): pass")]
+
+    def test_streaming_parser_matches_full_parse(self) -> None:
+        markdown = """Intro
+```python
+# Test file: tests/test_a.py
+def test_a(): pass
+```
+
+```python
+# Just some code
+```
+
+```ruby
+# Test file: spec/b_spec.rb
+it "b" do end
+```
+```python
+# Test file: tests/test_cut.py
+def test_cut(): pa"""
+        emitted: list[tuple[str, str]] = []
+        parser = _StreamingTestFileParser(lambda path, content: emitted.append((path, content)))
+        for i in range(0, len(markdown), 7):
+            parser.feed(markdown[i:i + 7])
+        assert emitted == _parse_test_files(markdown)
+        assert [path for path, _ in emitted] == ["tests/test_a.py", "spec/b_spec.rb"]
+
+
 # -- Generate tests -----------------------------------------------------------
 
 
@@ -158,6 +223,55 @@ def test_generate_tests(mock_chat_cls: MagicMock) -> None:
     mock_chat.answer.assert_called_once()
 
 
+@patch("test_gen.app.BedrockChatClient")
+def test_generate_tests_fetches_contents_in_order_and_tolerates_failures(mock_chat_cls: MagicMock) -> None:
+    mock_chat = MagicMock()
+    mock_chat.answer.return_value = "ok"
+    mock_chat_cls.return_value = mock_chat
+
+    gh = MagicMock()
+    gh.get_pull_request.return_value = {"number": 1, "title": "feat"}
+    gh.get_pull_request_files.return_value = [
+        {"filename": f"src/mod{i}.py", "status": "modified", "patch": f"p{i}"} for i in range(4)
+    ]
+
+    def _contents(owner: str, repo: str, path: str, ref: str) -> tuple[str, str]:
+        if path == "src/mod2.py":
+            raise RuntimeError("404")
+        return f"body of {path}", "sha"
+
+    gh.get_file_contents.side_effect = _contents
+    gh.get_files_contents_batch.side_effect = RuntimeError("graphql unavailable")
+
+    generate_tests(gh, "o", "r", 1, "sha123", "claude", "us-gov-west-1")
+
+    prompt = mock_chat.answer.call_args.args[1]
+    positions = [prompt.index(f"## File: src/mod{i}.py") for i in range(4)]
+    assert positions == sorted(positions)
+    assert "body of src/mod1.py" in prompt
+    assert "body of src/mod2.py" not in prompt
+    assert gh.get_file_contents.call_count == 4
+
+
+@patch("test_gen.app.BedrockChatClient")
+def test_generate_tests_uses_batched_contents(mock_chat_cls: MagicMock) -> None:
+    mock_chat_cls.return_value.answer.return_value = "ok"
+    gh = MagicMock()
+    gh.get_pull_request.return_value = {"number": 1, "title": "feat"}
+    gh.get_pull_request_files.return_value = [
+        {"filename": "src/a.py", "status": "modified", "patch": "pa"},
+        {"filename": "src/b.py", "status": "modified", "patch": "pb"},
+    ]
+    gh.get_files_contents_batch.return_value = {"src/a.py": "body of a"}
+
+    generate_tests(gh, "o", "r", 1, "sha123", "claude", "us-gov-west-1")
+
+    gh.get_files_contents_batch.assert_called_once_with("o", "r", ["src/a.py", "src/b.py"], "sha123")
+    gh.get_file_contents.assert_not_called()
+    prompt = mock_chat_cls.return_value.answer.call_args.args[1]
+    assert "body of a" in prompt
+
+
 @patch("test_gen.app.BedrockChatClient")
 def test_generate_tests_no_testable_files(mock_chat_cls: MagicMock) -> None:
     gh = MagicMock()
@@ -173,11 +287,184 @@ def test_generate_tests_no_testable_files(mock_chat_cls: MagicMock) -> None:
     mock_chat_cls.assert_not_called()
 
 
+@patch("test_gen.app.BedrockChatClient")
+def test_chat_client_reused_across_invocations(mock_chat_cls: MagicMock) -> None:
+    mock_chat_cls.return_value.answer.return_value = "ok"
+    gh = MagicMock()
+    gh.get_pull_request.return_value = {"number": 1, "title": "feat"}
+    gh.get_pull_request_files.return_value = [{"filename": "src/main.py", "status": "modified", "patch": "@@"}]
+    gh.get_file_contents.return_value = ("code", "sha")
+
+    generate_tests(gh, "o", "r", 1, "sha123", "claude", "us-gov-west-1")
+    generate_tests(gh, "o", "r", 2, "sha456", "claude", "us-gov-west-1")
+
+    mock_chat_cls.assert_called_once()
+    assert mock_chat_cls.return_value.answer.call_count == 2
+
+
+def _config(**env: str) -> "test_gen_app._Config":
+    with patch.dict("os.environ", env):
+        return test_gen_app._Config.from_env()
+
+
+def test_prompt_cache_enabled_requires_flag_and_supported_model() -> None:
+    with patch("test_gen.app._CFG", _config(TEST_GEN_PROMPT_CACHE="true")):
+        assert _prompt_cache_enabled("anthropic.claude-3-5-sonnet-20240620-v1:0") is True
+        assert _prompt_cache_enabled("anthropic.claude-3-sonnet-20240229-v1:0") is False
+    with patch("test_gen.app._CFG", _config(TEST_GEN_PROMPT_CACHE="false")):
+        assert _prompt_cache_enabled("anthropic.claude-3-5-sonnet-20240620-v1:0") is False
+
+
+def test_config_reads_environment_once() -> None:
+    cfg = _config(
+        TEST_GEN_MODEL_ID="", BEDROCK_MODEL_ID="fallback-model",
+        TEST_GEN_DELIVERY_MODE="DRAFT_PR", DRY_RUN="True",
+    )
+    assert cfg.model_id == "fallback-model"
+    assert cfg.delivery_mode == "draft_pr"
+    assert cfg.dry_run is True
+
+
+def test_github_auth_requires_secret_arns() -> None:
+    with patch.dict("os.environ", {"GITHUB_APP_PRIVATE_KEY_SECRET_ARN": "arn:key"}, clear=True):
+        with pytest.raises(KeyError, match="GITHUB_APP_IDS_SECRET_ARN"):
+            test_gen_app._github_auth()
+
+
+@patch("test_gen.app.BedrockChatClient")
+def test_generate_tests_streams_when_callback_given(mock_chat_cls: MagicMock) -> None:
+    def _stream(_system, _user, on_delta=None, telemetry=None):
+        for delta in ("```python\n# Test file: tests/test_main.py\n", "def test_it(): pass\n```", "\ntrailer"):
+            on_delta(delta)
+        return "full output"
+
+    mock_chat_cls.return_value.stream_answer.side_effect = _stream
+    gh = MagicMock()
+    gh.get_pull_request.return_value = {"number": 1, "title": "feat"}
+    gh.get_pull_request_files.return_value = [{"filename": "src/main.py", "status": "modified", "patch": "@@"}]
+    emitted: list[tuple[str, str]] = []
+
+    output, _ = generate_tests(
+        gh, "o", "r", 1, "sha123", "claude", "us-gov-west-1",
+        on_test_file=lambda path, content: emitted.append((path, content)),
+    )
+
+    assert output == "full output"
+    assert emitted == [("tests/test_main.py", "def test_it(): pass")]
+    mock_chat_cls.return_value.answer.assert_not_called()
+
+
+def test_post_as_draft_pr_git_data_fallback_uploads_duplicate_content_once() -> None:
+    gh = MagicMock()
+    gh.get_ref.return_value = {"object": {"sha": "base_sha"}}
+    gh.create_commit_on_branch.side_effect = RuntimeError("GraphQL errors")
+    gh.create_blob.side_effect = ["blob1", "blob2"]
+    gh.get_git_commit.return_value = {"tree": {"sha": "base_tree"}}
+    gh.create_tree.return_value = "tree_sha"
+    gh.create_commit.return_value = "commit_sha"
+    gh.create_pull_request.return_value = {"number": 99, "html_url": "http://example.com/99"}
+    test_output = (
+        "```python\n# Test file: tests/test_a.py\nimport pytest\n```\n"
+        "```python\n# Test file: tests/test_b.py\nimport pytest\n```\n"
+        "```python\n# Test file: tests/test_c.py\ndef test_c(): pass\n```"
+    )
+
+    _post_as_draft_pr(gh, "o", "r", 42, "abc12345", "main", test_output)
+
+    assert gh.create_blob.call_count == 2
+    gh.create_tree.assert_called_once_with(
+        "o", "r", "base_tree",
+        {"tests/test_a.py": "blob1", "tests/test_b.py": "blob1", "tests/test_c.py": "blob2"},
+    )
+    gh.create_commit.assert_called_once_with("o", "r", "AI test suggestions (3 file(s))", "tree_sha", ["base_sha"])
+    gh.update_ref.assert_called_once_with("o", "r", "heads/ai-tests/pr-42-abc12345", "commit_sha")
+    gh.put_file_contents.assert_not_called()
+
+
+def test_early_draft_branch_created_once_on_first_test_file() -> None:
+    gh = MagicMock()
+    gh.get_ref.return_value = {"object": {"sha": "base_sha"}}
+    early = _EarlyDraftBranch(gh, "o", "r", 42, "abc12345def", "main")
+    assert early.future is None
+
+    early("tests/test_a.py", "a")
+    early("tests/test_b.py", "b")
+
+    assert early.future.result() == "base_sha"
+    gh.create_ref.assert_called_once_with("o", "r", "refs/heads/ai-tests/pr-42-abc12345", "base_sha")
+
+
+def _run_sqs_draft_record(generate, gh: MagicMock | None = None) -> MagicMock:
+    """Process one draft-PR SQS record with *generate* standing in for generate_tests."""
+    gh = gh or MagicMock()
+    gh.get_ref.return_value = {"object": {"sha": "base_sha"}}
+    cfg = dataclasses.replace(test_gen_app._CFG, delivery_mode="draft_pr", dry_run=False)
+    record = {"body": json.dumps({"repo_full_name": "o/r", "pr_number": 42, "head_sha": "abc12345def"})}
+    with patch.object(test_gen_app, "_CFG", cfg), \
+            patch.object(test_gen_app, "_github_auth"), \
+            patch.object(test_gen_app, "_github_client", return_value=gh), \
+            patch.object(test_gen_app, "generate_tests", side_effect=generate):
+        test_gen_app._process_sqs_record(record)
+    return gh
+
+
+def _stream_then(result):
+    def generate(*_args, on_test_file, **_kwargs):
+        on_test_file("tests/test_a.py", "a")
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return generate
+
+
+def test_early_draft_branch_deleted_when_generation_fails() -> None:
+    gh = MagicMock()
+    with pytest.raises(RuntimeError):
+        _run_sqs_draft_record(_stream_then(RuntimeError("model error")), gh)
+
+    gh.create_ref.assert_called_once()
+    gh.delete_ref.assert_called_once_with("o", "r", "heads/ai-tests/pr-42-abc12345")
+    gh.create_pull_request.assert_not_called()
+
+
+def test_early_draft_branch_deleted_when_output_empty() -> None:
+    gh = _run_sqs_draft_record(_stream_then(("", [])))
+
+    gh.delete_ref.assert_called_once_with("o", "r", "heads/ai-tests/pr-42-abc12345")
+
+
+def test_early_draft_branch_kept_when_it_predates_the_run_or_pr_opens() -> None:
+    existing = MagicMock()
+    existing.create_ref.side_effect = RuntimeError("Reference already exists")
+    _run_sqs_draft_record(_stream_then(("", [])), existing)
+    existing.delete_ref.assert_not_called()
+
+    output = "```python\n# Test file: tests/test_a.py\ndef test_a(): pass\n```"
+    opened = _run_sqs_draft_record(_stream_then((output, ["src/a.py"])))
+    opened.create_pull_request.assert_called_once()
+    opened.delete_ref.assert_not_called()
+
+
+def test_post_as_draft_pr_uses_prepared_branch() -> None:
+    gh = MagicMock()
+    gh.create_pull_request.return_value = {"number": 99, "html_url": "http://example.com/99"}
+    prepared = MagicMock()
+    prepared.result.return_value = "prepared_sha"
+    test_output = "```python\n# Test file: tests/test_x.py\ndef test_x(): pass\n```"
+
+    _post_as_draft_pr(gh, "o", "r", 42, "abc12345", "main", test_output, branch_setup=prepared)
+
+    gh.get_ref.assert_not_called()
+    gh.create_ref.assert_not_called()
+    assert gh.create_commit_on_branch.call_args.args[3] == "prepared_sha"
+    gh.create_pull_request.assert_called_once()
+
+
 # -- Lambda handler tests ------------------------------------------------------
 
 
 @patch("test_gen.app.BedrockChatClient")
-@patch("test_gen.app.GitHubAppAuth")
+@patch("shared.github_app_auth.GitHubAppAuth")
 def test_lambda_handler_api_gateway(mock_auth_cls: MagicMock, mock_chat_cls: MagicMock) -> None:
     mock_chat = MagicMock()
     mock_chat.answer.return_value = "```python\n# Test file: tests/test_main.py\ndef test_it(): pass\n```"
@@ -278,5 +565,42 @@ def test_post_as_draft_pr_existing_branch_is_reused() -> None:
         _post_as_draft_pr(gh, "o", "r", 42, "abc12345", "main", test_output)
 
     mock_comment.assert_not_called()
+    gh.create_commit_on_branch.assert_called_once()
+    assert gh.create_commit_on_branch.call_args.args[3] == "base_sha"
+    gh.put_file_contents.assert_not_called()
+    gh.create_pull_request.assert_called_once()
+
+
+def test_post_as_draft_pr_commits_all_files_in_one_graphql_commit() -> None:
+    gh = MagicMock()
+    gh.get_ref.return_value = {"object": {"sha": "base_sha"}}
+    gh.create_pull_request.return_value = {"number": 99, "html_url": "http://example.com/99"}
+    test_output = (
+        "```python\n# Test file: tests/test_a.py\ndef test_a(): pass\n```\n"
+        "```python\n# Test file: tests/test_b.py\ndef test_b(): pass\n```"
+    )
+
+    _post_as_draft_pr(gh, "o", "r", 42, "abc12345", "main", test_output)
+
+    args = gh.create_commit_on_branch.call_args.args
+    assert args[:4] == ("o", "r", "ai-tests/pr-42-abc12345", "base_sha")
+    assert [a["path"] for a in args[4]] == ["tests/test_a.py", "tests/test_b.py"]
+    assert base64.b64decode(args[4][0]["contents"]).decode() == "def test_a(): pass"
+    gh.put_file_contents.assert_not_called()
+
+
+def test_post_as_draft_pr_falls_back_to_rest_when_graphql_commit_fails() -> None:
+    gh = MagicMock()
+    gh.get_ref.return_value = {"object": {"sha": "base_sha"}}
+    gh.create_commit_on_branch.side_effect = RuntimeError("GraphQL errors")
+    gh.create_blob.side_effect = RuntimeError("HTTP 403")
+    gh.create_pull_request.return_value = {"number": 99, "html_url": "http://example.com/99"}
+    test_output = "```python\n# Test file: tests/test_x.py\ndef test_x(): pass\n```"
+
+    _post_as_draft_pr(gh, "o", "r", 42, "abc12345", "main", test_output)
+
     gh.put_file_contents.assert_called_once()
+    kwargs = gh.put_file_contents.call_args.kwargs
+    assert kwargs["content_b64"] == gh.create_commit_on_branch.call_args.args[4][0]["contents"]
+    assert base64.b64decode(kwargs["content_b64"]).decode() == "def test_x(): pass"
     gh.create_pull_request.assert_called_once()
@@ -6,9 +6,12 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from shared.schema import Finding
+from shared.schema import Finding, ReviewResult
 from worker.app import (
+    _adapt_fixable_findings,
     _derive_conclusion,
+    _format_review_body,
+    _is_sensitive_file,
     _load_repo_config,
     _sanitize_findings,
     _should_skip_review,
@@ -59,6 +62,19 @@ def test_load_repo_config_returns_empty_on_missing_file() -> None:
     assert cfg == {}
 
 
+def test_load_repo_config_handles_case_indent_quotes_and_comments() -> None:
+    gh = _make_gh(
+        "# top comment\r\n"
+        "  FAILURE_ON_SEVERITY : \"medium\"\r\n"
+        "#skip_draft_prs: true\r\n"
+        "skip_draft_prs_extra: true\r\n"
+        "num_max_findings: 2\n"
+        "num_max_findings: 5\n"
+    )
+    cfg = _load_repo_config(gh, "org", "repo", "main")
+    assert cfg == {"failure_on_severity": "medium", "num_max_findings": "5"}
+
+
 def test_load_repo_config_returns_empty_on_bad_yaml() -> None:
     gh = _make_gh("not_yaml: [unclosed bracket\n")
     # Our minimal parser doesn't raise on invalid YAML — so just verify no crash
@@ -66,6 +82,116 @@ def test_load_repo_config_returns_empty_on_bad_yaml() -> None:
     assert isinstance(cfg, dict)
 
 
+def test_load_repo_config_caches_per_ref() -> None:
+    gh = _make_gh("failure_on_severity: low\n")
+    first = _load_repo_config(gh, "org", "repo", "sha1")
+    first["failure_on_severity"] = "mutated"
+
+    assert _load_repo_config(gh, "org", "repo", "sha1") == {"failure_on_severity": "low"}
+    assert gh.get_file_contents.call_count == 1
+    _load_repo_config(gh, "org", "repo", "sha2")
+    assert gh.get_file_contents.call_count == 2
+
+
+def test_load_repo_config_caches_404_but_not_other_errors() -> None:
+    missing = Exception("Not Found")
+    missing.response = MagicMock(status_code=404)
+    gh = MagicMock()
+    gh.get_file_contents.side_effect = missing
+    _load_repo_config(gh, "org", "repo", "sha1")
+    assert _load_repo_config(gh, "org", "repo", "sha1") == {}
+    assert gh.get_file_contents.call_count == 1
+
+    gh.get_file_contents.side_effect = RuntimeError("timeout")
+    _load_repo_config(gh, "org", "repo", "sha2")
+    _load_repo_config(gh, "org", "repo", "sha2")
+    assert gh.get_file_contents.call_count == 3
+
+
+def test_is_sensitive_file_matches_markers_case_insensitively() -> None:
+    assert _is_sensitive_file("config/PROD.ENV")
+    assert _is_sensitive_file("deploy/Server.Pem")
+    assert _is_sensitive_file("app/Credentials.json")
+    assert not _is_sensitive_file("src/worker/app.py")
+
+
+def _fix(path: str, patch: str | None) -> Finding:
+    return Finding(
+        type="bug", severity="low", file=path, start_line=1, end_line=1,
+        message="m", suggested_patch=patch,
+    )
+
+
+def test_build_autopr_changes_fetches_each_file_once_and_falls_back() -> None:
+    # Import here: other tests re-import worker.app, and patch() targets the live module.
+    from worker.app import _build_autopr_changes
+
+    gh = MagicMock()
+    gh.get_file_contents.side_effect = lambda owner, repo, path, ref: (f"{path}\n", f"sha-{path}")
+    findings = [
+        _fix("a.py", "@@ -1,1 +1,1 @@\n-nope\n+x"),       # does not apply
+        _fix("b.py", "@@ -1,1 +1,1 @@\n-b.py\n+B"),
+        _fix(".env", "@@ -1,1 +1,1 @@\n-.env\n+X"),      # sensitive
+        _fix("a.py", "@@ -1,1 +1,1 @@\n-a.py\n+A"),       # fallback for a.py
+        _fix("c.py", None),
+    ]
+
+    with patch("worker.app.AUTO_PR_MAX_FILES", 5):
+        updates = _build_autopr_changes(gh, "o", "r", "head", findings)
+
+    assert sorted(updates) == [("a.py", "sha-a.py", "A\n"), ("b.py", "sha-b.py", "B\n")]
+    assert sorted(c.args[2] for c in gh.get_file_contents.call_args_list) == ["a.py", "b.py"]
+
+
+def test_build_autopr_changes_refills_up_to_max_files() -> None:
+    from worker.app import _build_autopr_changes
+
+    gh = MagicMock()
+    gh.get_file_contents.side_effect = lambda owner, repo, path, ref: (f"{path}\n", "sha")
+    findings = [_fix("bad.py", "@@ -1,1 +1,1 @@\n-zzz\n+x")] + [
+        _fix(f"f{i}.py", f"@@ -1,1 +1,1 @@\n-f{i}.py\n+y") for i in range(4)
+    ]
+
+    with patch("worker.app.AUTO_PR_MAX_FILES", 2):
+        updates = _build_autopr_changes(gh, "o", "r", "head", findings)
+
+    assert [u[0] for u in updates] == ["f0.py", "f1.py"]
+    assert gh.get_file_contents.call_count == 3
+
+
+def test_adapt_fixable_findings_maps_priority_and_drops_unusable() -> None:
+    def finding(priority, patch="+fix", file="a.py"):
+        return {"type": "bug", "priority": priority, "file": file, "start_line": 1,
+                "end_line": 1, "message": "m", "suggested_patch": patch}
+
+    adapted = _adapt_fixable_findings([
+        finding(0), finding(1), finding(2), finding(5), finding(None), finding(1.0), finding("0"), finding(-1),
+        finding(0, patch=None), finding(0, file=""),
+    ])
+
+    assert [f.severity for f in adapted] == ["high", "medium", "low", "low", "low", "medium", "high", "low"]
+
+
+def test_format_review_body_groups_by_severity_and_type_in_order() -> None:
+    def finding(severity: str, kind: str, path: str, line: int | None, end: int | None, message: str) -> Finding:
+        return Finding(
+            type=kind, severity=severity, file=path, start_line=line, end_line=end,
+            message=message, suggested_patch=None,
+        )
+
+    findings = [
+        finding("low", "style", "a.py", 1, 1, "s1"),
+        finding("high", "bug", "b.py", 2, 3, "b1"),
+        finding("low", "style", "c.py", None, None, "s2"),
+    ]
+    body = _format_review_body(ReviewResult(summary="sum", overall_risk="high", findings=findings))
+
+    headings = [line for line in body.splitlines() if line.startswith("### ")]
+    assert headings == ["### high:bug", "### low:style"]
+    assert body.index("s1") < body.index("s2")
+    assert "- `b.py` (lines 2-3): b1" in body
+
+
 # ---------------------------------------------------------------------------
 # _derive_conclusion — threshold param
 # ---------------------------------------------------------------------------
@@ -88,6 +214,12 @@ def test_derive_conclusion_threshold_high_ignores_medium() -> None:
     assert conclusion != "failure"
 
 
+def test_derive_conclusion_normalises_case_and_priority_strings() -> None:
+    assert _derive_conclusion([{"severity": "HIGH"}], threshold="high")[0] == "failure"
+    assert _derive_conclusion([{"severity": "low", "priority": "1"}], threshold="medium")[0] == "failure"
+    assert _derive_conclusion([{"severity": None, "priority": 2}], threshold="medium")[0] == "neutral"
+
+
 # ---------------------------------------------------------------------------
 # _should_skip_review — branch pattern matching uses re (not _re alias)
 # ---------------------------------------------------------------------------
@@ -130,6 +262,17 @@ def test_should_skip_target_branch_pattern_no_match() -> None:
     assert skip is False
 
 
+def test_should_skip_reports_first_matching_branch_pattern() -> None:
+    with patch.dict(os.environ, {"IGNORE_PR_SOURCE_BRANCHES": "^renovate/,^dependabot/"}):
+        import importlib
+        import worker.app as wa
+        importlib.reload(wa)
+        pr = _make_pr(head_ref="dependabot/pip/requests")
+        skip, reason = wa._should_skip_review(pr, event_action="opened", trigger="auto")
+    assert skip is True
+    assert reason.endswith("pattern '^dependabot/'")
+
+
 def test_should_not_skip_manual_trigger_regardless_of_draft() -> None:
     pr = _make_pr(draft=True)
     skip, _ = _should_skip_review(pr, event_action="", trigger="manual")
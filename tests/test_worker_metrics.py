@@ -1,4 +1,5 @@
 import logging
+import threading
 from unittest.mock import MagicMock, patch
 
 import pytest
@@ -19,3 +20,109 @@ def test_emit_metric_swallows_cloudwatch_errors(caplog: pytest.LogCaptureFixture
         "metric_emit_failed" in record.message
         for record in caplog.records
     ), f"Expected 'metric_emit_failed' warning; got: {[r.message for r in caplog.records]}"
+
+
+def test_lambda_handler_sends_batch_metrics_in_one_call() -> None:
+    # Import here: other tests re-import worker.app, and patch() targets the live module.
+    from worker.app import _emit_metric, lambda_handler
+
+    fake_cloudwatch = MagicMock()
+
+    def process(record: dict) -> None:
+        _emit_metric("reviews_success", 1, dimensions={"repo": "o/r"})
+        if record["messageId"] == "bad":
+            raise RuntimeError("boom")
+
+    with patch("worker.app._cloudwatch", fake_cloudwatch), patch("worker.app._process_record", process):
+        result = lambda_handler({"Records": [{"messageId": "ok"}, {"messageId": "bad"}]}, None)
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "bad"}]}
+    fake_cloudwatch.put_metric_data.assert_called_once()
+    data = fake_cloudwatch.put_metric_data.call_args.kwargs["MetricData"]
+    # Records run concurrently, so metrics from different records may interleave.
+    assert sorted(d["MetricName"] for d in data) == ["reviews_failed", "reviews_success", "reviews_success"]
+    assert next(d for d in data if d["MetricName"] == "reviews_success")["Dimensions"] == [
+        {"Name": "repo", "Value": "o/r"}
+    ]
+
+    # Outside a batch, metrics are sent immediately again.
+    with patch("worker.app._cloudwatch", fake_cloudwatch):
+        _emit_metric("duration_ms", 5, unit="Milliseconds")
+    assert fake_cloudwatch.put_metric_data.call_count == 2
+
+
+def test_put_metric_data_chunks_at_cloudwatch_limit() -> None:
+    from worker.app import _put_metric_data
+
+    fake_cloudwatch = MagicMock()
+    data = [{"MetricName": "m", "Unit": "Count", "Value": i} for i in range(1001)]
+
+    with patch("worker.app._cloudwatch", fake_cloudwatch):
+        _put_metric_data(data)
+
+    sizes = [len(c.kwargs["MetricData"]) for c in fake_cloudwatch.put_metric_data.call_args_list]
+    assert sizes == [1000, 1]
+
+
+def test_lambda_handler_processes_records_concurrently_in_order() -> None:
+    from worker.app import lambda_handler
+
+    all_started = threading.Barrier(3, timeout=5)
+
+    def process(record: dict) -> None:
+        all_started.wait()
+        if record["messageId"] != "ok":
+            raise RuntimeError("boom")
+
+    records = [{"messageId": "bad-1"}, {"messageId": "ok"}, {"messageId": "bad-2"}]
+    with patch("worker.app._cloudwatch", MagicMock()), patch("worker.app._process_record", process):
+        result = lambda_handler({"Records": records}, None)
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "bad-1"}, {"itemIdentifier": "bad-2"}]}
+
+
+def test_lambda_handler_fifo_group_runs_in_order_and_stops_at_first_failure() -> None:
+    from worker.app import lambda_handler
+
+    def fifo(message_id: str, group: str) -> dict:
+        return {
+            "messageId": message_id,
+            "eventSourceARN": "arn:aws:sqs:us-east-1:1:reviews.fifo",
+            "attributes": {"MessageGroupId": group},
+        }
+
+    seen: list[str] = []
+
+    def process(record: dict) -> None:
+        seen.append(record["messageId"])
+        if record["messageId"] == "a2":
+            raise RuntimeError("boom")
+
+    records = [fifo("a1", "o/r:1"), fifo("b1", "o/r:2"), fifo("a2", "o/r:1"), fifo("a3", "o/r:1")]
+    with patch("worker.app._cloudwatch", MagicMock()), patch("worker.app._process_record", process):
+        result = lambda_handler({"Records": records}, None)
+
+    assert result == {"batchItemFailures": [{"itemIdentifier": "a2"}, {"itemIdentifier": "a3"}]}
+    assert [m for m in seen if m.startswith("a")] == ["a1", "a2"]
+    assert "b1" in seen
+
+
+def test_io_pool_created_once_under_concurrent_first_use() -> None:
+    import worker.app as app
+
+    all_waiting = threading.Barrier(8, timeout=5)
+    pools: list = []
+
+    def first_use() -> None:
+        all_waiting.wait()
+        pools.append(app._io_pool())
+
+    with patch("worker.app._io_pool_cached", None), patch("worker.app.ThreadPoolExecutor") as executor_cls:
+        threads = [threading.Thread(target=first_use) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    executor_cls.assert_called_once()
+    assert all(p is pools[0] for p in pools)